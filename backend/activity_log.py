@@ -0,0 +1,122 @@
+"""
+In-memory activity log untuk /dashboard/recent-activities
+
+- Ring buffer (deque maxlen) berurutan waktu, entry terbaru di kanan
+- Diisi oleh write path: check-in dan task selesai
+- Di-warm dari database saat startup (warm_from_db)
+- latest(n) membaca n entry terbaru dalam O(n) tanpa query database
+
+Catatan: log ini per-proses. Dengan beberapa uvicorn worker, setiap worker
+hanya melihat write yang ia proses sendiri sejak startup.
+"""
+import datetime
+import itertools
+import logging
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from models import User, Attendance, Task
+
+logger = logging.getLogger("workflow_id")
+
+ACTIVITY_LOG_SIZE = 200
+
+
+def get_initials(name: str) -> str:
+    """Avatar initials: first letter of the first two words"""
+    return ''.join([word[0].upper() for word in name.split()[:2]])
+
+
+def _naive(ts: datetime.datetime) -> datetime.datetime:
+    """Bandingkan semua timestamp sebagai jam lokal WIB tanpa tzinfo (sama seperti di SQLite)"""
+    return ts.replace(tzinfo=None) if ts.tzinfo else ts
+
+
+class ActivityLog:
+    """Bounded, time-ordered activity log"""
+
+    def __init__(self, maxlen: int = ACTIVITY_LOG_SIZE):
+        self.maxlen = maxlen
+        # (timestamp, payload) - payload sudah dalam bentuk response RecentActivity
+        self._entries: deque = deque(maxlen=maxlen)
+        self._seq = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def record(self, timestamp: datetime.datetime, user_name: str, action: str, activity_type: str) -> Dict[str, Any]:
+        """Tambah satu activity; entry yang lebih tua dari isi buffer disisipkan di posisinya"""
+        timestamp = _naive(timestamp)
+        entry = (timestamp, {
+            "id": next(self._seq),
+            "user_name": user_name,
+            "action": action,
+            "time": timestamp.strftime("%H:%M WIB"),
+            "type": activity_type,
+            "avatar": get_initials(user_name)
+        })
+
+        if not self._entries or timestamp >= self._entries[-1][0]:
+            # Fast path: write baru selalu paling akhir
+            self._entries.append(entry)
+            return entry[1]
+
+        if len(self._entries) == self.maxlen:
+            if timestamp < self._entries[0][0]:
+                return entry[1]  # Lebih tua dari semua isi buffer, tidak disimpan
+            self._entries.popleft()
+
+        index = len(self._entries)
+        while index > 0 and self._entries[index - 1][0] > timestamp:
+            index -= 1
+        self._entries.insert(index, entry)
+        return entry[1]
+
+    def record_check_in(self, timestamp: datetime.datetime, user_name: str) -> Dict[str, Any]:
+        return self.record(timestamp, user_name, "Check-in berhasil", "checkin")
+
+    def record_task_completed(self, timestamp: datetime.datetime, user_name: str, title: str) -> Dict[str, Any]:
+        return self.record(timestamp, user_name, f"Menyelesaikan tugas \"{title}\"", "task")
+
+    def latest(self, n: int = 10) -> List[Dict[str, Any]]:
+        """n entry terbaru, terbaru lebih dulu"""
+        return [payload for _, payload in itertools.islice(reversed(self._entries), n)]
+
+    def warm_from_db(self, db: Session, limit: Optional[int] = None) -> int:
+        """Isi ulang buffer dari check-in dan task selesai terakhir di database"""
+        limit = limit or self.maxlen
+
+        check_ins = db.query(Attendance.check_in_time, User.name).join(
+            User, User.id == Attendance.user_id
+        ).filter(
+            Attendance.check_in_time.isnot(None)
+        ).order_by(Attendance.check_in_time.desc()).limit(limit).all()
+
+        completed_tasks = db.query(Task.completed_at, Task.title, User.name).join(
+            User, User.id == Task.user_id
+        ).filter(
+            Task.completed == True,
+            Task.completed_at.isnot(None)
+        ).order_by(Task.completed_at.desc()).limit(limit).all()
+
+        entries = [(ts, "checkin", name, None) for ts, name in check_ins]
+        entries += [(ts, "task", name, title) for ts, title, name in completed_tasks]
+        entries.sort(key=lambda e: _naive(e[0]))
+
+        self.clear()
+        for ts, activity_type, name, title in entries[-limit:]:
+            if activity_type == "checkin":
+                self.record_check_in(ts, name)
+            else:
+                self.record_task_completed(ts, name, title)
+
+        logger.info(f"[ACTIVITY_LOG] Warmed with {len(self._entries)} entries")
+        return len(self._entries)
+
+
+activity_log = ActivityLog()
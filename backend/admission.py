@@ -0,0 +1,171 @@
+"""
+Admission control + backpressure untuk endpoint berat (check-in)
+
+- Maksimal max_in_flight request diproses bersamaan
+- Sisanya menunggu di antrian pendek (max_queue, queue_timeout)
+- Antrian penuh / terlalu lama menunggu -> 503 cepat dengan Retry-After
+- Fairness per kiosk (key = location): satu kiosk maksimal per_key_limit
+  request (in-flight + antri) -> 429; slot kosong dibagikan round-robin antar kiosk
+
+Lebih baik menolak cepat daripada membiarkan latency semua kiosk naik sampai
+timeout lalu retry bersamaan.
+"""
+import asyncio
+import logging
+import os
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+from fastapi import HTTPException
+
+logger = logging.getLogger("workflow_id")
+
+DEFAULT_KEY = "default"
+
+
+class AdmissionController:
+    """Bounded in-flight limit dengan antrian fair per key"""
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, queue_timeout_ms: float,
+                 per_key_limit: int, retry_after_seconds: int = 2):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout_ms / 1000
+        self.per_key_limit = per_key_limit
+        self.retry_after_seconds = retry_after_seconds
+
+        self._in_flight = 0
+        self._queued = 0
+        self._per_key: Dict[str, int] = {}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+        self._rotation: Deque[str] = deque()
+
+        self.admitted_total = 0
+        self.rejected_total: Dict[str, int] = {"queue_full": 0, "queue_timeout": 0, "per_key_limit": 0}
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "in_flight": self._in_flight,
+            "queue_depth": self._queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "per_key_limit": self.per_key_limit,
+            "admitted_total": self.admitted_total,
+            "rejected_total": dict(self.rejected_total),
+            "active_keys": dict(self._per_key)
+        }
+
+    def _reject(self, status_code: int, reason: str, detail: str) -> None:
+        self.rejected_total[reason] += 1
+        logger.warning(f"[ADMISSION] {self.name} rejected ({reason}) - in_flight: {self._in_flight}, queued: {self._queued}")
+        raise HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after_seconds)}
+        )
+
+    def _leave_key(self, key: str) -> None:
+        self._per_key[key] -= 1
+        if self._per_key[key] <= 0:
+            del self._per_key[key]
+
+    async def acquire(self, key: Optional[str] = None) -> str:
+        key = key or DEFAULT_KEY
+
+        if self._per_key.get(key, 0) >= self.per_key_limit:
+            self._reject(429, "per_key_limit", "Terlalu banyak request dari lokasi ini. Coba lagi sebentar.")
+
+        # Slot kosong dan tidak ada yang antri -> langsung masuk
+        if self._in_flight < self.max_in_flight and not self._queued:
+            self._in_flight += 1
+            self._per_key[key] = self._per_key.get(key, 0) + 1
+            self.admitted_total += 1
+            return key
+
+        if self._queued >= self.max_queue:
+            self._reject(503, "queue_full", "Server sedang sibuk. Coba lagi sebentar.")
+
+        future = asyncio.get_running_loop().create_future()
+        if key not in self._waiters:
+            self._waiters[key] = deque()
+            self._rotation.append(key)
+        self._waiters[key].append(future)
+        self._queued += 1
+        self._per_key[key] = self._per_key.get(key, 0) + 1
+
+        try:
+            await asyncio.wait({future}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Client disconnect saat antri: kembalikan slot kalau sudah sempat diberikan
+            if future.done() and not future.cancelled():
+                self.release(key)
+            else:
+                self._drop_waiter(key, future)
+            raise
+
+        if not future.done():
+            self._drop_waiter(key, future)
+            self._reject(503, "queue_timeout", "Server sedang sibuk. Coba lagi sebentar.")
+
+        # Slot sudah dipindahkan oleh release(), in_flight tidak berubah
+        self.admitted_total += 1
+        return key
+
+    def _drop_waiter(self, key: str, future: asyncio.Future) -> None:
+        queue = self._waiters.get(key)
+        if queue is not None and future in queue:
+            queue.remove(future)
+            self._queued -= 1
+            if not queue:
+                del self._waiters[key]
+                self._rotation.remove(key)
+        future.cancel()
+        self._leave_key(key)
+
+    def release(self, key: str) -> None:
+        self._leave_key(key)
+
+        # Serahkan slot ke kiosk berikutnya (round-robin), bukan ke yang paling ramai
+        while self._rotation:
+            next_key = self._rotation.popleft()
+            queue = self._waiters[next_key]
+            future = queue.popleft()
+            self._queued -= 1
+            if queue:
+                self._rotation.append(next_key)
+            else:
+                del self._waiters[next_key]
+            if not future.done():
+                future.set_result(True)
+                return
+
+        self._in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self, key: Optional[str] = None):
+        key = await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+
+checkin_admission = AdmissionController(
+    "check-in",
+    max_in_flight=int(os.getenv("CHECKIN_MAX_IN_FLIGHT", "16")),
+    max_queue=int(os.getenv("CHECKIN_MAX_QUEUE", "64")),
+    queue_timeout_ms=float(os.getenv("CHECKIN_QUEUE_TIMEOUT_MS", "2000")),
+    per_key_limit=int(os.getenv("CHECKIN_PER_KIOSK_LIMIT", "8")),
+    retry_after_seconds=int(os.getenv("CHECKIN_RETRY_AFTER", "2"))
+)
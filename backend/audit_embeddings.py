@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Audit kesehatan face_embedding semua user (pengganti debug_user_face.py untuk satu tabel penuh)
+
+Semua embedding dibaca dalam satu query, di-parse sekali, lalu dicek secara
+vektor (NumPy) untuk seluruh tabel:
+- kosong / tidak bisa di-parse (bukan JSON list angka)
+- dimensi salah (default: dimensi yang paling umum, atau --dim)
+- nilai NaN/inf, norm nol, norm abnormal (di luar median +- k x MAD)
+- pasangan hampir duplikat: cosine similarity >= --duplicate-threshold,
+  dihitung per blok baris (matrix blok x n) supaya memori tetap kecil
+
+Hasil ditulis sebagai JSON (--output) + ringkasan di terminal.
+Exit code 1 kalau ditemukan masalah (bisa dipakai di CI / cron).
+
+Contoh (dari folder backend):
+    python audit_embeddings.py
+    python audit_embeddings.py --db bench.db --duplicate-threshold 0.97 --output audit.json
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+import orjson
+
+parser = argparse.ArgumentParser(description="Audit face embeddings of all users")
+parser.add_argument("--db", default=None, help="file SQLite (default: DATABASE_URL / workflow.db)")
+parser.add_argument("--dim", type=int, default=None, help="dimensi yang diharapkan (default: yang paling umum)")
+parser.add_argument("--duplicate-threshold", type=float, default=0.95, help="cosine similarity minimal untuk dianggap duplikat")
+parser.add_argument("--norm-mad-k", type=float, default=6.0, help="norm abnormal kalau |norm - median| > k x MAD")
+parser.add_argument("--block-size", type=int, default=512, help="baris per blok perhitungan all-pairs")
+parser.add_argument("--max-pairs", type=int, default=10000, help="batas jumlah pasangan duplikat di laporan")
+parser.add_argument("--output", default="embedding_audit.json")
+args = parser.parse_args()
+
+if args.db:
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+
+from models import SessionLocal, User  # noqa: E402
+
+
+def load_embeddings():
+    """Returns (ids valid, list embedding valid, masalah parse per kategori, total user)"""
+    problems = {"missing": [], "unparsable": []}
+    ids, vectors = [], []
+    total = 0
+    db = SessionLocal()
+    try:
+        for user_id, raw in db.query(User.id, User.face_embedding).yield_per(5000):
+            total += 1
+            if not raw:
+                problems["missing"].append(user_id)
+                continue
+            try:
+                vector = orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                problems["unparsable"].append(user_id)
+                continue
+            if not isinstance(vector, list) or not vector or not all(isinstance(v, (int, float)) for v in vector):
+                problems["unparsable"].append(user_id)
+                continue
+            ids.append(user_id)
+            vectors.append(vector)
+    finally:
+        db.close()
+    return ids, vectors, problems, total
+
+
+def find_near_duplicates(ids: np.ndarray, unit: np.ndarray, threshold: float) -> list:
+    """Pasangan (i < j) dengan cosine >= threshold, blok demi blok di segitiga atas"""
+    pairs = []
+    n = unit.shape[0]
+    for start in range(0, n, args.block_size):
+        block = unit[start:start + args.block_size]
+        # Hanya kolom j >= start: setiap pasangan dihitung sekali
+        sims = block @ unit[start:].T
+        rows, cols = np.nonzero(sims >= threshold)
+        keep = cols > rows  # buang diagonal dan bagian bawah segitiga di dalam blok
+        for r, c in zip(rows[keep], cols[keep]):
+            pairs.append((float(sims[r, c]), int(ids[start + r]), int(ids[start + c])))
+        if len(pairs) > args.max_pairs * 4:
+            pairs = sorted(pairs, reverse=True)[:args.max_pairs]
+    pairs.sort(reverse=True)
+    return [{"user_a": a, "user_b": b, "similarity": round(s, 4)} for s, a, b in pairs[:args.max_pairs]]
+
+
+def audit() -> dict:
+    started = time.perf_counter()
+    ids, vectors, problems, total = load_embeddings()
+    load_seconds = time.perf_counter() - started
+
+    dims = Counter(len(v) for v in vectors)
+    expected_dim = args.dim or (dims.most_common(1)[0][0] if dims else 0)
+    right_dim = [i for i, v in enumerate(vectors) if len(v) == expected_dim]
+    problems["wrong_dimension"] = [
+        {"user_id": ids[i], "dimension": len(v)} for i, v in enumerate(vectors) if len(v) != expected_dim
+    ]
+
+    ids_arr = np.array([ids[i] for i in right_dim], dtype=np.int64)
+    matrix = np.array([vectors[i] for i in right_dim], dtype=np.float32).reshape(len(right_dim), expected_dim)
+    del vectors
+
+    finite = np.isfinite(matrix).all(axis=1)
+    problems["non_finite"] = ids_arr[~finite].tolist()
+    ids_arr, matrix = ids_arr[finite], matrix[finite]
+
+    norms = np.linalg.norm(matrix, axis=1)
+    zero = norms < 1e-8
+    problems["zero_norm"] = ids_arr[zero].tolist()
+
+    norm_stats = {}
+    if norms.size:
+        median = float(np.median(norms))
+        mad = float(np.median(np.abs(norms - median)))
+        abnormal = ~zero & (np.abs(norms - median) > args.norm_mad_k * max(mad, 1e-6))
+        problems["abnormal_norm"] = [
+            {"user_id": int(u), "norm": round(float(n), 4)} for u, n in zip(ids_arr[abnormal], norms[abnormal])
+        ]
+        norm_stats = {
+            "min": round(float(norms.min()), 4), "median": round(median, 4),
+            "max": round(float(norms.max()), 4), "mad": round(mad, 4)
+        }
+    else:
+        problems["abnormal_norm"] = []
+
+    usable = ~zero
+    unit = matrix[usable] / norms[usable, None]
+    dup_started = time.perf_counter()
+    near_duplicates = find_near_duplicates(ids_arr[usable], unit, args.duplicate_threshold)
+
+    return {
+        "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "total_users": total,
+        "expected_dimension": expected_dim,
+        "dimension_counts": {str(dim): count for dim, count in sorted(dims.items())},
+        "norm_stats": norm_stats,
+        "duplicate_threshold": args.duplicate_threshold,
+        "problems": problems,
+        "near_duplicates": near_duplicates,
+        "timing_seconds": {
+            "load_and_parse": round(load_seconds, 2),
+            "near_duplicates": round(time.perf_counter() - dup_started, 2),
+            "total": round(time.perf_counter() - started, 2)
+        }
+    }
+
+
+def main():
+    print("\n🔍 Audit face embedding semua user...\n")
+    report = audit()
+    with open(args.output, "wb") as f:
+        f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+
+    problems = report["problems"]
+    print(f"{'='*60}")
+    print(f"👥 Total user          : {report['total_users']:,}")
+    print(f"📐 Dimensi             : {report['expected_dimension']} {report['dimension_counts']}")
+    print(f"📏 Norm                : {report['norm_stats']}")
+    print(f"{'='*60}")
+    print(f"   Tanpa embedding     : {len(problems['missing'])}")
+    print(f"   Tidak bisa di-parse : {len(problems['unparsable'])}")
+    print(f"   Dimensi salah       : {len(problems['wrong_dimension'])}")
+    print(f"   NaN / inf           : {len(problems['non_finite'])}")
+    print(f"   Norm nol            : {len(problems['zero_norm'])}")
+    print(f"   Norm abnormal       : {len(problems['abnormal_norm'])}")
+    print(f"   Hampir duplikat     : {len(report['near_duplicates'])} pasangan (cosine >= {args.duplicate_threshold})")
+    for pair in report["near_duplicates"][:10]:
+        print(f"      user {pair['user_a']} ~ user {pair['user_b']}: {pair['similarity']:.4f}")
+    print(f"{'='*60}")
+    print(f"⏱️  {report['timing_seconds']}")
+    print(f"📄 Laporan: {os.path.abspath(args.output)}\n")
+
+    has_problems = any(problems.values()) or report["near_duplicates"]
+    sys.exit(1 if has_problems else 0)
+
+
+if __name__ == "__main__":
+    main()
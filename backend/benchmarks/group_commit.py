@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput insert check-in saat burst pagi
+Per-request commit (1 transaksi + fsync per check-in) vs group commit writer
+
+Jalankan dari folder backend:
+    python -m benchmarks.group_commit [--users 2000] [--concurrency 200] [--db-dir .]
+
+Gunakan --db-dir di disk sungguhan (bukan tmpfs) supaya biaya fsync terlihat.
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description="Benchmark group commit vs per-request commit")
+parser.add_argument("--users", type=int, default=2000, help="jumlah check-in (1 per user)")
+parser.add_argument("--concurrency", type=int, default=200, help="request bersamaan")
+parser.add_argument("--db-dir", default=None, help="folder untuk file database sementara")
+parser.add_argument("--max-batch", type=int, default=64)
+parser.add_argument("--max-delay-ms", type=float, default=5)
+args = parser.parse_args()
+
+_tmp_dir = tempfile.mkdtemp(prefix="wfid-bench-", dir=args.db_dir)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+
+from models import SessionLocal, engine, User, Attendance  # noqa: E402
+from group_commit import GroupCommitWriter  # noqa: E402
+
+
+def seed_users(count: int) -> None:
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"name": f"User {i}", "email": f"user{i}@example.com", "gender": "other"}
+            for i in range(1, count + 1)
+        ])
+
+
+def make_row(user_id: int, date: str) -> dict:
+    now = datetime.datetime.now()
+    return {
+        "user_id": user_id,
+        "date": date,
+        "check_in_time": now,
+        "status": "on_time",
+        "location": "Lobby",
+        "timestamp": now
+    }
+
+
+async def per_request_commit(user_ids, date: str, concurrency: int) -> None:
+    """Seperti handler check_in lama: session + add + commit per request"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(user_id: int):
+        async with semaphore:
+            db = SessionLocal()
+            try:
+                attendance = Attendance(**make_row(user_id, date))
+                db.add(attendance)
+                db.commit()
+                db.refresh(attendance)
+            finally:
+                db.close()
+
+    await asyncio.gather(*(one(u) for u in user_ids))
+
+
+async def group_commit(user_ids, date: str, concurrency: int) -> GroupCommitWriter:
+    writer = GroupCommitWriter(engine, max_batch=args.max_batch, max_delay_ms=args.max_delay_ms)
+    await writer.start()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(user_id: int):
+        async with semaphore:
+            await writer.submit(make_row(user_id, date))
+
+    await asyncio.gather(*(one(u) for u in user_ids))
+    await writer.stop()
+    return writer
+
+
+def run(label: str, coro) -> float:
+    start = time.perf_counter()
+    result = asyncio.run(coro)
+    elapsed = time.perf_counter() - start
+    rate = args.users / elapsed
+    extra = ""
+    if isinstance(result, GroupCommitWriter):
+        extra = f"  ({result.batches_committed} transaksi, rata-rata {result.rows_committed / max(result.batches_committed, 1):.1f} baris)"
+    print(f"{label:<22}: {elapsed:7.2f} s  {rate:9.0f} check-in/s{extra}")
+    return rate
+
+
+def main():
+    print(f"\n🔧 Seeding {args.users} users di {_tmp_dir} ...")
+    seed_users(args.users)
+    user_ids = list(range(1, args.users + 1))
+
+    print(f"\n{'='*70}")
+    print(f"📊 CHECK-IN BURST - {args.users} check-in, concurrency {args.concurrency}")
+    print(f"{'='*70}")
+    baseline = run("Per-request commit", per_request_commit(user_ids, "2024-01-01", args.concurrency))
+    grouped = run("Group commit", group_commit(user_ids, "2024-01-02", args.concurrency))
+    print(f"{'='*70}")
+    print(f"Speedup: {grouped / baseline:.1f}x\n")
+
+    with engine.connect() as conn:
+        total = conn.execute(Attendance.__table__.select()).fetchall()
+        assert len(total) == args.users * 2, "Jumlah baris tidak sesuai!"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Benchmark: endpoint report & dashboard pada beberapa skala data
+
+Untuk setiap skala, dataset dibuat dengan generate_data.py (di-cache di
+--data-dir), lalu setiap endpoint dipanggil in-process (TestClient):
+- latency: median dan max dari --repeat kali panggil
+- jumlah query SQL dan peak memori Python (tracemalloc) dari satu panggilan
+  terpisah, supaya overhead tracemalloc tidak masuk ke latency
+
+Hasil dibandingkan dengan file baseline; keluar dengan exit code 1 kalau ada
+endpoint yang lebih lambat dari baseline x --tolerance atau jumlah query naik.
+
+Jalankan dari folder backend:
+    python -m benchmarks.reports [--scales small,medium,large] [--repeat 5]
+    python -m benchmarks.reports --save-baseline     # simpan hasil sebagai baseline baru
+
+Setiap skala berjalan di proses anak sendiri (engine/DB dipilih saat import models).
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCALES = {
+    "small": {"users": 100, "days": 90, "tasks_per_user": 10},
+    "medium": {"users": 1000, "days": 365, "tasks_per_user": 20},
+    "large": {"users": 5000, "days": 730, "tasks_per_user": 30},
+}
+
+ENDPOINTS = [
+    "/reports/attendance-summary",
+    "/reports/task-summary",
+    "/reports/productivity-report",
+    "/tasks/stats/1",
+    "/dashboard/stats",
+    "/dashboard/attendance-weekly",
+    "/dashboard/task-distribution",
+    "/dashboard/recent-activities",
+    "/dashboard/productivity-trend",
+    "/dashboard/bundle",
+    "/events/upcoming",
+    "/tasks/search?q=perbaiki",
+    "/tasks/search?q=review+laporan&user_id=1&status=completed",
+]
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, "benchmarks", "reports_baseline.json")
+
+parser = argparse.ArgumentParser(description="Benchmark report/dashboard endpoints at several data scales")
+parser.add_argument("--scales", default="small,medium", help=f"pilihan: {', '.join(SCALES)}")
+parser.add_argument("--repeat", type=int, default=5)
+parser.add_argument("--seed", type=int, default=42)
+parser.add_argument("--data-dir", default=os.path.join(BACKEND_DIR, "benchmarks", "data"))
+parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+parser.add_argument("--save-baseline", action="store_true")
+parser.add_argument("--tolerance", type=float, default=1.5, help="batas rasio latency vs baseline")
+parser.add_argument("--run-db", default=None, help=argparse.SUPPRESS)  # mode proses anak
+args = parser.parse_args()
+
+
+# ---------- proses anak: ukur semua endpoint pada satu database ----------
+
+def run_endpoints(db_path: str) -> dict:
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["SCHEDULER_ENABLED"] = "0"  # job latar belakang tidak boleh ikut terukur
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+
+    import tracemalloc
+    from fastapi.testclient import TestClient
+    import main
+    from query_budget import count_queries
+
+    client = TestClient(main.app)
+    results = {}
+    start = time.perf_counter()
+    with client:
+        results["_startup"] = {"median_ms": round((time.perf_counter() - start) * 1000, 2)}
+        for endpoint in ENDPOINTS:
+            client.get(endpoint)  # warm-up (cache kalender, compile statement)
+
+            timings = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                response = client.get(endpoint)
+                timings.append((time.perf_counter() - t0) * 1000)
+            if response.status_code != 200:
+                raise SystemExit(f"{endpoint} -> {response.status_code}: {response.text[:200]}")
+
+            tracemalloc.start()
+            with count_queries() as queries:
+                client.get(endpoint)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results[endpoint] = {
+                "median_ms": round(statistics.median(timings), 2),
+                "max_ms": round(max(timings), 2),
+                "queries": queries.count,
+                "peak_memory_kb": round(peak / 1024, 1),
+            }
+    return results
+
+
+# ---------- proses induk ----------
+
+def ensure_dataset(scale: str, end_date: str) -> str:
+    params = SCALES[scale]
+    os.makedirs(args.data_dir, exist_ok=True)
+    name = f"{scale}-u{params['users']}-d{params['days']}-t{params['tasks_per_user']}-s{args.seed}-{end_date}.db"
+    path = os.path.join(args.data_dir, name)
+    if not os.path.exists(path):
+        print(f"🔧 Generating {scale} dataset -> {path}")
+        subprocess.run([
+            sys.executable, os.path.join(BACKEND_DIR, "generate_data.py"),
+            "--db", path, "--users", str(params["users"]), "--days", str(params["days"]),
+            "--tasks-per-user", str(params["tasks_per_user"]), "--seed", str(args.seed), "--end-date", end_date
+        ], check=True, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL)
+    return path
+
+
+def run_scale(db_path: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.reports", "--run-db", db_path, "--repeat", str(args.repeat)],
+        check=True, cwd=BACKEND_DIR, capture_output=True, text=True
+    ).stdout
+    # Baris terakhir stdout = hasil JSON (baris lain: print dari main.py)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results: dict, baseline: dict) -> list:
+    regressions = []
+    for scale, endpoints in results.items():
+        print(f"\n{'='*96}")
+        print(f"📊 {scale.upper()} - {SCALES[scale]}")
+        print(f"{'='*96}")
+        print(f"Startup (warm in-memory state): {endpoints['_startup']['median_ms']:.0f} ms\n")
+        print(f"{'endpoint':<34}{'median ms':>11}{'max ms':>10}{'queries':>9}{'peak KB':>10}{'vs baseline':>16}")
+        for endpoint, stats in endpoints.items():
+            if endpoint.startswith("_"):
+                continue
+            base = baseline.get(scale, {}).get(endpoint)
+            verdict = "-"
+            if base:
+                ratio = stats["median_ms"] / max(base["median_ms"], 0.01)
+                verdict = f"{ratio:.2f}x"
+                # Latency di bawah 1 ms terlalu noisy untuk dibandingkan
+                if ratio > args.tolerance and stats["median_ms"] - base["median_ms"] > 1:
+                    verdict += " ❌"
+                    regressions.append(f"{scale} {endpoint}: {base['median_ms']} -> {stats['median_ms']} ms")
+                if "queries" in base and stats.get("queries", 0) > base["queries"]:
+                    verdict += " ❌q"
+                    regressions.append(f"{scale} {endpoint}: queries {base['queries']} -> {stats['queries']}")
+            print(
+                f"{endpoint:<34}{stats['median_ms']:>11.2f}{stats['max_ms']:>10.2f}"
+                f"{stats['queries']:>9}{stats['peak_memory_kb']:>10.1f}{verdict:>16}"
+            )
+    return regressions
+
+
+def main():
+    if args.run_db:
+        print(json.dumps(run_endpoints(args.run_db)))
+        return
+
+    scales = [scale.strip() for scale in args.scales.split(",") if scale.strip()]
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        raise SystemExit(f"Skala tidak dikenal: {', '.join(unknown)}")
+
+    end_date = datetime.date.today().isoformat()
+    results = {}
+    for scale in scales:
+        db_path = ensure_dataset(scale, end_date)
+        print(f"⏱️  Running {scale} ...")
+        results[scale] = run_scale(db_path)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+
+    regressions = compare(results, baseline)
+
+    if args.save_baseline:
+        merged = {**baseline, **results}
+        with open(args.baseline, "w") as f:
+            json.dump({"updated_at": datetime.datetime.now().isoformat(timespec="seconds"), "results": merged}, f, indent=2)
+        print(f"\n💾 Baseline disimpan ke {args.baseline}")
+    elif regressions:
+        print("\n❌ Regresi dibanding baseline:")
+        for regression in regressions:
+            print(f"   - {regression}")
+        sys.exit(1)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark: encode response attendance history 10k baris
+Legacy (ORM + strftime per baris + jsonable_encoder + json.dumps)
+vs fast path (select kolom + format jam di SQLite + orjson)
+
+Jalankan dari folder backend:
+    python -m benchmarks.serialization [--rows 10000] [--repeat 7]
+"""
+import argparse
+import datetime
+import gzip
+import json
+import os
+import statistics
+import tempfile
+import time
+
+# Pakai database sementara, jangan sentuh workflow.db
+_tmp_dir = tempfile.mkdtemp(prefix="wfid-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from models import SessionLocal, engine, User, Attendance  # noqa: E402
+from serialization import dumps, wib_clock  # noqa: E402
+
+
+def seed(rows: int) -> int:
+    """Insert 1 user + N attendance rows, return user_id"""
+    db = SessionLocal()
+    try:
+        user = User(name="Bench User", email="bench@example.com", gender="other")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+
+        start = datetime.datetime(2020, 1, 1, 7, 45)
+        batch = []
+        for i in range(rows):
+            day = start + datetime.timedelta(days=i)
+            check_in = day + datetime.timedelta(minutes=i % 40)
+            check_out = check_in + datetime.timedelta(hours=9)
+            batch.append({
+                "user_id": user.id,
+                "date": day.strftime("%Y-%m-%d"),
+                "check_in_time": check_in,
+                "check_out_time": check_out,
+                "status": "late" if check_in.minute > 15 else "on_time",
+                "work_hours": 9.0,
+                "location": "Office",
+                "timestamp": check_in,
+            })
+        with engine.begin() as conn:
+            conn.execute(Attendance.__table__.insert(), batch)
+        return user.id
+    finally:
+        db.close()
+
+
+def legacy_path(user_id: int) -> bytes:
+    """Cara lama: ORM objects, strftime per baris, jsonable_encoder, stdlib json"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        attendances = db.query(Attendance).filter(Attendance.user_id == user_id).order_by(Attendance.date.desc()).all()
+        history = []
+        for att in attendances:
+            history.append({
+                "id": att.id,
+                "user_id": att.user_id,
+                "user_name": user.name,
+                "date": att.date,
+                "check_in_time": att.check_in_time.strftime("%H:%M WIB") if att.check_in_time else None,
+                "check_out_time": att.check_out_time.strftime("%H:%M WIB") if att.check_out_time else None,
+                "status": att.status,
+                "work_hours": att.work_hours,
+                "notes": att.notes,
+                "location": att.location
+            })
+        content = jsonable_encoder({"user_name": user.name, "total_records": len(history), "history": history})
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+    finally:
+        db.close()
+
+
+def fast_path(user_id: int) -> bytes:
+    """Cara baru: select kolom, jam diformat SQLite, orjson"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        rows = db.query(
+            Attendance.id,
+            Attendance.user_id,
+            Attendance.date,
+            wib_clock(Attendance.check_in_time).label("check_in_time"),
+            wib_clock(Attendance.check_out_time).label("check_out_time"),
+            Attendance.status,
+            Attendance.work_hours,
+            Attendance.notes,
+            Attendance.location
+        ).filter(Attendance.user_id == user_id).order_by(Attendance.date.desc()).all()
+        history = [{**row._asdict(), "user_name": user.name} for row in rows]
+        return dumps({"user_name": user.name, "total_records": len(history), "history": history})
+    finally:
+        db.close()
+
+
+def timeit(fn, user_id: int, repeat: int):
+    timings = []
+    body = b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(user_id)
+        timings.append((time.perf_counter() - start) * 1000)
+    return body, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history response encoding")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"\n🔧 Seeding {args.rows} attendance rows di {_tmp_dir} ...")
+    user_id = seed(args.rows)
+
+    # Warm-up (import, statement cache)
+    legacy_path(user_id)
+    fast_path(user_id)
+
+    legacy_body, legacy_ms = timeit(legacy_path, user_id, args.repeat)
+    fast_body, fast_ms = timeit(fast_path, user_id, args.repeat)
+
+    # Sanity check: payload harus identik secara isi
+    assert json.loads(legacy_body) == json.loads(fast_body), "Payload berbeda!"
+
+    # Encode-only (data sudah berupa list of dict)
+    content = json.loads(fast_body)
+    _, json_encode_ms = timeit(lambda _: json.dumps(jsonable_encoder(content)).encode("utf-8"), user_id, args.repeat)
+    _, orjson_encode_ms = timeit(lambda _: dumps(content), user_id, args.repeat)
+
+    legacy_median = statistics.median(legacy_ms)
+    fast_median = statistics.median(fast_ms)
+
+    print(f"\n{'='*60}")
+    print(f"📊 HISTORY RESPONSE - {args.rows} rows (median dari {args.repeat} run)")
+    print(f"{'='*60}")
+    print(f"Legacy end-to-end : {legacy_median:8.1f} ms")
+    print(f"Fast end-to-end   : {fast_median:8.1f} ms  ({legacy_median / fast_median:.1f}x)")
+    print(f"json encode only  : {statistics.median(json_encode_ms):8.1f} ms")
+    print(f"orjson encode only: {statistics.median(orjson_encode_ms):8.1f} ms  "
+          f"({statistics.median(json_encode_ms) / statistics.median(orjson_encode_ms):.1f}x)")
+    print(f"Payload           : {len(fast_body) / 1024:8.1f} KB raw, "
+          f"{len(gzip.compress(fast_body, compresslevel=6)) / 1024:.1f} KB gzip")
+    print(f"{'='*60}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+In-process pub/sub bus untuk live feed (Server-Sent Events)
+
+- publish() dipanggil dari handler (event loop) setelah commit berhasil
+- Setiap subscriber punya asyncio.Queue sendiri (bounded)
+- Subscriber yang lambat (queue penuh) diputus, client EventSource akan reconnect
+  dan menerima snapshot baru - lebih aman daripada menahan publisher
+
+Catatan: bus ini per-proses. Dengan beberapa uvicorn worker, subscriber hanya
+menerima event dari worker yang sama.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set
+
+logger = logging.getLogger("workflow_id")
+
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# Sentinel: dikirim ke subscriber yang diputus karena terlalu lambat
+DISCONNECTED = object()
+
+
+class EventBus:
+    """Fan-out event ke semua subscriber aktif"""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        logger.info(f"[EVENT_BUS] Subscriber added - total: {len(self._subscribers)}")
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        if queue in self._subscribers:
+            self._subscribers.discard(queue)
+            logger.info(f"[EVENT_BUS] Subscriber removed - total: {len(self._subscribers)}")
+
+    def publish(self, event: str, data: Optional[Dict[str, Any]] = None) -> None:
+        """Kirim event ke semua subscriber tanpa blocking"""
+        message = {"event": event, "data": data or {}}
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning("[EVENT_BUS] Slow subscriber dropped (queue full)")
+                self._subscribers.discard(queue)
+                # Kosongkan satu slot supaya sentinel pasti masuk
+                queue.get_nowait()
+                queue.put_nowait(DISCONNECTED)
+
+
+# Bus untuk perubahan absensi (check-in / check-out)
+attendance_bus = EventBus()
@@ -0,0 +1,307 @@
+"""
+Gallery face embedding in-memory untuk pencarian 1:N (cek wajah duplikat)
+
+Semua embedding user disimpan sebagai satu matrix float32 yang sudah
+dinormalisasi (norm = 1), sehingga cosine similarity terhadap seluruh gallery
+cukup satu perkalian matrix-vector: 10k user x 128 dim = ~5 MB, < 1 ms.
+
+- find_duplicate(): user lain dengan similarity tertinggi >= threshold
+- upsert()/remove()/upsert_many(): update saat user dibuat / embedding diganti
+- rebuild(): dari tabel User saat startup dan lewat job (perubahan worker lain)
+
+Embedding yang tidak bisa di-parse, norm nol, atau dimensinya berbeda dari
+gallery tidak dimasukkan (lihat audit_embeddings.py untuk laporannya).
+
+Feed untuk kiosk (GET /gallery?since=<version>): perubahan sejak versi
+tertentu berdasarkan kolom User.face_version, dalam format biner:
+
+    header 24 byte (little-endian, struct "<4sBBHqII"):
+        magic b"FGAL", format 1, flags (bit 0 = full snapshot), dimensi,
+        versi saat ini, jumlah upsert, jumlah removed
+    int32   ids upsert        [n_upsert]
+    float32 embedding upsert  [n_upsert x dimensi]  (nilai asli, tidak dinormalisasi)
+    int32   ids removed       [n_removed]
+
+Full snapshot (since=0 atau since > versi saat ini) berarti kiosk harus
+mengganti seluruh gallery lokalnya.
+"""
+import base64
+import binascii
+import logging
+import os
+import struct
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import orjson
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import User
+
+logger = logging.getLogger("workflow_id")
+
+# Cosine similarity; check-in menerima >= 0.55 sebagai orang yang sama, untuk
+# registrasi dipakai batas lebih tinggi supaya wajah mirip tidak langsung ditolak
+FACE_DUPLICATE_THRESHOLD = float(os.getenv("FACE_DUPLICATE_THRESHOLD", "0.9"))
+
+
+class FaceMatch(NamedTuple):
+    user_id: int
+    similarity: float
+
+
+def decode_embedding(value: Optional[str]) -> Optional[np.ndarray]:
+    """
+    Embedding dari request/DB -> vektor float32 (belum dinormalisasi), None kalau tidak valid
+    - legacy: JSON list angka "[0.12, -0.03, ...]"
+    - base64 dari float32 little-endian: ~4x lebih kecil, di-decode dengan
+      np.frombuffer tanpa parsing teks float
+    """
+    if not value:
+        return None
+    if value.lstrip().startswith("["):
+        try:
+            vector = np.asarray(orjson.loads(value), dtype=np.float32)
+        except (orjson.JSONDecodeError, TypeError, ValueError):
+            return None
+    else:
+        try:
+            raw = base64.b64decode(value, validate=True)
+        except (binascii.Error, ValueError):
+            return None
+        if len(raw) % 4:
+            return None
+        vector = np.frombuffer(raw, dtype="<f4").astype(np.float32, copy=False)
+    if vector.ndim != 1 or vector.size == 0 or not np.isfinite(vector).all():
+        return None
+    return vector
+
+
+def normalize_embedding(vector: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    if vector is None:
+        return None
+    norm = np.linalg.norm(vector)
+    if norm < 1e-8:
+        return None
+    return vector / norm
+
+
+def parse_embedding(raw: Optional[str]) -> Optional[np.ndarray]:
+    """Embedding (JSON/base64) -> vektor float32 ter-normalisasi, None kalau tidak valid"""
+    return normalize_embedding(decode_embedding(raw))
+
+
+def embedding_to_json(vector: np.ndarray) -> str:
+    """Format simpan di DB (JSON list); float32 ditulis dengan representasi terpendek yang exact"""
+    return orjson.dumps(vector.astype(np.float32, copy=False), option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+class _GalleryState(NamedTuple):
+    """Satu versi gallery yang tidak pernah diubah setelah dipublikasikan"""
+    matrix: np.ndarray  # [n x dimensi], read-only
+    ids: np.ndarray  # user_id per baris matrix
+    rows: Dict[int, int]  # user_id -> baris
+    versions: Dict[int, int]  # user_id -> face_version embedding yang ter-index
+
+
+def _make_state(matrix: np.ndarray, ids: np.ndarray, versions: Dict[int, int]) -> _GalleryState:
+    matrix.setflags(write=False)
+    ids.setflags(write=False)
+    rows = {int(user_id): row for row, user_id in enumerate(ids)}
+    return _GalleryState(matrix, ids, rows, {user_id: versions[user_id] for user_id in rows if user_id in versions})
+
+
+class FaceGallery:
+    """
+    Thread-safe: reader mengambil self._state sekali lalu hanya memakai snapshot
+    itu (tanpa lock). Writer (upsert/remove/rebuild, dari event loop, thread
+    executor, dan thread job) serial lewat _lock dan membangun state baru
+    (copy-on-write) yang dipasang dengan satu assignment. Satu write menyalin
+    matrix (~5 MB untuk 10k user); banyak perubahan sekaligus -> upsert_many()
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = _make_state(np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=np.int64), {})
+
+    def __len__(self) -> int:
+        return len(self._state.ids)
+
+    @property
+    def dimension(self) -> int:
+        return self._state.matrix.shape[1]
+
+    def rebuild(self, db: Session) -> None:
+        ids, vectors, versions = [], [], {}
+        rows = db.query(User.id, User.face_embedding, User.face_version).filter(User.face_embedding.isnot(None))
+        for user_id, raw, version in rows:
+            vector = parse_embedding(raw)
+            if vector is not None:
+                ids.append(user_id)
+                vectors.append(vector)
+                versions[user_id] = version
+
+        dims = [vector.size for vector in vectors]
+        dimension = max(set(dims), key=dims.count) if dims else 0
+        keep = [i for i, dim in enumerate(dims) if dim == dimension]
+
+        matrix = np.array([vectors[i] for i in keep], dtype=np.float32).reshape(len(keep), dimension)
+        user_ids = np.array([ids[i] for i in keep], dtype=np.int64)
+        state = _make_state(matrix, user_ids, versions)
+        with self._lock:
+            self._state = state
+        logger.info(f"[FACE_GALLERY] Rebuilt with {len(keep)} embeddings (dim {dimension}, skipped {len(vectors) - len(keep)})")
+
+    def find_duplicate(self, vector: np.ndarray, threshold: float = FACE_DUPLICATE_THRESHOLD,
+                       exclude_user_id: Optional[int] = None) -> Optional[FaceMatch]:
+        """User lain yang paling mirip dengan similarity >= threshold (vector dari parse_embedding)"""
+        state = self._state
+        if len(state.ids) == 0 or vector.size != state.matrix.shape[1]:
+            return None
+        similarities = state.matrix @ vector
+        if exclude_user_id is not None and exclude_user_id in state.rows:
+            similarities[state.rows[exclude_user_id]] = -np.inf
+        best = int(np.argmax(similarities))
+        if similarities[best] < threshold:
+            return None
+        return FaceMatch(int(state.ids[best]), float(similarities[best]))
+
+    def get(self, user_id: int, version: int) -> Optional[np.ndarray]:
+        """Embedding ter-normalisasi user, hanya kalau yang ter-index adalah versi `version`"""
+        state = self._state
+        row = state.rows.get(user_id)
+        if row is None or state.versions.get(user_id) != version:
+            return None
+        return state.matrix[row]
+
+    def find_duplicates(self, vectors: np.ndarray, threshold: float = FACE_DUPLICATE_THRESHOLD,
+                        block_size: int = 1024) -> List[Optional[FaceMatch]]:
+        """find_duplicate untuk banyak vektor ter-normalisasi sekaligus (matrix [n x dimensi])"""
+        state = self._state
+        if len(state.ids) == 0 or vectors.shape[1] != state.matrix.shape[1]:
+            return [None] * len(vectors)
+        matches: List[Optional[FaceMatch]] = []
+        for start in range(0, len(vectors), block_size):
+            similarities = vectors[start:start + block_size] @ state.matrix.T
+            best = np.argmax(similarities, axis=1)
+            scores = similarities[np.arange(len(best)), best]
+            matches.extend(
+                FaceMatch(int(state.ids[b]), float(score)) if score >= threshold else None
+                for b, score in zip(best, scores)
+            )
+        return matches
+
+    def upsert(self, user_id: int, vector: Optional[np.ndarray], version: Optional[int] = None) -> None:
+        """Set embedding user (vector dari parse_embedding); None (kosong/tidak valid) = hapus dari gallery"""
+        self.upsert_many([(user_id, vector, version)])
+
+    def remove(self, user_id: int) -> None:
+        self.upsert_many([(user_id, None, None)])
+
+    def upsert_many(self, changes: Iterable[Tuple[int, Optional[np.ndarray], Optional[int]]]) -> None:
+        """Banyak upsert (user_id, vector, version) dengan satu salinan matrix"""
+        with self._lock:
+            state = self._state
+            dimension = state.matrix.shape[1] if len(state.ids) else None
+            updates: Dict[int, Tuple[Optional[np.ndarray], Optional[int]]] = {}
+            for user_id, vector, version in changes:
+                if vector is not None:
+                    if dimension is None:
+                        dimension = vector.size
+                    if vector.size != dimension:
+                        logger.warning(f"[FACE_GALLERY] User {user_id} embedding dim {vector.size} != gallery dim {dimension}, not indexed")
+                        vector = None
+                updates[user_id] = (vector, version)
+            if not updates:
+                return
+
+            removed = {user_id for user_id, (vector, _) in updates.items() if vector is None}
+            kept = [row for row, user_id in enumerate(state.ids) if int(user_id) not in removed]
+            added = [user_id for user_id, (vector, _) in updates.items() if vector is not None and user_id not in state.rows]
+            ids = np.concatenate([state.ids[kept], np.array(added, dtype=np.int64)])
+            matrix = np.empty((len(ids), dimension or 0), dtype=np.float32)
+            if kept:
+                matrix[:len(kept)] = state.matrix[kept]
+            versions = dict(state.versions)
+            for user_id in removed:
+                versions.pop(user_id, None)
+            for row, user_id in enumerate(ids.tolist()):
+                if user_id not in updates:
+                    continue
+                vector, version = updates[user_id]
+                matrix[row] = vector
+                if version is None:
+                    versions.pop(user_id, None)
+                else:
+                    versions[user_id] = version
+            self._state = _make_state(matrix, ids, versions)
+
+
+face_gallery = FaceGallery()
+
+
+# ---------- feed incremental untuk kiosk ----------
+
+GALLERY_MAGIC = b"FGAL"
+GALLERY_FORMAT = 1
+GALLERY_FLAG_FULL = 1
+_GALLERY_HEADER = struct.Struct("<4sBBHqII")
+
+
+class GalleryDelta(NamedTuple):
+    version: int
+    full: bool
+    dimension: int
+    ids: np.ndarray  # int32
+    vectors: np.ndarray  # float32 [n x dimension]
+    removed: List[int]
+
+
+def load_gallery_delta(db: Session, since: int = 0) -> GalleryDelta:
+    """Embedding yang berubah sejak versi `since` (pakai session snapshot supaya versi konsisten)"""
+    version = db.query(func.coalesce(func.max(User.face_version), 0)).scalar()
+    full = since <= 0 or since > version
+    query = db.query(User.id, User.face_embedding)
+    if full:
+        query = query.filter(User.face_embedding.isnot(None))
+    else:
+        query = query.filter(User.face_version > since)
+
+    parsed = []
+    removed = []
+    for user_id, raw in query.order_by(User.id):
+        vector = decode_embedding(raw)
+        if vector is None:
+            removed.append(user_id)
+        else:
+            parsed.append((user_id, vector))
+
+    dimension = face_gallery.dimension or (parsed[0][1].size if parsed else 0)
+    removed.extend(user_id for user_id, vector in parsed if vector.size != dimension)
+    kept = [(user_id, vector) for user_id, vector in parsed if vector.size == dimension]
+    if full:
+        removed = []  # kiosk mengganti seluruh gallery, tidak perlu daftar hapus
+
+    return GalleryDelta(
+        version=version,
+        full=full,
+        dimension=dimension,
+        ids=np.array([user_id for user_id, _ in kept], dtype=np.int32),
+        vectors=np.array([vector for _, vector in kept], dtype=np.float32).reshape(len(kept), dimension),
+        removed=sorted(removed)
+    )
+
+
+def encode_gallery_delta(delta: GalleryDelta) -> bytes:
+    header = _GALLERY_HEADER.pack(
+        GALLERY_MAGIC, GALLERY_FORMAT, GALLERY_FLAG_FULL if delta.full else 0,
+        delta.dimension, delta.version, len(delta.ids), len(delta.removed)
+    )
+    return b"".join((
+        header,
+        delta.ids.astype("<i4").tobytes(),
+        delta.vectors.astype("<f4").tobytes(),
+        np.array(delta.removed, dtype="<i4").tobytes()
+    ))
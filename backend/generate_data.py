@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Generator data sintetis skala produksi (untuk load test dan benchmark)
+
+- Users dengan embedding wajah acak (128 dimensi, ternormalisasi)
+- Attendance harian (Senin-Jumat) selama --days hari: tiap user punya
+  kecenderungan hadir dan jam datang sendiri + noise harian + ekor telat
+- Tasks (--tasks-per-user) tersebar sepanjang periode, status konsisten
+  dengan deadline (pending / in_progress / completed / overdue)
+- Events (hari libur + meeting) dan izin (leave_requests)
+
+Semua insert memakai executemany per chunk (--chunk-size baris per transaksi);
+index full-text search (FTS5) dibangun sekali di akhir, bukan lewat trigger per baris.
+Attendance dan tasks dibangkitkan per hari / per chunk sebagai array NumPy
+(termasuk format tanggal), tanpa objek datetime per baris. Hasil deterministik
+dari --seed + --end-date.
+
+Contoh (dari folder backend):
+    python generate_data.py --db bench.db --users 50000 --days 730 --tasks-per-user 40
+    python generate_data.py --db bench.db --reset --users 1000
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+parser = argparse.ArgumentParser(description="Generate synthetic WorkFlow ID dataset")
+parser.add_argument("--db", default=None, help="file SQLite tujuan (default: DATABASE_URL / workflow.db)")
+parser.add_argument("--users", type=int, default=1000)
+parser.add_argument("--days", type=int, default=365, help="jumlah hari ke belakang dari --end-date")
+parser.add_argument("--tasks-per-user", type=int, default=20)
+parser.add_argument("--events-per-month", type=int, default=6)
+parser.add_argument("--leaves-per-user-year", type=float, default=3.0)
+parser.add_argument("--embedding-dim", type=int, default=128)
+parser.add_argument("--seed", type=int, default=42)
+parser.add_argument("--end-date", default=None, help="YYYY-MM-DD, hari terakhir periode (eksklusif, default: hari ini)")
+parser.add_argument("--chunk-size", type=int, default=20000)
+parser.add_argument("--reset", action="store_true", help="hapus semua data lama sebelum generate")
+args = parser.parse_args()
+
+if args.db:
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+
+from sqlalchemy import event, text  # noqa: E402
+from models import engine, search_index_deferred, Base, User, Attendance, Task, Event, LeaveRequest  # noqa: E402
+
+FIRST_NAMES_MALE = ["Budi", "Agus", "Andi", "Rudi", "Dedi", "Eko", "Hendra", "Joko", "Rizki", "Fajar", "Bayu", "Arif"]
+FIRST_NAMES_FEMALE = ["Siti", "Dewi", "Sri", "Rina", "Ayu", "Putri", "Indah", "Wulan", "Fitri", "Nur", "Lestari", "Maya"]
+LAST_NAMES = ["Santoso", "Wijaya", "Saputra", "Hidayat", "Pratama", "Kusuma", "Setiawan", "Nugroho", "Lestari", "Rahayu", "Siregar", "Halim"]
+LOCATIONS = ["Lobby", "Lantai 2", "Lantai 3", "Gudang", "Kantor Cabang"]
+TASK_TITLES = ["Review laporan", "Update dokumentasi", "Perbaiki bug", "Meeting klien", "Siapkan presentasi",
+               "Audit data", "Deploy release", "Training tim", "Analisis penjualan", "Rekap absensi"]
+CATEGORIES = ["general", "development", "meeting", "review", "documentation", "infrastructure"]
+PRIORITIES = np.array(["low", "medium", "high", "urgent"])
+PRIORITY_WEIGHTS = [0.25, 0.45, 0.22, 0.08]
+EVENT_TYPES = ["meeting", "training", "deadline"]
+LEAVE_TYPES = ["izin", "sakit", "cuti"]
+
+
+def insert_chunks(table, rows_iter, chunk_size: int) -> int:
+    """Insert per chunk, satu transaksi per chunk"""
+    total = 0
+    chunk = []
+    for row in rows_iter:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            with engine.begin() as conn:
+                conn.execute(table.insert(), chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        with engine.begin() as conn:
+            conn.execute(table.insert(), chunk)
+        total += len(chunk)
+    return total
+
+
+def insert_columns(table, columns: dict) -> int:
+    """
+    Insert satu chunk dari kolom-kolom (list nilai Python) lewat executemany DBAPI
+    langsung - tanpa konversi tipe per baris oleh SQLAlchemy
+    """
+    names = list(columns)
+    placeholder = "?" if engine.dialect.paramstyle == "qmark" else "%s"
+    sql = f"INSERT INTO {table.name} ({', '.join(names)}) VALUES ({', '.join([placeholder] * len(names))})"
+    rows = list(zip(*columns.values()))
+    with engine.begin() as conn:
+        conn.exec_driver_sql(sql, rows)
+    return len(rows)
+
+
+def datetime_strings(values: np.ndarray) -> list:
+    """datetime64 -> format DateTime SQLAlchemy untuk SQLite ('YYYY-MM-DD HH:MM:SS.ffffff')"""
+    return np.char.replace(np.datetime_as_string(values, unit="us"), "T", " ").tolist()
+
+
+def timed(label: str, func, *func_args) -> int:
+    start = time.perf_counter()
+    count = func(*func_args)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<12}: {count:>10,} baris  {elapsed:7.2f} s  ({count / max(elapsed, 1e-9):,.0f}/s)")
+    return count
+
+
+def generate_users(rng: np.random.Generator) -> int:
+    n = args.users
+    female = rng.random(n) < 0.5
+    first_male = rng.integers(0, len(FIRST_NAMES_MALE), n)
+    first_female = rng.integers(0, len(FIRST_NAMES_FEMALE), n)
+    last = rng.integers(0, len(LAST_NAMES), n)
+
+    # Embedding ternormalisasi, dibangkitkan per chunk supaya memori tetap kecil
+    def rows():
+        for offset in range(0, n, args.chunk_size):
+            size = min(args.chunk_size, n - offset)
+            embeddings = rng.standard_normal((size, args.embedding_dim)).astype(np.float32)
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+            for j in range(size):
+                i = offset + j
+                first = FIRST_NAMES_FEMALE[first_female[i]] if female[i] else FIRST_NAMES_MALE[first_male[i]]
+                yield {
+                    "id": i + 1,
+                    "name": f"{first} {LAST_NAMES[last[i]]}",
+                    "email": f"user{i + 1}@example.com",
+                    "gender": "female" if female[i] else "male",
+                    "face_embedding": json.dumps(np.round(embeddings[j], 6).tolist())
+                }
+
+    return insert_chunks(User.__table__, rows(), args.chunk_size)
+
+
+def generate_events(rng: np.random.Generator, start: datetime.date, end: datetime.date) -> tuple:
+    """Returns (jumlah baris, set tanggal libur)"""
+    rows = []
+    holidays = set()
+    month = datetime.date(start.year, start.month, 1)
+    while month < end:
+        next_month = (month.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        days_in_month = (next_month - month).days
+        # 1 hari libur per bulan (kalau jatuh di hari kerja)
+        holiday = month + datetime.timedelta(days=int(rng.integers(0, days_in_month)))
+        if holiday.weekday() < 5 and start <= holiday < end:
+            holidays.add(holiday.isoformat())
+            rows.append({
+                "title": "Libur Nasional", "description": "Hari libur", "event_type": "holiday",
+                "date": holiday.isoformat(), "time": "00:00", "location": None, "status": "scheduled"
+            })
+        for _ in range(args.events_per_month):
+            day = month + datetime.timedelta(days=int(rng.integers(0, days_in_month)))
+            rows.append({
+                "title": f"{EVENT_TYPES[int(rng.integers(0, len(EVENT_TYPES)))].title()} #{len(rows) + 1}",
+                "description": "Event sintetis",
+                "event_type": EVENT_TYPES[int(rng.integers(0, len(EVENT_TYPES)))],
+                "date": day.isoformat(),
+                "time": f"{int(rng.integers(8, 17)):02d}:{int(rng.choice([0, 30])):02d}",
+                "location": LOCATIONS[int(rng.integers(0, len(LOCATIONS)))],
+                "status": "completed" if day < end else "scheduled"
+            })
+        month = next_month
+    return insert_chunks(Event.__table__, iter(rows), args.chunk_size), holidays
+
+
+def generate_leaves(rng: np.random.Generator, start: datetime.date) -> tuple:
+    """Returns (jumlah baris, {tanggal: set user_id} untuk izin approved)"""
+    n_leaves = int(args.users * args.leaves_per_user_year * args.days / 365)
+    user_ids = rng.integers(1, args.users + 1, n_leaves)
+    offsets = rng.integers(0, args.days, n_leaves)
+    lengths = rng.choice([1, 1, 1, 2, 3, 5], n_leaves)
+    types = rng.integers(0, len(LEAVE_TYPES), n_leaves)
+    approved = rng.random(n_leaves) < 0.85
+
+    on_leave = {}
+    rows = []
+    for i in range(n_leaves):
+        first = start + datetime.timedelta(days=int(offsets[i]))
+        last = first + datetime.timedelta(days=int(lengths[i]) - 1)
+        status = "approved" if approved[i] else "rejected"
+        if approved[i]:
+            day = first
+            while day <= last:
+                on_leave.setdefault(day.isoformat(), set()).add(int(user_ids[i]))
+                day += datetime.timedelta(days=1)
+        created = datetime.datetime.combine(first, datetime.time(9)) - datetime.timedelta(days=3)
+        rows.append({
+            "user_id": int(user_ids[i]), "start_date": first.isoformat(), "end_date": last.isoformat(),
+            "leave_type": LEAVE_TYPES[types[i]], "reason": "Data sintetis", "status": status,
+            "created_at": created, "updated_at": created
+        })
+    return insert_chunks(LeaveRequest.__table__, iter(rows), args.chunk_size), on_leave
+
+
+def generate_attendance(rng: np.random.Generator, start: datetime.date, holidays: set, on_leave: dict) -> int:
+    n = args.users
+    # Kecenderungan per user: peluang hadir (~93%) dan rata-rata jam datang (menit dari 08:00)
+    presence_rate = rng.beta(20, 1.5, n)
+    arrival_mean = rng.normal(-12, 8, n)
+    locations = np.array(LOCATIONS)[rng.integers(0, len(LOCATIONS), n)]
+    one_minute = np.timedelta64(60, "s")
+
+    total = 0
+    pending = []  # beberapa hari digabung sampai >= chunk_size baris per transaksi
+    for offset in range(args.days):
+        day = start + datetime.timedelta(days=offset)
+        date_str = day.isoformat()
+        if day.weekday() >= 5 or date_str in holidays:
+            continue
+
+        present = rng.random(n) < presence_rate
+        for user_id in on_leave.get(date_str, ()):
+            present[user_id - 1] = False
+        idx = np.nonzero(present)[0]
+
+        # Jam datang: rata-rata user + noise harian + sesekali telat jauh (macet, dsb.)
+        arrival = arrival_mean[idx] + rng.normal(0, 7, idx.size)
+        arrival += np.where(rng.random(idx.size) < 0.05, rng.exponential(25, idx.size), 0)
+        arrival_seconds = (np.clip(arrival, -90, 180) * 60).astype(np.int64) // 60 * 60 + rng.integers(0, 60, idx.size)
+        work_seconds = (np.clip(rng.normal(9 * 60 + 10, 25, idx.size), 4 * 60, 12 * 60) * 60).astype(np.int64)
+
+        eight_am = np.datetime64(f"{date_str}T08:00:00", "s")
+        check_in = eight_am + arrival_seconds.astype("timedelta64[s]")
+        check_out = check_in + work_seconds.astype("timedelta64[s]")
+        late = check_in >= eight_am + one_minute  # sama dengan is_late(): lewat 08:00
+        check_in_str = datetime_strings(check_in)
+
+        pending.append({
+            "user_id": (idx + 1).tolist(),
+            "date": [date_str] * idx.size,
+            "check_in_time": check_in_str,
+            "check_out_time": datetime_strings(check_out),
+            "status": np.where(late, "late", "on_time").tolist(),
+            "work_hours": np.round(work_seconds / 3600, 2).tolist(),
+            "location": locations[idx].tolist(),
+            "timestamp": check_in_str
+        })
+        if sum(len(chunk["date"]) for chunk in pending) >= args.chunk_size:
+            total += insert_columns(Attendance.__table__, _merge(pending))
+            pending = []
+    if pending:
+        total += insert_columns(Attendance.__table__, _merge(pending))
+    return total
+
+
+def _merge(chunks: list) -> dict:
+    return {key: [value for chunk in chunks for value in chunk[key]] for key in chunks[0]}
+
+
+def generate_tasks(rng: np.random.Generator, start: datetime.date, end: datetime.date) -> int:
+    total = args.users * args.tasks_per_user
+    now = np.datetime64(end.isoformat(), "s")
+    base = np.datetime64(start.isoformat(), "s")
+    period_seconds = args.days * 86400
+    titles = np.array(TASK_TITLES)
+    categories = np.array(CATEGORIES)
+
+    inserted = 0
+    for offset in range(0, total, args.chunk_size):
+        size = min(args.chunk_size, total - offset)
+        created = base + rng.integers(0, period_seconds, size).astype("timedelta64[s]")
+        deadline = created + (rng.integers(1, 21, size) * 86400).astype("timedelta64[s]")
+
+        # Task lama hampir pasti selesai, task baru lebih sering masih terbuka
+        age_days = (now - created).astype(np.int64) / 86400
+        completed = rng.random(size) < np.minimum(0.95, 0.35 + age_days / 60)
+        work_span = (np.minimum(deadline, now) - created).astype(np.int64)
+        completed_at = np.minimum(created + (work_span * rng.random(size) * 1.2).astype("timedelta64[s]"), now)
+        status = np.where(completed, "completed", np.where(
+            deadline < now, "overdue", np.where(rng.random(size) < 0.5, "in_progress", "pending")
+        ))
+
+        created_str = datetime_strings(created)
+        completed_at_str = datetime_strings(completed_at)
+        completed_list = completed.tolist()
+        inserted += insert_columns(Task.__table__, {
+            "title": [f"{title} #{offset + k + 1}" for k, title in enumerate(titles[rng.integers(0, len(titles), size)].tolist())],
+            "description": ["Task sintetis"] * size,
+            "completed": completed_list,
+            "user_id": rng.integers(1, args.users + 1, size).tolist(),
+            "priority": rng.choice(PRIORITIES, size, p=PRIORITY_WEIGHTS).tolist(),
+            "status": status.tolist(),
+            "category": categories[rng.integers(0, len(categories), size)].tolist(),
+            "deadline": datetime_strings(deadline),
+            "completed_at": [value if done else None for value, done in zip(completed_at_str, completed_list)],
+            "created_at": created_str,
+            "updated_at": [value if done else c for value, done, c in zip(completed_at_str, completed_list, created_str)]
+        })
+    return inserted
+
+
+def reset_data() -> None:
+    with search_index_deferred(), engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+
+def main():
+    end = datetime.date.fromisoformat(args.end_date) if args.end_date else datetime.date.today()
+    start = end - datetime.timedelta(days=args.days)
+    rng = np.random.default_rng(args.seed)
+
+    if args.reset:
+        reset_data()
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT COUNT(*) FROM users")).scalar():
+            print("❌ Database sudah berisi user. Pakai --reset atau --db file baru.")
+            sys.exit(1)
+
+    if engine.dialect.name == "sqlite":
+        # Bulk load: tanpa fsync per transaksi (data sintetis, aman dibuat ulang).
+        # Kedua pragma hanya berlaku untuk koneksi script ini, tidak tersimpan di file DB
+        @event.listens_for(engine, "connect")
+        def _fast_pragmas(dbapi_connection, connection_record):
+            dbapi_connection.execute("PRAGMA synchronous=OFF")
+            dbapi_connection.execute("PRAGMA journal_mode=MEMORY")
+        engine.dispose()
+
+    print(f"\n🔧 Generating dataset {start} s/d {end} (seed {args.seed}) -> {engine.url}")
+    print(f"{'='*70}")
+    overall = time.perf_counter()
+    with search_index_deferred():
+        timed("users", generate_users, rng)
+        event_count, holidays = generate_events(rng, start, end)
+        print(f"  {'events':<12}: {event_count:>10,} baris  ({len(holidays)} hari libur)")
+        leave_count, on_leave = generate_leaves(rng, start)
+        print(f"  {'leaves':<12}: {leave_count:>10,} baris")
+        timed("attendance", generate_attendance, rng, start, holidays, on_leave)
+        timed("tasks", generate_tasks, rng, start, end)
+        search_started = time.perf_counter()
+    print(f"  {'search index':<12}: {time.perf_counter() - search_started:>10.2f} s")
+    print(f"{'='*70}")
+    print(f"✅ Selesai dalam {time.perf_counter() - overall:.1f} s\n")
+
+
+if __name__ == "__main__":
+    main()
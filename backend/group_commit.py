@@ -0,0 +1,156 @@
+"""
+Group-commit writer untuk insert check-in (opsional, GROUP_COMMIT_ENABLED=1)
+
+Saat jam masuk (07:55-08:05) semua karyawan check-in hampir bersamaan dan
+setiap db.commit() = satu fsync di SQLite. Writer ini mengumpulkan insert dari
+banyak request ke satu asyncio.Queue, lalu satu task menulis semuanya dalam
+SATU transaksi setiap GROUP_COMMIT_MAX_DELAY_MS atau GROUP_COMMIT_MAX_BATCH baris.
+
+Durability: future setiap request baru di-resolve SETELAH commit berhasil,
+jadi response "Check-in berhasil" tetap berarti data sudah tersimpan.
+Kalau transaksi batch gagal, setiap baris di-commit ulang satu per satu supaya
+satu baris bermasalah tidak menggagalkan request lain.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Union
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection, Engine
+
+from models import engine, Attendance
+
+logger = logging.getLogger("workflow_id")
+
+GROUP_COMMIT_ENABLED = os.getenv("GROUP_COMMIT_ENABLED", "0") == "1"
+GROUP_COMMIT_MAX_DELAY_MS = float(os.getenv("GROUP_COMMIT_MAX_DELAY_MS", "5"))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "64"))
+
+_STOP = object()
+
+
+class DuplicateCheckIn(Exception):
+    """User sudah punya attendance untuk tanggal tersebut"""
+
+
+class GroupCommitWriter:
+    """Satu writer task, banyak producer (handler check-in)"""
+
+    def __init__(self, engine: Engine, max_batch: int = GROUP_COMMIT_MAX_BATCH,
+                 max_delay_ms: float = GROUP_COMMIT_MAX_DELAY_MS):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches_committed = 0
+        self.rows_committed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"[GROUP_COMMIT] Writer started - max_batch: {self.max_batch}, max_delay: {self.max_delay * 1000:.1f}ms")
+
+    async def stop(self) -> None:
+        """Flush semua yang masih antri, lalu berhenti"""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        logger.info(f"[GROUP_COMMIT] Writer stopped - batches: {self.batches_committed}, rows: {self.rows_committed}")
+
+    async def submit(self, row: Dict[str, Any]) -> int:
+        """Antrikan satu insert Attendance, return id setelah commit"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+
+            # Kumpulkan batch sampai penuh atau batas waktu habis
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            # Tulis di thread pool supaya event loop tetap menerima request
+            results = await loop.run_in_executor(None, self._flush, [row for row, _ in batch])
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue  # Request sudah dibatalkan (client disconnect)
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _flush(self, rows: List[Dict[str, Any]]) -> List[Union[int, Exception]]:
+        try:
+            with self.engine.begin() as conn:
+                results = self._insert(conn, rows)
+            self.batches_committed += 1
+            self.rows_committed += sum(1 for r in results if not isinstance(r, Exception))
+            return results
+        except Exception as e:
+            logger.error(f"[GROUP_COMMIT] Batch of {len(rows)} failed, retrying row by row: {str(e)}")
+
+        results: List[Union[int, Exception]] = []
+        for row in rows:
+            try:
+                with self.engine.begin() as conn:
+                    result = self._insert(conn, [row])[0]
+                results.append(result)
+                if not isinstance(result, Exception):
+                    self.rows_committed += 1
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _insert(self, conn: Connection, rows: List[Dict[str, Any]]) -> List[Union[int, Exception]]:
+        """Insert dalam transaksi yang sedang berjalan; duplikat (user_id, date) ditolak"""
+        table = Attendance.__table__
+        seen = {tuple(existing) for existing in conn.execute(
+            select(table.c.user_id, table.c.date).where(
+                table.c.user_id.in_({row["user_id"] for row in rows}),
+                table.c.date.in_({row["date"] for row in rows})
+            )
+        )}
+
+        results: List[Union[int, Exception]] = []
+        for row in rows:
+            key = (row["user_id"], row["date"])
+            if key in seen:
+                results.append(DuplicateCheckIn(f"User {row['user_id']} already checked in on {row['date']}"))
+                continue
+            seen.add(key)
+            result = conn.execute(table.insert().values(**row))
+            results.append(result.inserted_primary_key[0])
+        return results
+
+
+group_commit_writer = GroupCommitWriter(engine)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Import user massal dari file CSV / NDJSON langsung ke database
+(logika sama dengan POST /users/bulk, lihat user_import.py)
+
+Worker API yang sedang berjalan melihat user baru di face gallery setelah
+job face_gallery_refresh berikutnya, dan di daftar absen / total_users
+(presence index) setelah job presence_refresh berikutnya.
+
+Contoh (dari folder backend):
+    python import_users.py cabang_baru.csv
+    python import_users.py karyawan.ndjson --db bench.db --errors errors.json
+"""
+import argparse
+import os
+import sys
+import time
+
+import orjson
+
+parser = argparse.ArgumentParser(description="Bulk import users from CSV or NDJSON")
+parser.add_argument("file")
+parser.add_argument("--db", default=None, help="file SQLite (default: DATABASE_URL / workflow.db)")
+parser.add_argument("--format", choices=["csv", "ndjson"], default=None, help="default: dari ekstensi file")
+parser.add_argument("--chunk-size", type=int, default=1000)
+parser.add_argument("--no-face-check", action="store_true", help="lewati cek wajah duplikat")
+parser.add_argument("--errors", default=None, help="tulis error per baris ke file JSON ini")
+args = parser.parse_args()
+
+if args.db:
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+
+from models import SessionLocal  # noqa: E402
+from face_gallery import face_gallery, FACE_DUPLICATE_THRESHOLD  # noqa: E402
+from user_import import parse_rows, import_users, ImportFormatError  # noqa: E402
+
+
+def main():
+    fmt = args.format or ("ndjson" if args.file.endswith((".ndjson", ".jsonl")) else "csv")
+    with open(args.file, "rb") as f:
+        try:
+            rows = parse_rows(f.read(), fmt)
+        except ImportFormatError as e:
+            raise SystemExit(f"❌ {e}")
+
+    print(f"\n📥 Importing {len(rows):,} rows from {args.file} ({fmt})...")
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        if not args.no_face_check:
+            face_gallery.rebuild(db)
+        threshold = None if args.no_face_check else FACE_DUPLICATE_THRESHOLD
+        result = import_users(db, rows, chunk_size=args.chunk_size, duplicate_threshold=threshold)
+    finally:
+        db.close()
+
+    print(f"✅ Created : {result['created']:,}")
+    print(f"❌ Failed  : {result['failed']:,}")
+    for error in result["errors"][:20]:
+        print(f"   row {error['row']} ({error['email']}): {error['error']}")
+    if result["failed"] > 20:
+        print(f"   ... {result['failed'] - 20} more")
+    if args.errors:
+        with open(args.errors, "wb") as f:
+            f.write(orjson.dumps(result["errors"], option=orjson.OPT_INDENT_2))
+        print(f"📄 Errors written to {args.errors}")
+    print(f"⏱️  {time.perf_counter() - started:.2f}s\n")
+    sys.exit(1 if result["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
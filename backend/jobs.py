@@ -0,0 +1,97 @@
+"""
+Background jobs yang didaftarkan ke scheduler
+
+- task_status_transitions (lease, 1 worker): set-based UPDATE status task
+  berdasarkan deadline/completed, supaya read cukup lookup status tersimpan.
+  in_progress hanya di-set eksplisit (PUT /tasks/v2, kanban); job hanya
+  memindahkannya ke overdue kalau deadline lewat
+- presence_refresh (setiap worker): sinkron presence bitmap hari ini dan daftar
+  user dari DB (check-in / registrasi di worker lain, import_users.py) dan buang
+  bitset yang sudah lewat retensi
+- leave_index_refresh (setiap worker): rebuild interval index izin dari DB
+- face_gallery_refresh (setiap worker): rebuild face gallery (registrasi di worker lain)
+- kiosk_event_cleanup (lease, 1 worker): hapus idempotency key sync kiosk yang sudah lewat retensi
+"""
+import datetime
+import os
+
+import pytz
+from sqlalchemy import case
+from sqlalchemy.orm import Session
+
+from models import Task, KioskEvent, wib_now_naive
+from presence import presence_index
+from leave_index import leave_index
+from face_gallery import face_gallery
+from scheduler import scheduler
+
+TASK_STATUS_JOB_INTERVAL = float(os.getenv("TASK_STATUS_JOB_INTERVAL", "60"))
+PRESENCE_REFRESH_INTERVAL = float(os.getenv("PRESENCE_REFRESH_INTERVAL", "30"))
+LEAVE_INDEX_REFRESH_INTERVAL = float(os.getenv("LEAVE_INDEX_REFRESH_INTERVAL", "300"))
+FACE_GALLERY_REFRESH_INTERVAL = float(os.getenv("FACE_GALLERY_REFRESH_INTERVAL", "300"))
+KIOSK_EVENT_RETENTION_DAYS = int(os.getenv("KIOSK_EVENT_RETENTION_DAYS", "30"))
+
+
+@scheduler.register("task_status_transitions", interval_seconds=TASK_STATUS_JOB_INTERVAL, lease=True)
+def task_status_transitions(db: Session) -> dict:
+    # Deadline disimpan naive jam WIB (parse_deadline), jadi "sekarang" juga jam WIB
+    now = wib_now_naive()
+
+    completed = db.query(Task).filter(
+        Task.completed == True,
+        Task.status != "completed"
+    ).update({"status": "completed"}, synchronize_session=False)
+
+    # Di-uncomplete oleh penulis lama / lewat jalur yang tidak me-reset status
+    uncompleted = db.query(Task).filter(
+        Task.completed == False,
+        Task.status == "completed"
+    ).update({
+        "status": case((Task.deadline < now, "overdue"), else_="pending"),
+        "completed_at": None
+    }, synchronize_session=False)
+
+    overdue = db.query(Task).filter(
+        Task.completed == False,
+        Task.status.in_(["pending", "in_progress"]),
+        Task.deadline < now
+    ).update({"status": "overdue"}, synchronize_session=False)
+
+    # Deadline diperpanjang -> tidak overdue lagi
+    reopened = db.query(Task).filter(
+        Task.completed == False,
+        Task.status == "overdue",
+        Task.deadline >= now
+    ).update({"status": "pending"}, synchronize_session=False)
+
+    return {"completed": completed, "uncompleted": uncompleted, "overdue": overdue, "reopened": reopened}
+
+
+@scheduler.register("presence_refresh", interval_seconds=PRESENCE_REFRESH_INTERVAL, lease=False)
+def presence_refresh(db: Session) -> dict:
+    today = datetime.datetime.now(pytz.timezone('Asia/Jakarta')).strftime("%Y-%m-%d")
+    return {
+        "date": today,
+        "users": presence_index.refresh_users(db),
+        "present": presence_index.refresh_day(db, today)
+    }
+
+
+@scheduler.register("leave_index_refresh", interval_seconds=LEAVE_INDEX_REFRESH_INTERVAL, lease=False)
+def leave_index_refresh(db: Session) -> dict:
+    leave_index.rebuild(db)
+    return {"approved_leaves": len(leave_index)}
+
+
+@scheduler.register("face_gallery_refresh", interval_seconds=FACE_GALLERY_REFRESH_INTERVAL, lease=False)
+def face_gallery_refresh(db: Session) -> dict:
+    face_gallery.rebuild(db)
+    return {"embeddings": len(face_gallery)}
+
+
+@scheduler.register("kiosk_event_cleanup", interval_seconds=3600, lease=True)
+def kiosk_event_cleanup(db: Session) -> dict:
+    # Retensi harus lebih lama dari KIOSK_SYNC_MAX_AGE_DAYS supaya replay tetap terdeteksi
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=KIOSK_EVENT_RETENTION_DAYS)
+    deleted = db.query(KioskEvent).filter(KioskEvent.received_at < cutoff).delete(synchronize_session=False)
+    return {"deleted": deleted}
@@ -0,0 +1,142 @@
+"""
+Interval index untuk izin/cuti (LeaveRequest dengan status approved)
+
+Interval tree statis di atas array yang diurutkan berdasarkan start_date:
+node tengah setiap range menyimpan max(end_date) subtree-nya, sehingga
+- on_leave(date): "siapa yang izin pada tanggal X" -> O(log n + k)
+- overlapping(a, b) / leave_days_by_user(a, b) -> O(log n + k)
+
+Tanggal disimpan sebagai string YYYY-MM-DD (urutan string = urutan tanggal).
+Index per-proses; perubahan dari worker lain terlihat setelah rebuild (job).
+"""
+import bisect
+import datetime
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from models import LeaveRequest
+
+logger = logging.getLogger("workflow_id")
+
+
+class LeaveInterval(NamedTuple):
+    start: str
+    end: str  # inklusif
+    user_id: int
+    leave_id: int
+    leave_type: str
+
+
+def _days_between(start: str, end: str) -> int:
+    return (datetime.date.fromisoformat(end) - datetime.date.fromisoformat(start)).days + 1
+
+
+class LeaveIntervalIndex:
+    def __init__(self):
+        self._intervals: List[LeaveInterval] = []  # sorted by (start, end, leave_id)
+        self._starts: List[str] = []
+        self._max_end: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    # ---------- build ----------
+
+    def _build_tree(self) -> None:
+        self._starts = [iv.start for iv in self._intervals]
+        self._max_end = [""] * len(self._intervals)
+
+        def build(lo: int, hi: int) -> str:
+            if lo >= hi:
+                return ""
+            mid = (lo + hi) // 2
+            self._max_end[mid] = max(self._intervals[mid].end, build(lo, mid), build(mid + 1, hi))
+            return self._max_end[mid]
+
+        build(0, len(self._intervals))
+
+    def rebuild(self, db: Session) -> None:
+        rows = db.query(
+            LeaveRequest.start_date, LeaveRequest.end_date, LeaveRequest.user_id,
+            LeaveRequest.id, LeaveRequest.leave_type
+        ).filter(LeaveRequest.status == "approved")
+        self._intervals = sorted(LeaveInterval(*row) for row in rows)
+        self._build_tree()
+        logger.info(f"[LEAVE_INDEX] Rebuilt with {len(self._intervals)} approved leaves")
+
+    def add(self, interval: LeaveInterval) -> None:
+        bisect.insort(self._intervals, interval)
+        self._build_tree()
+
+    def remove(self, leave_id: int) -> None:
+        self._intervals = [iv for iv in self._intervals if iv.leave_id != leave_id]
+        self._build_tree()
+
+    # ---------- queries ----------
+
+    def overlapping(self, start: str, end: str) -> List[LeaveInterval]:
+        """Semua interval yang beririsan dengan [start, end]"""
+        result: List[LeaveInterval] = []
+
+        def visit(lo: int, hi: int) -> None:
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            if self._max_end[mid] < start:
+                return  # Semua interval di subtree ini selesai sebelum start
+            visit(lo, mid)
+            if self._starts[mid] <= end:
+                if self._intervals[mid].end >= start:
+                    result.append(self._intervals[mid])
+                visit(mid + 1, hi)
+
+        # Interval dengan start > end tidak mungkin beririsan: potong dengan binary search
+        visit(0, bisect.bisect_right(self._starts, end))
+        return result
+
+    def on_leave(self, date: str) -> List[LeaveInterval]:
+        return self.overlapping(date, date)
+
+    def users_on_leave(self, date: str) -> Set[int]:
+        return {iv.user_id for iv in self.on_leave(date)}
+
+    def leave_days_by_user(self, start: str, end: str,
+                           day_filter: Optional[Callable[[str], bool]] = None) -> Dict[int, int]:
+        """
+        Jumlah hari izin per user di dalam [start, end] (interval dipotong ke range).
+        day_filter (mis. MonthCalendar.is_working_day) untuk hanya menghitung hari tertentu.
+        Tanggal yang tercakup lebih dari satu izin hanya dihitung sekali.
+        """
+        clipped: Dict[int, List[tuple]] = {}
+        for iv in self.overlapping(start, end):
+            clipped.setdefault(iv.user_id, []).append((max(iv.start, start), min(iv.end, end)))
+
+        counts: Dict[int, int] = {}
+        for user_id, ranges in clipped.items():
+            if day_filter is None:
+                # Gabungkan interval yang overlap, lalu jumlahkan panjangnya
+                total, cur_start, cur_end = 0, None, None
+                for range_start, range_end in sorted(ranges):
+                    if cur_end is not None and range_start <= cur_end:
+                        cur_end = max(cur_end, range_end)
+                        continue
+                    if cur_end is not None:
+                        total += _days_between(cur_start, cur_end)
+                    cur_start, cur_end = range_start, range_end
+                counts[user_id] = total + _days_between(cur_start, cur_end)
+            else:
+                dates: Set[str] = set()
+                for range_start, range_end in ranges:
+                    day = datetime.date.fromisoformat(range_start)
+                    last = datetime.date.fromisoformat(range_end)
+                    while day <= last:
+                        if day_filter(day.isoformat()):
+                            dates.add(day.isoformat())
+                        day += datetime.timedelta(days=1)
+                counts[user_id] = len(dates)
+        return counts
+
+
+leave_index = LeaveIntervalIndex()
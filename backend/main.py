@@ -1,11 +1,40 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, extract
-from models import get_db, User, Attendance, Task, Event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import func, and_, extract, case, insert
+from models import engine, get_db, SessionLocal, snapshot_session, next_face_version, wib_now_naive, User, Attendance, Task, Event, LeaveRequest, KioskEvent
+from serialization import (
+    FastJSONResponse, SelectiveGZipMiddleware, wib_clock, format_sse,
+    GZIP_MINIMUM_SIZE, GZIP_COMPRESS_LEVEL
+)
+from event_bus import attendance_bus, DISCONNECTED
+from activity_log import activity_log
+from presence import presence_index
+from working_days import working_day_calendar
+from leave_index import leave_index, LeaveInterval
+from search import search_tasks, search_events, SearchQueryError
+from user_import import detect_gender_from_name, parse_rows, import_users, ImportFormatError
+from face_gallery import (
+    face_gallery, decode_embedding, normalize_embedding, parse_embedding, embedding_to_json,
+    load_gallery_delta, encode_gallery_delta, FACE_DUPLICATE_THRESHOLD
+)
+from group_commit import group_commit_writer, DuplicateCheckIn, GROUP_COMMIT_ENABLED
+from admission import checkin_admission
+from scheduler import scheduler, SCHEDULER_ENABLED
+from memory_diag import memory_diagnostics, register_cache, cache_sizes
+from profiler import ProfilerMiddleware, request_profiler, PROFILE_TOKEN
+from query_budget import QueryBudgetMiddleware
+from metrics import registry as metrics_registry, instrument_engine, MetricsMiddleware, face_similarity_seconds, CONTENT_TYPE as METRICS_CONTENT_TYPE
+import jobs  # noqa: F401 - registers background jobs
 from pydantic import BaseModel
 from typing import List, Optional, Dict
+import asyncio
+import base64
+import contextvars
 import datetime
+import numpy as np
 import pytz
 import logging
 from logging.handlers import RotatingFileHandler
@@ -53,7 +82,11 @@ logger.addHandler(file_handler)
 logger.addHandler(error_handler)
 logger.propagate = False  # Prevent double logging
 
-app = FastAPI(title="WorkFlow ID Backend", version="1.0.0")
+app = FastAPI(
+    title="WorkFlow ID Backend",
+    version="1.0.0",
+    default_response_class=FastJSONResponse
+)
 
 logger.info("=== WorkFlow ID Backend starting ===")
 print("Logger initialized successfully")
@@ -72,31 +105,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Helper function: Detect gender from name (simple pattern matching)
-def detect_gender_from_name(name: str) -> str:
-    """Simple gender detection from Indonesian names"""
-    name_lower = name.lower()
-    
-    # Common female name patterns
-    female_patterns = ['siti', 'putri', 'dewi', 'ayu', 'sri', 'indah', 'rina', 'wati', 'ani', 'fitri']
-    # Common male name patterns
-    male_patterns = ['ahmad', 'muhammad', 'budi', 'agus', 'adi', 'doni', 'joko', 'hendra', 'rudi', 'yanto']
-    
-    for pattern in female_patterns:
-        if pattern in name_lower:
-            return 'female'
-    
-    for pattern in male_patterns:
-        if pattern in name_lower:
-            return 'male'
-    
-    return 'other'  # Default if can't determine
+# Compress large responses (history, reports) - small ones and SSE streams are sent as-is
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+
+# Per-request SQL query count, N+1 warnings (X-DB-* headers when SQL_DEBUG=1)
+app.add_middleware(QueryBudgetMiddleware)
+
+# Request/SQL metrics for GET /metrics (outermost, so latency includes all middleware);
+# its SQL hook also feeds QueryBudgetMiddleware's per-request query count
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+
+# On-demand cProfile per request (X-Profile header / ?__profile=), only installed when PROFILE_TOKEN is set
+if PROFILE_TOKEN:
+    app.add_middleware(ProfilerMiddleware)
+
+@app.on_event("startup")
+async def warm_in_memory_state():
+    """Build in-memory indexes from the database once per worker"""
+    db = SessionLocal()
+    try:
+        activity_log.warm_from_db(db)
+        presence_index.rebuild(db, get_wib_time().strftime("%Y-%m-%d"))
+        leave_index.rebuild(db)
+        face_gallery.rebuild(db)
+    finally:
+        db.close()
+    
+    if GROUP_COMMIT_ENABLED:
+        await group_commit_writer.start()
+    if SCHEDULER_ENABLED:
+        await scheduler.start()
+
+@app.on_event("shutdown")
+async def flush_pending_writes():
+    """Stop background jobs and commit check-ins that are still queued before the worker exits"""
+    await scheduler.stop()
+    await group_commit_writer.stop()
 
 # Pydantic models
 class UserCreate(BaseModel):
     name: str
     email: str
-    face_embedding: Optional[str] = None
+    face_embedding: Optional[str] = None  # JSON array angka (legacy) atau base64 float32 little-endian
     gender: Optional[str] = None  # male, female, other
 
 class UserResponse(BaseModel):
@@ -161,7 +212,7 @@ class RecentActivity(BaseModel):
 # New Attendance Models untuk sistem modern
 class AttendanceCheckIn(BaseModel):
     user_id: int
-    face_embedding: str
+    face_embedding: str  # JSON array angka (legacy) atau base64 float32 little-endian
     location: Optional[str] = None
 
 class AttendanceCheckOut(BaseModel):
@@ -187,6 +238,39 @@ class AttendanceStatsResponse(BaseModel):
     average_work_hours: float
     attendance_rate: float
 
+# check_in_time / check_out_time sudah berformat "HH:MM WIB" (diformat di SQL)
+class AttendanceHistoryItem(BaseModel):
+    id: int
+    user_id: int
+    user_name: str
+    date: str
+    check_in_time: Optional[str]
+    check_out_time: Optional[str]
+    status: str
+    work_hours: Optional[float]
+    notes: Optional[str]
+    location: Optional[str]
+
+class AttendanceHistoryResponse(BaseModel):
+    user_name: str
+    total_records: int
+    history: List[AttendanceHistoryItem]
+
+class TodayAttendanceItem(BaseModel):
+    id: int
+    user_id: int
+    user_name: str
+    check_in_time: Optional[str]
+    check_out_time: Optional[str]
+    status: str
+    work_hours: Optional[float]
+    location: Optional[str]
+
+class TodayAttendanceResponse(BaseModel):
+    date: str
+    total_present: int
+    attendances: List[TodayAttendanceItem]
+
 @app.get("/")
 async def root():
     logger.info("[ROOT] Root endpoint accessed")
@@ -203,32 +287,179 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
         logger.warning(f"[CREATE_USER] Email already exists: {user.email}")
         raise HTTPException(status_code=400, detail="Email already registered")
     
+    vector = decode_face_embedding_param(user.face_embedding)
+    embedding = normalize_embedding(vector)
+    if embedding is not None:
+        ensure_unique_face(embedding)
+    
     # Auto-detect gender if not provided
     gender = user.gender if user.gender else detect_gender_from_name(user.name)
     
     db_user = User(
         name=user.name, 
         email=user.email, 
-        face_embedding=user.face_embedding,
+        face_embedding=embedding_to_json(vector) if vector is not None else None,
+        face_version=next_face_version() if vector is not None else 0,
         gender=gender
     )
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    presence_index.add_user(db_user.id)
+    face_gallery.upsert(db_user.id, embedding, db_user.face_version)
     
     print(f"[CREATE_USER] User created successfully - ID: {db_user.id}, Name: {db_user.name}, Gender: {db_user.gender}")
     logger.info(f"[CREATE_USER] User created successfully - ID: {db_user.id}, Name: {db_user.name}, Gender: {db_user.gender}")
     return db_user
 
+def decode_face_embedding_param(value: Optional[str]):
+    """
+    face_embedding dari request (JSON list atau base64 float32 little-endian)
+    -> vektor float32; None kalau kosong, 400 kalau formatnya tidak valid
+    """
+    if not value:
+        return None
+    vector = decode_embedding(value)
+    if vector is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Format face_embedding tidak valid (JSON array angka atau base64 float32 little-endian)"
+        )
+    return vector
+
+def ensure_unique_face(embedding, exclude_user_id: Optional[int] = None):
+    """409 kalau wajah sudah terdaftar atas nama user lain (1:N ke face gallery)"""
+    match = face_gallery.find_duplicate(embedding, FACE_DUPLICATE_THRESHOLD, exclude_user_id)
+    if match:
+        logger.warning(f"[FACE_DUPLICATE] Face matches user {match.user_id} - Similarity: {match.similarity:.4f}")
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": "Wajah sudah terdaftar untuk user lain",
+                "conflicting_user_id": match.user_id,
+                "similarity": round(match.similarity, 4)
+            }
+        )
+
+# Kolom yang boleh diminta lewat ?fields= (sparse fieldset)
+USER_FIELDS = {
+    "id": User.id,
+    "name": User.name,
+    "email": User.email,
+    "gender": User.gender,
+    "face_embedding": User.face_embedding
+}
+
+def parse_fields_param(fields: str) -> List[str]:
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in USER_FIELDS]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=400,
+            detail=f"fields tidak dikenal: {', '.join(unknown) or '-'} (pilihan: {', '.join(USER_FIELDS)})"
+        )
+    return names
+
+BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", "50000"))
+
+def run_user_import(rows: List[dict]) -> dict:
+    db = SessionLocal()
+    try:
+        return import_users(db, rows)
+    finally:
+        db.close()
+
+@app.post("/users/bulk")
+async def create_users_bulk(request: Request, format: Optional[str] = None):
+    """
+    Import banyak user sekaligus dari body CSV (text/csv) atau NDJSON
+    (application/x-ndjson); ?format=csv|ndjson kalau Content-Type tidak jelas.
+    Baris yang gagal tidak membatalkan baris lain -> lihat "errors" per baris.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv"
+    body = await request.body()
+    try:
+        rows = parse_rows(body, format)
+    except (ImportFormatError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(rows) > BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Maksimal {BULK_IMPORT_MAX_ROWS} baris per import")
+    
+    logger.info(f"[BULK_USERS] Importing {len(rows)} rows ({format})")
+    context = contextvars.copy_context()
+    result = await asyncio.get_running_loop().run_in_executor(None, context.run, run_user_import, rows)
+    logger.info(f"[BULK_USERS] Created {result['created']}, failed {result['failed']}")
+    return result
+
 @app.get("/users", response_model=List[UserResponse])
-async def get_users(db: Session = Depends(get_db)):
+async def get_users(fields: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Semua user. ?fields=id,name,gender -> hanya kolom itu yang di-SELECT
+    (face_embedding tidak dibaca dari disk kalau tidak diminta)
+    """
     print(f"[GET_USERS] Fetching all users")
-    logger.info(f"[GET_USERS] Fetching all users")
+    logger.info(f"[GET_USERS] Fetching all users (fields: {fields or 'all'})")
+    if fields is not None:
+        names = parse_fields_param(fields)
+        rows = db.query(*(USER_FIELDS[name] for name in names)).order_by(User.id).all()
+        logger.info(f"[GET_USERS] Found {len(rows)} users")
+        return FastJSONResponse([dict(zip(names, row)) for row in rows])
     users = db.query(User).all()
     print(f"[GET_USERS] Found {len(users)} users")
     logger.info(f"[GET_USERS] Found {len(users)} users")
     return users
 
+@app.get("/users/directory")
+async def get_user_directory(db: Session = Depends(get_db)):
+    """
+    Daftar karyawan ringkas untuk list/avatar dashboard: id, name, gender,
+    has_face (embedding tidak ikut dibaca, hanya dicek NULL di SQL)
+    """
+    rows = db.query(
+        User.id, User.name, User.gender, User.face_embedding.isnot(None)
+    ).order_by(User.name).all()
+    return FastJSONResponse([
+        {"id": user_id, "name": name, "gender": gender or "other", "has_face": bool(has_face)}
+        for user_id, name, gender, has_face in rows
+    ])
+
+def build_gallery_feed(since: int, as_json: bool):
+    with snapshot_session() as db:
+        delta = load_gallery_delta(db, since)
+    if as_json:
+        return FastJSONResponse({
+            "version": delta.version,
+            "full": delta.full,
+            "dimension": delta.dimension,
+            "upserts": [{"user_id": int(user_id), "embedding": vector} for user_id, vector in zip(delta.ids, delta.vectors)],
+            "removed": delta.removed
+        })
+    return Response(
+        content=encode_gallery_delta(delta),
+        media_type="application/octet-stream",
+        headers={"X-Gallery-Version": str(delta.version)}
+    )
+
+@app.get("/gallery")
+async def get_gallery(since: int = 0, format: str = "binary"):
+    """
+    Feed face gallery untuk kiosk: embedding yang ditambah/diubah/dihapus sejak
+    versi `since` (0 = full snapshot). Default biner float32 (format di
+    face_gallery.py), ?format=json untuk debugging. Kompresi: gzip otomatis
+    kalau kiosk mengirim Accept-Encoding: gzip.
+    Kiosk menyimpan `version` dari response lalu memakainya sebagai since berikutnya.
+    """
+    if format not in ("binary", "json"):
+        raise HTTPException(status_code=400, detail="format harus binary atau json")
+    context = contextvars.copy_context()
+    response = await asyncio.get_running_loop().run_in_executor(
+        None, context.run, build_gallery_feed, since, format == "json"
+    )
+    logger.info(f"[GALLERY] Feed since {since} -> {len(response.body)} bytes")
+    return response
+
 @app.post("/attendance", response_model=AttendanceResponse)
 async def create_attendance(att: AttendanceCreate, db: Session = Depends(get_db)):
     db_att = Attendance(user_id=att.user_id)
@@ -268,57 +499,69 @@ def is_late(check_in_time: datetime.datetime) -> bool:
     cutoff_minute = 0
     return check_in_time.hour > cutoff_hour or (check_in_time.hour == cutoff_hour and check_in_time.minute > cutoff_minute)
 
+FACE_MATCH_THRESHOLD = 0.55  # Same as login threshold
+
 # Helper function: Calculate similarity between embeddings
-def calculate_embedding_similarity(embedding1: str, embedding2: str) -> float:
-    """Calculate cosine similarity between two face embeddings"""
-    try:
-        import json
-        import numpy as np
-        
-        logger.info(f"[SIMILARITY] Calculating similarity...")
-        logger.info(f"[SIMILARITY] Embedding1 length: {len(embedding1)} chars")
-        logger.info(f"[SIMILARITY] Embedding2 length: {len(embedding2)} chars")
-        
-        emb1 = np.array(json.loads(embedding1))
-        emb2 = np.array(json.loads(embedding2))
-        
-        logger.info(f"[SIMILARITY] Parsed emb1 shape: {emb1.shape}, dtype: {emb1.dtype}")
-        logger.info(f"[SIMILARITY] Parsed emb2 shape: {emb2.shape}, dtype: {emb2.dtype}")
-        logger.info(f"[SIMILARITY] Emb1 sample (10): {emb1[:10].tolist()}")
-        logger.info(f"[SIMILARITY] Emb2 sample (10): {emb2[:10].tolist()}")
-        
-        # Cosine similarity
-        dot_product = np.dot(emb1, emb2)
-        norm1 = np.linalg.norm(emb1)
-        norm2 = np.linalg.norm(emb2)
-        
-        logger.info(f"[SIMILARITY] Dot product: {dot_product:.4f}")
-        logger.info(f"[SIMILARITY] Norm1: {norm1:.4f}, Norm2: {norm2:.4f}")
-        
-        if norm1 == 0 or norm2 == 0:
-            logger.warning(f"[SIMILARITY] Zero norm detected!")
-            return 0.0
-        
-        similarity = dot_product / (norm1 * norm2)
-        logger.info(f"[SIMILARITY] Final similarity: {similarity:.4f} ({similarity*100:.2f}%)")
-        return float(similarity)
-    except Exception as e:
-        logger.error(f"[SIMILARITY] Error calculating similarity: {str(e)}", exc_info=True)
+@face_similarity_seconds.timed
+def calculate_face_similarity(user: User, probe) -> float:
+    """
+    Cosine similarity embedding tersimpan user vs probe (vektor dari decode_embedding).
+    Embedding tersimpan diambil dari face gallery (sudah ter-normalisasi) kalau
+    versinya sama dengan user.face_version, jadi tanpa parse JSON dari DB.
+    """
+    stored = face_gallery.get(user.id, user.face_version)
+    if stored is None:
+        logger.info(f"[SIMILARITY] User {user.id} not in face gallery (version {user.face_version}), parsing from DB")
+        stored = parse_embedding(user.face_embedding)
+        face_gallery.upsert(user.id, stored, user.face_version)
+    if stored is None or stored.size != probe.size:
+        logger.warning(f"[SIMILARITY] Stored embedding invalid or dimension mismatch (probe dim {probe.size})")
+        return 0.0
+    norm = np.linalg.norm(probe)
+    if norm == 0:
+        logger.warning(f"[SIMILARITY] Zero norm detected!")
         return 0.0
+    similarity = float(stored @ probe) / float(norm)
+    logger.info(f"[SIMILARITY] Final similarity: {similarity:.4f} ({similarity*100:.2f}%)")
+    return similarity
 
 @app.post("/attendance/check-in")
 async def check_in(check_in_data: AttendanceCheckIn, db: Session = Depends(get_db)):
     """
     Check-in karyawan dengan face recognition
+    - Admission control: antrian terbatas, fair per lokasi kiosk (429/503 + Retry-After)
     - Validasi face embedding match dengan database
     - 1x check-in per hari
     - Deteksi keterlambatan (jam 8 WIB)
     """
+    async with checkin_admission.slot(check_in_data.location):
+        return await process_check_in(check_in_data, db)
+
+@app.post("/attendance/check-in/binary")
+async def check_in_binary(request: Request, user_id: int, location: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Sama dengan /attendance/check-in, tapi body = embedding float32 little-endian
+    mentah (Content-Type: application/octet-stream); user_id/location lewat query
+    """
+    body = await request.body()
+    check_in_data = AttendanceCheckIn(
+        user_id=user_id, face_embedding=base64.b64encode(body).decode("ascii"), location=location
+    )
+    async with checkin_admission.slot(location):
+        return await process_check_in(check_in_data, db)
+
+async def process_check_in(check_in_data: AttendanceCheckIn, db: Session):
+    """Check-in logic, runs only after admission"""
     logger.info(f"[CHECK-IN] ════════════════════════════════════════════")
     logger.info(f"[CHECK-IN] User {check_in_data.user_id} attempting check-in")
     logger.info(f"[CHECK-IN] Received face_embedding length: {len(check_in_data.face_embedding)} chars")
     
     try:
+        # 0. Fast reject: sudah check-in hari ini? (presence bitmap, tanpa SQL / embedding math)
+        if presence_index.is_present(get_wib_time().strftime("%Y-%m-%d"), check_in_data.user_id):
+            logger.warning(f"[CHECK-IN] User {check_in_data.user_id} already checked in today (presence index)")
+            raise HTTPException(status_code=400, detail="Anda sudah absen hari ini!")
+        
         # 1. Verify user exists
         user = db.query(User).filter(User.id == check_in_data.user_id).first()
         if not user:
@@ -332,11 +575,15 @@ async def check_in(check_in_data: AttendanceCheckIn, db: Session = Depends(get_d
             logger.warning(f"[CHECK-IN] User {user.name} has no face embedding registered")
             raise HTTPException(status_code=400, detail="Wajah belum terdaftar. Silakan registrasi terlebih dahulu.")
         
-        logger.info(f"[CHECK-IN] User face_embedding in DB length: {len(user.face_embedding)} chars")
+        probe = decode_embedding(check_in_data.face_embedding)
+        if probe is None:
+            logger.warning(f"[CHECK-IN] Invalid face_embedding payload from user {user.id}")
+            raise HTTPException(status_code=400, detail="Format face_embedding tidak valid")
+        
         logger.info(f"[CHECK-IN] Calculating similarity...")
         
-        similarity = calculate_embedding_similarity(user.face_embedding, check_in_data.face_embedding)
-        THRESHOLD = 0.55  # Same as login threshold
+        similarity = calculate_face_similarity(user, probe)
+        THRESHOLD = FACE_MATCH_THRESHOLD
         
         logger.info(f"[CHECK-IN] Similarity result: {similarity:.4f} ({similarity*100:.2f}%)")
         logger.info(f"[CHECK-IN] Threshold: {THRESHOLD:.4f} ({THRESHOLD*100:.2f}%)")
@@ -364,6 +611,8 @@ async def check_in(check_in_data: AttendanceCheckIn, db: Session = Depends(get_d
         ).first()
         
         if existing_attendance:
+            # Check-in dari worker lain - sinkronkan bitmap supaya percobaan berikutnya langsung ditolak
+            presence_index.mark(today_date, check_in_data.user_id)
             logger.warning(f"[CHECK-IN] User {user.name} already checked in today at {existing_attendance.check_in_time}")
             raise HTTPException(
                 status_code=400, 
@@ -375,21 +624,48 @@ async def check_in(check_in_data: AttendanceCheckIn, db: Session = Depends(get_d
         status_text = "TERLAMBAT 🕒" if status == "late" else "TEPAT WAKTU ✅"
         
         # 6. Create attendance record
-        new_attendance = Attendance(
-            user_id=check_in_data.user_id,
-            date=today_date,
-            check_in_time=current_time,
-            status=status,
-            location=check_in_data.location,
-            timestamp=current_time  # Legacy field
-        )
+        attendance_row = {
+            "user_id": check_in_data.user_id,
+            "date": today_date,
+            "check_in_time": current_time,
+            "status": status,
+            "location": check_in_data.location,
+            "timestamp": current_time  # Legacy field
+        }
         
-        db.add(new_attendance)
-        db.commit()
-        db.refresh(new_attendance)
+        if group_commit_writer.running:
+            # Group commit: satu transaksi untuk banyak check-in, return setelah commit
+            try:
+                attendance_id = await group_commit_writer.submit(attendance_row)
+            except DuplicateCheckIn:
+                presence_index.mark(today_date, check_in_data.user_id)
+                logger.warning(f"[CHECK-IN] User {user.name} already checked in today (group commit)")
+                raise HTTPException(status_code=400, detail="Anda sudah absen hari ini!")
+        else:
+            new_attendance = Attendance(**attendance_row)
+            db.add(new_attendance)
+            db.commit()
+            db.refresh(new_attendance)
+            attendance_id = new_attendance.id
+        
+        presence_index.mark(today_date, check_in_data.user_id)
         
         logger.info(f"[CHECK-IN] SUCCESS - User: {user.name}, Gender: {user.gender}, Time: {current_time.strftime('%H:%M WIB')}, Status: {status}")
         
+        # 7. Push ke live feed (/attendance/stream) dan activity log
+        activity_log.record_check_in(current_time, user.name)
+        attendance_bus.publish("check_in", {
+            "date": today_date,
+            "id": attendance_id,
+            "user_id": check_in_data.user_id,
+            "user_name": user.name,
+            "check_in_time": current_time.strftime("%H:%M WIB"),
+            "check_out_time": None,
+            "status": status,
+            "work_hours": None,
+            "location": check_in_data.location
+        })
+        
         return {
             "message": f"Check-in berhasil! Status: {status_text}",
             "user_name": user.name,
@@ -398,7 +674,7 @@ async def check_in(check_in_data: AttendanceCheckIn, db: Session = Depends(get_d
             "date": today_date,
             "status": status,
             "similarity": round(similarity * 100, 1),
-            "attendance_id": new_attendance.id
+            "attendance_id": attendance_id
         }
     
     except HTTPException:
@@ -446,6 +722,9 @@ async def check_out(check_out_data: AttendanceCheckOut, db: Session = Depends(ge
         
         # 3. Calculate work hours
         check_in = attendance.check_in_time
+        if check_in.tzinfo is None:
+            # SQLite menyimpan DateTime tanpa timezone - nilai tersimpan adalah jam WIB
+            check_in = pytz.timezone('Asia/Jakarta').localize(check_in)
         check_out = current_time
         work_duration = check_out - check_in
         work_hours = round(work_duration.total_seconds() / 3600, 2)  # Convert to hours
@@ -459,6 +738,19 @@ async def check_out(check_out_data: AttendanceCheckOut, db: Session = Depends(ge
         
         logger.info(f"[CHECK-OUT] SUCCESS - User: {user.name}, Time: {check_out.strftime('%H:%M WIB')}, Work Hours: {work_hours}h")
         
+        # 5. Push ke live feed (/attendance/stream)
+        attendance_bus.publish("check_out", {
+            "date": today_date,
+            "id": attendance.id,
+            "user_id": attendance.user_id,
+            "user_name": user.name,
+            "check_in_time": check_in.strftime("%H:%M WIB"),
+            "check_out_time": check_out.strftime("%H:%M WIB"),
+            "status": attendance.status,
+            "work_hours": work_hours,
+            "location": attendance.location
+        })
+        
         return {
             "message": "Check-out berhasil! Terima kasih atas kerja keras Anda hari ini 👏",
             "user_name": user.name,
@@ -474,7 +766,268 @@ async def check_out(check_out_data: AttendanceCheckOut, db: Session = Depends(ge
         logger.error(f"[CHECK-OUT] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Terjadi kesalahan: {str(e)}")
 
-@app.get("/attendance/history/{user_id}")
+# ==================== OFFLINE KIOSK SYNC ====================
+
+KIOSK_SYNC_MAX_EVENTS = int(os.getenv("KIOSK_SYNC_MAX_EVENTS", "500"))
+KIOSK_SYNC_MAX_AGE_DAYS = int(os.getenv("KIOSK_SYNC_MAX_AGE_DAYS", "7"))
+KIOSK_SYNC_MAX_SKEW_SECONDS = int(os.getenv("KIOSK_SYNC_MAX_SKEW_SECONDS", "300"))
+KIOSK_EVENT_TYPES = {"check_in", "check_out"}
+
+class KioskSyncEvent(BaseModel):
+    idempotency_key: str  # dibuat kiosk (mis. UUID), unik per event
+    type: str  # check_in, check_out
+    user_id: int
+    timestamp: str  # ISO 8601 dari jam kiosk; tanpa offset = WIB
+    face_embedding: Optional[str] = None  # wajib untuk check_in (JSON array / base64 float32)
+
+class KioskSyncBatch(BaseModel):
+    kiosk_id: str
+    location: Optional[str] = None
+    events: List[KioskSyncEvent]
+
+def parse_kiosk_time(value: str) -> Optional[datetime.datetime]:
+    """ISO 8601 -> datetime WIB (aware), None kalau tidak valid"""
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+    wib = pytz.timezone('Asia/Jakarta')
+    return parsed.astimezone(wib) if parsed.tzinfo else wib.localize(parsed)
+
+def kiosk_event_result(event: KioskEvent, replayed: bool) -> dict:
+    return {
+        "idempotency_key": event.idempotency_key,
+        "status": event.outcome,
+        "reason": event.reason,
+        "attendance_id": event.attendance_id,
+        "similarity": round(event.similarity * 100, 1) if event.similarity is not None else None,
+        "replayed": replayed
+    }
+
+def verify_kiosk_faces(events: List[tuple], users: Dict[int, tuple]) -> Dict[str, float]:
+    """
+    Similarity semua event check_in sekaligus: probe dan embedding tersimpan
+    ditumpuk jadi dua matrix ter-normalisasi, lalu satu einsum baris-per-baris.
+    Return idempotency_key -> similarity (event yang tidak bisa dibandingkan tidak ada)
+    """
+    keys, probes, stored = [], [], []
+    for key, event, _ in events:
+        user_id, _, face_embedding, face_version = users[event.user_id]
+        probe = parse_embedding(event.face_embedding)
+        reference = face_gallery.get(user_id, face_version)
+        if reference is None:
+            reference = parse_embedding(face_embedding)
+            face_gallery.upsert(user_id, reference, face_version)
+        if probe is None or reference is None or probe.size != reference.size:
+            continue
+        keys.append(key)
+        probes.append(probe)
+        stored.append(reference)
+    if not keys:
+        return {}
+    if len({probe.size for probe in probes}) > 1:
+        return {key: float(p @ r) for key, p, r in zip(keys, probes, stored)}
+    similarities = np.einsum("ij,ij->i", np.stack(probes), np.stack(stored))
+    return dict(zip(keys, similarities.tolist()))
+
+def process_kiosk_sync(batch: KioskSyncBatch) -> dict:
+    """
+    Proses satu batch sync dalam SATU transaksi:
+    1. Dedupe idempotency key dalam batch dan terhadap kiosk_events (satu query IN)
+    2. Validasi, lalu verifikasi wajah semua check_in sekaligus (vektor)
+    3. Upsert attendance urut waktu event: check-in paling awal dan check-out
+       paling akhir per (user, tanggal) yang dipakai
+    4. Simpan hasil setiap event ke kiosk_events (replay -> hasil yang sama)
+    """
+    db = SessionLocal()
+    try:
+        results: Dict[str, dict] = {}
+        unique_events = {}
+        for event in batch.events:
+            unique_events.setdefault(event.idempotency_key, event)
+        
+        stored = db.query(KioskEvent).filter(KioskEvent.idempotency_key.in_(list(unique_events))).all()
+        for kiosk_event in stored:
+            results[kiosk_event.idempotency_key] = kiosk_event_result(kiosk_event, replayed=True)
+        
+        now = get_wib_time()
+        oldest = now - datetime.timedelta(days=KIOSK_SYNC_MAX_AGE_DAYS)
+        newest = now + datetime.timedelta(seconds=KIOSK_SYNC_MAX_SKEW_SECONDS)
+        pending = [(key, event) for key, event in unique_events.items() if key not in results]
+        users = {
+            row[0]: row for row in db.query(User.id, User.name, User.face_embedding, User.face_version).filter(
+                User.id.in_({event.user_id for _, event in pending})
+            )
+        }
+        
+        new_events: List[tuple] = []  # (KioskEvent, Attendance atau None)
+        
+        def finish(key: str, event: KioskSyncEvent, client_time, outcome: str, reason: Optional[str] = None,
+                   attendance: Optional[Attendance] = None, similarity: Optional[float] = None):
+            new_events.append((KioskEvent(
+                idempotency_key=key, kiosk_id=batch.kiosk_id, event_type=event.type, user_id=event.user_id,
+                client_time=client_time, outcome=outcome, reason=reason, similarity=similarity
+            ), attendance))
+        
+        # Validasi
+        valid = []
+        for key, event in pending:
+            client_time = parse_kiosk_time(event.timestamp)
+            if event.type not in KIOSK_EVENT_TYPES:
+                finish(key, event, None, "rejected", f"type harus salah satu dari: {', '.join(sorted(KIOSK_EVENT_TYPES))}")
+            elif client_time is None:
+                finish(key, event, None, "rejected", "Format timestamp tidak valid")
+            elif not oldest <= client_time <= newest:
+                finish(key, event, client_time, "rejected", "Timestamp di luar jendela sync")
+            elif event.user_id not in users:
+                finish(key, event, client_time, "rejected", "User tidak ditemukan")
+            elif event.type == "check_in" and not users[event.user_id][2]:
+                finish(key, event, client_time, "rejected", "Wajah belum terdaftar")
+            else:
+                valid.append((key, event, client_time))
+        
+        # Verifikasi wajah (satu pass vektor untuk semua check_in)
+        similarities = verify_kiosk_faces([item for item in valid if item[1].type == "check_in"], users)
+        
+        # Attendance yang sudah ada untuk semua (user, tanggal) di batch: satu query
+        pairs = {(event.user_id, client_time.strftime("%Y-%m-%d")) for _, event, client_time in valid}
+        attendances: Dict[tuple, Attendance] = {}
+        if pairs:
+            for attendance in db.query(Attendance).filter(
+                Attendance.user_id.in_({user_id for user_id, _ in pairs}),
+                Attendance.date.in_({date for _, date in pairs})
+            ):
+                if (attendance.user_id, attendance.date) in pairs:
+                    attendances.setdefault((attendance.user_id, attendance.date), attendance)
+        
+        wib = pytz.timezone('Asia/Jakarta')
+        for key, event, client_time in sorted(valid, key=lambda item: item[2]):
+            date = client_time.strftime("%Y-%m-%d")
+            attendance = attendances.get((event.user_id, date))
+            
+            if event.type == "check_in":
+                similarity = similarities.get(key)
+                if similarity is None:
+                    finish(key, event, client_time, "rejected", "Format face_embedding tidak valid")
+                    continue
+                if similarity < FACE_MATCH_THRESHOLD:
+                    finish(key, event, client_time, "rejected", "Wajah tidak cocok", similarity=similarity)
+                    continue
+                status = "late" if is_late(client_time) else "on_time"
+                if attendance is None:
+                    attendance = Attendance(
+                        user_id=event.user_id, date=date, check_in_time=client_time, status=status,
+                        location=batch.location, timestamp=client_time, notes=f"Offline sync: {batch.kiosk_id}"
+                    )
+                    db.add(attendance)
+                    attendances[(event.user_id, date)] = attendance
+                    finish(key, event, client_time, "recorded", attendance=attendance, similarity=similarity)
+                elif attendance.check_in_time is None or wib.localize(attendance.check_in_time.replace(tzinfo=None)) > client_time:
+                    attendance.check_in_time = client_time
+                    attendance.status = status
+                    if attendance.check_out_time is not None:
+                        check_out = attendance.check_out_time
+                        check_out = wib.localize(check_out.replace(tzinfo=None)) if check_out.tzinfo is None else check_out
+                        attendance.work_hours = round((check_out - client_time).total_seconds() / 3600, 2)
+                    finish(key, event, client_time, "updated", "Check-in lebih awal dari yang tercatat", attendance, similarity)
+                else:
+                    finish(key, event, client_time, "duplicate", "Sudah check-in", attendance, similarity)
+            else:
+                if attendance is None or attendance.check_in_time is None:
+                    finish(key, event, client_time, "rejected", "Belum check-in pada tanggal tersebut")
+                    continue
+                check_in = attendance.check_in_time
+                check_in = wib.localize(check_in.replace(tzinfo=None)) if check_in.tzinfo is None else check_in
+                check_out = attendance.check_out_time
+                if check_out is not None and wib.localize(check_out.replace(tzinfo=None)) >= client_time:
+                    finish(key, event, client_time, "duplicate", "Sudah check-out", attendance)
+                    continue
+                if client_time <= check_in:
+                    finish(key, event, client_time, "rejected", "Check-out sebelum check-in")
+                    continue
+                outcome = "updated" if check_out is not None else "recorded"
+                attendance.check_out_time = client_time
+                attendance.work_hours = round((client_time - check_in).total_seconds() / 3600, 2)
+                finish(key, event, client_time, outcome, attendance=attendance)
+        
+        db.flush()  # id attendance baru
+        check_ins = []
+        for kiosk_event, attendance in new_events:
+            kiosk_event.attendance_id = attendance.id if attendance is not None else None
+            db.add(kiosk_event)
+            results[kiosk_event.idempotency_key] = kiosk_event_result(kiosk_event, replayed=False)
+            if kiosk_event.event_type == "check_in" and kiosk_event.outcome in ("recorded", "updated"):
+                check_out = attendance.check_out_time
+                check_ins.append((kiosk_event.outcome, kiosk_event.client_time, {
+                    "date": attendance.date,
+                    "id": attendance.id,
+                    "user_id": attendance.user_id,
+                    "user_name": users[attendance.user_id][1],
+                    "check_in_time": kiosk_event.client_time.strftime("%H:%M WIB"),
+                    "check_out_time": check_out.strftime("%H:%M WIB") if check_out is not None else None,
+                    "status": attendance.status,
+                    "work_hours": attendance.work_hours,
+                    "location": attendance.location
+                }))
+        db.commit()
+        
+        # Index in-memory dan live feed setelah commit
+        today = now.strftime("%Y-%m-%d")
+        for outcome, client_time, payload in check_ins:
+            presence_index.mark(payload["date"], payload["user_id"])
+            if outcome == "recorded":
+                activity_log.record_check_in(client_time, payload["user_name"])
+            if payload["date"] == today:
+                # Baris yang sudah ada (mis. check-in online) -> update, bukan check_in baru
+                attendance_bus.publish("check_in" if outcome == "recorded" else "attendance_update", payload)
+        
+        ordered = [results[event.idempotency_key] for event in batch.events]
+        counts = {}
+        for result in results.values():
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        return {
+            "kiosk_id": batch.kiosk_id,
+            "received": len(batch.events),
+            "replayed": sum(1 for result in results.values() if result["replayed"]),
+            "outcomes": counts,
+            "results": ordered
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+@app.post("/attendance/sync")
+async def sync_kiosk_events(batch: KioskSyncBatch):
+    """
+    Upload batch event check-in/out dari kiosk yang sempat offline.
+    - Idempotent: event dengan idempotency_key yang sudah pernah diproses
+      tidak diproses ulang, hasil lamanya dikembalikan (replayed: true)
+    - Jam event dari kiosk (maks. KIOSK_SYNC_MAX_AGE_DAYS hari ke belakang)
+    - Semua event baru ditulis dalam satu transaksi
+    """
+    if len(batch.events) > KIOSK_SYNC_MAX_EVENTS:
+        raise HTTPException(status_code=413, detail=f"Maksimal {KIOSK_SYNC_MAX_EVENTS} event per batch")
+    logger.info(f"[KIOSK_SYNC] Kiosk {batch.kiosk_id} uploading {len(batch.events)} events")
+    
+    try:
+        try:
+            context = contextvars.copy_context()
+            result = await asyncio.get_running_loop().run_in_executor(None, context.run, process_kiosk_sync, batch)
+        except IntegrityError:
+            # Batch yang sama sedang diproses request lain (retry kiosk) -> ulang sekali sebagai replay
+            logger.warning(f"[KIOSK_SYNC] Idempotency key conflict for kiosk {batch.kiosk_id}, retrying")
+            context = contextvars.copy_context()
+            result = await asyncio.get_running_loop().run_in_executor(None, context.run, process_kiosk_sync, batch)
+    except Exception as e:
+        logger.error(f"[KIOSK_SYNC] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Terjadi kesalahan: {str(e)}")
+    
+    logger.info(f"[KIOSK_SYNC] Kiosk {batch.kiosk_id}: {result['outcomes']} (replayed {result['replayed']})")
+    return result
+
+@app.get("/attendance/history/{user_id}", response_model=AttendanceHistoryResponse)
 async def get_attendance_history(
     user_id: int,
     start_date: Optional[str] = None,
@@ -497,8 +1050,18 @@ async def get_attendance_history(
         if not user:
             raise HTTPException(status_code=404, detail="User tidak ditemukan")
         
-        # Build query
-        query = db.query(Attendance).filter(Attendance.user_id == user_id)
+        # Build query - select columns only, jam diformat oleh SQLite
+        query = db.query(
+            Attendance.id,
+            Attendance.user_id,
+            Attendance.date,
+            wib_clock(Attendance.check_in_time).label("check_in_time"),
+            wib_clock(Attendance.check_out_time).label("check_out_time"),
+            Attendance.status,
+            Attendance.work_hours,
+            Attendance.notes,
+            Attendance.location
+        ).filter(Attendance.user_id == user_id)
         
         # Date filters
         if start_date:
@@ -516,31 +1079,18 @@ async def get_attendance_history(
             query = query.filter(Attendance.status == status)
         
         # Execute query
-        attendances = query.order_by(Attendance.date.desc()).all()
+        rows = query.order_by(Attendance.date.desc()).all()
         
         # Format response
-        history = []
-        for att in attendances:
-            history.append({
-                "id": att.id,
-                "user_id": att.user_id,
-                "user_name": user.name,
-                "date": att.date,
-                "check_in_time": att.check_in_time.strftime("%H:%M WIB") if att.check_in_time else None,
-                "check_out_time": att.check_out_time.strftime("%H:%M WIB") if att.check_out_time else None,
-                "status": att.status,
-                "work_hours": att.work_hours,
-                "notes": att.notes,
-                "location": att.location
-            })
+        history = [{**row._asdict(), "user_name": user.name} for row in rows]
         
         logger.info(f"[HISTORY] Found {len(history)} records for user {user.name}")
         
-        return {
+        return FastJSONResponse({
             "user_name": user.name,
             "total_records": len(history),
             "history": history
-        }
+        })
     
     except HTTPException:
         raise
@@ -580,15 +1130,24 @@ async def get_attendance_stats(user_id: int, db: Session = Depends(get_db)):
         total_days = len(attendances)
         on_time_days = len([att for att in attendances if att.status == "on_time"])
         late_days = len([att for att in attendances if att.status == "late"])
-        absent_days = 0  # TODO: Calculate based on working days
+        
+        # Absent = hari kerja s/d kemarin (weekend & holiday tidak dihitung) tanpa attendance
+        today_date = current_time.strftime("%Y-%m-%d")
+        yesterday = (current_time - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+        month_calendar = working_day_calendar.get_month(db, current_time.year, current_time.month)
+        working_days_elapsed = month_calendar.count_until(today_date)
+        leaves = [(iv.user_id, iv.start, iv.end) for iv in leave_index.overlapping(first_day, last_day_str) if iv.user_id == user_id]
+        leave_days = leave_index.leave_days_by_user(first_day, last_day_str, month_calendar.is_working_day).get(user_id, 0)
+        absent_days = working_day_calendar.absent_days_by_user(
+            db, current_time.year, current_time.month, [user_id], until=yesterday, excused=leaves
+        )[user_id]
         
         # Calculate average work hours
         work_hours_list = [att.work_hours for att in attendances if att.work_hours]
         avg_work_hours = round(sum(work_hours_list) / len(work_hours_list), 2) if work_hours_list else 0.0
         
-        # Calculate attendance rate (assuming 22 working days per month)
-        working_days_per_month = 22
-        attendance_rate = round((total_days / working_days_per_month) * 100, 1) if total_days > 0 else 0.0
+        # Calculate attendance rate (against working days elapsed this month)
+        attendance_rate = round(min(total_days / working_days_elapsed * 100, 100), 1) if working_days_elapsed > 0 else 0.0
         
         logger.info(f"[STATS] User {user.name} - Total: {total_days}, On-time: {on_time_days}, Late: {late_days}")
         
@@ -600,6 +1159,9 @@ async def get_attendance_stats(user_id: int, db: Session = Depends(get_db)):
             "on_time_days": on_time_days,
             "late_days": late_days,
             "absent_days": absent_days,
+            "leave_days": leave_days,
+            "working_days": len(month_calendar),
+            "working_days_elapsed": working_days_elapsed,
             "average_work_hours": avg_work_hours,
             "attendance_rate": attendance_rate
         }
@@ -610,7 +1172,23 @@ async def get_attendance_stats(user_id: int, db: Session = Depends(get_db)):
         logger.error(f"[STATS] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Terjadi kesalahan: {str(e)}")
 
-@app.get("/attendance/today")
+def get_today_attendance_rows(db: Session, today_date: str) -> List[dict]:
+    """Today's attendance rows (shared by /attendance/today and the SSE snapshot)"""
+    rows = db.query(
+        Attendance.id,
+        Attendance.user_id,
+        User.name.label("user_name"),
+        wib_clock(Attendance.check_in_time).label("check_in_time"),
+        wib_clock(Attendance.check_out_time).label("check_out_time"),
+        Attendance.status,
+        Attendance.work_hours,
+        Attendance.location
+    ).join(User, User.id == Attendance.user_id).filter(
+        Attendance.date == today_date
+    ).all()
+    return [row._asdict() for row in rows]
+
+@app.get("/attendance/today", response_model=TodayAttendanceResponse)
 async def get_today_attendance(db: Session = Depends(get_db)):
     """
     Get all attendance records for today (untuk admin/dashboard)
@@ -621,37 +1199,365 @@ async def get_today_attendance(db: Session = Depends(get_db)):
         current_time = get_wib_time()
         today_date = current_time.strftime("%Y-%m-%d")
         
-        attendances = db.query(Attendance, User).join(User).filter(
-            Attendance.date == today_date
-        ).all()
-        
-        result = []
-        for att, user in attendances:
-            result.append({
-                "id": att.id,
-                "user_id": att.user_id,
-                "user_name": user.name,
-                "check_in_time": att.check_in_time.strftime("%H:%M WIB") if att.check_in_time else None,
-                "check_out_time": att.check_out_time.strftime("%H:%M WIB") if att.check_out_time else None,
-                "status": att.status,
-                "work_hours": att.work_hours,
-                "location": att.location
-            })
+        result = get_today_attendance_rows(db, today_date)
         
         logger.info(f"[TODAY] Found {len(result)} attendance records for today")
         
-        return {
+        return FastJSONResponse({
             "date": today_date,
             "total_present": len(result),
             "attendances": result
-        }
+        })
     
     except Exception as e:
         logger.error(f"[TODAY] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Terjadi kesalahan: {str(e)}")
 
+@app.get("/attendance/not-arrived")
+async def get_not_arrived(db: Session = Depends(get_db)):
+    """
+    User yang belum check-in hari ini (users & ~present dari presence bitmap)
+    """
+    logger.info("[NOT_ARRIVED] Fetching users who haven't checked in today")
+    
+    try:
+        today_date = get_wib_time().strftime("%Y-%m-%d")
+        
+        user_ids = presence_index.absent_user_ids(today_date)
+        if user_ids:
+            users = db.query(User.id, User.name, User.gender).filter(User.id.in_(user_ids)).order_by(User.name).all()
+        else:
+            users = []
+        
+        logger.info(f"[NOT_ARRIVED] {len(users)} users haven't checked in")
+        
+        return FastJSONResponse({
+            "date": today_date,
+            "total_not_arrived": len(users),
+            "users": [row._asdict() for row in users]
+        })
+    
+    except Exception as e:
+        logger.error(f"[NOT_ARRIVED] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Terjadi kesalahan: {str(e)}")
+
+SSE_HEARTBEAT_SECONDS = 15
+
+@app.get("/attendance/stream")
+async def stream_today_attendance():
+    """
+    Live feed absensi hari ini (Server-Sent Events)
+    - event "snapshot": sama dengan /attendance/today, dikirim sekali saat connect
+    - event "check_in" / "check_out": delta per baris (upsert berdasarkan id)
+    - event "attendance_update": baris yang sudah ada diubah (mis. check-in lebih
+      awal dari sync kiosk offline), payload sama, ganti baris dengan id tersebut
+    - komentar keep-alive setiap 15 detik
+    """
+    logger.info(f"[STREAM] Client connected - subscribers: {attendance_bus.subscriber_count + 1}")
+    
+    async def event_stream():
+        # Subscribe sebelum snapshot supaya tidak ada delta yang terlewat
+        # (delta yang sudah ada di snapshot cukup di-upsert ulang oleh client)
+        queue = attendance_bus.subscribe()
+        try:
+            today_date = get_wib_time().strftime("%Y-%m-%d")
+            db = SessionLocal()
+            try:
+                result = get_today_attendance_rows(db, today_date)
+            finally:
+                db.close()
+            
+            yield format_sse("snapshot", {
+                "date": today_date,
+                "total_present": len(result),
+                "attendances": result
+            })
+            
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                
+                if message is DISCONNECTED:
+                    break
+                yield format_sse(message["event"], message["data"])
+        finally:
+            attendance_bus.unsubscribe(queue)
+            logger.info("[STREAM] Client disconnected")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering (nginx)
+        }
+    )
+
 # ==================== END MODERN ATTENDANCE SYSTEM ====================
 
+# ==================== LEAVE (IZIN) ENDPOINTS ====================
+
+class LeaveCreate(BaseModel):
+    user_id: int
+    start_date: str  # YYYY-MM-DD
+    end_date: str  # YYYY-MM-DD (inklusif)
+    leave_type: str = "izin"  # izin, sakit, cuti
+    reason: Optional[str] = None
+
+class LeaveStatusUpdate(BaseModel):
+    status: str  # pending, approved, rejected, cancelled
+
+LEAVE_STATUSES = {"pending", "approved", "rejected", "cancelled"}
+
+def leave_to_dict(leave: LeaveRequest) -> dict:
+    return {
+        "id": leave.id,
+        "user_id": leave.user_id,
+        "start_date": leave.start_date,
+        "end_date": leave.end_date,
+        "leave_type": leave.leave_type,
+        "reason": leave.reason,
+        "status": leave.status
+    }
+
+def parse_date_param(value: str, name: str) -> datetime.date:
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Format {name} harus YYYY-MM-DD")
+
+@app.post("/leaves")
+async def create_leave(leave_data: LeaveCreate, db: Session = Depends(get_db)):
+    """
+    Ajukan izin/cuti (status awal: pending)
+    """
+    logger.info(f"[LEAVE] User {leave_data.user_id} requesting leave {leave_data.start_date} - {leave_data.end_date}")
+    
+    start = parse_date_param(leave_data.start_date, "start_date")
+    end = parse_date_param(leave_data.end_date, "end_date")
+    if end < start:
+        raise HTTPException(status_code=400, detail="end_date tidak boleh sebelum start_date")
+    
+    user = db.query(User).filter(User.id == leave_data.user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User tidak ditemukan")
+    
+    leave = LeaveRequest(
+        user_id=leave_data.user_id,
+        start_date=start.isoformat(),
+        end_date=end.isoformat(),
+        leave_type=leave_data.leave_type,
+        reason=leave_data.reason,
+        status="pending"
+    )
+    db.add(leave)
+    db.commit()
+    db.refresh(leave)
+    
+    logger.info(f"[LEAVE] Leave created - ID: {leave.id}, User: {user.name}")
+    return {"message": "Pengajuan izin berhasil dibuat!", "leave": leave_to_dict(leave)}
+
+@app.put("/leaves/{leave_id}/status")
+async def update_leave_status(leave_id: int, update: LeaveStatusUpdate, db: Session = Depends(get_db)):
+    """
+    Approve / reject / cancel izin - hanya izin approved yang masuk interval index
+    """
+    if update.status not in LEAVE_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Status harus salah satu dari: {', '.join(sorted(LEAVE_STATUSES))}")
+    
+    leave = db.query(LeaveRequest).filter(LeaveRequest.id == leave_id).first()
+    if not leave:
+        raise HTTPException(status_code=404, detail="Izin tidak ditemukan")
+    
+    leave.status = update.status
+    db.commit()
+    db.refresh(leave)
+    
+    leave_index.remove(leave.id)
+    if leave.status == "approved":
+        leave_index.add(LeaveInterval(leave.start_date, leave.end_date, leave.user_id, leave.id, leave.leave_type))
+    
+    logger.info(f"[LEAVE] Leave {leave_id} status -> {leave.status}")
+    return {"message": "Status izin berhasil diupdate!", "leave": leave_to_dict(leave)}
+
+@app.get("/leaves/on-date")
+async def get_leaves_on_date(date: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Siapa yang izin pada tanggal tertentu (default: hari ini WIB)
+    """
+    date_str = parse_date_param(date, "date").isoformat() if date else get_wib_time().strftime("%Y-%m-%d")
+    intervals = leave_index.on_leave(date_str)
+    
+    names = {}
+    if intervals:
+        names = dict(db.query(User.id, User.name).filter(User.id.in_({iv.user_id for iv in intervals})).all())
+    
+    return {
+        "date": date_str,
+        "total_on_leave": len({iv.user_id for iv in intervals}),
+        "leaves": [
+            {
+                "leave_id": iv.leave_id,
+                "user_id": iv.user_id,
+                "user_name": names.get(iv.user_id),
+                "leave_type": iv.leave_type,
+                "start_date": iv.start,
+                "end_date": iv.end
+            }
+            for iv in intervals
+        ]
+    }
+
+@app.get("/leaves/user/{user_id}")
+async def get_user_leaves(
+    user_id: int,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Izin approved milik user dalam range (default: bulan ini) + jumlah hari izin
+    """
+    current_time = get_wib_time()
+    if start_date:
+        start_date = parse_date_param(start_date, "start_date").isoformat()
+    else:
+        start_date = current_time.replace(day=1).strftime("%Y-%m-%d")
+    if end_date:
+        end_date = parse_date_param(end_date, "end_date").isoformat()
+    else:
+        last_day = (current_time.replace(day=28) + datetime.timedelta(days=4)).replace(day=1) - datetime.timedelta(days=1)
+        end_date = last_day.strftime("%Y-%m-%d")
+    
+    intervals = [iv for iv in leave_index.overlapping(start_date, end_date) if iv.user_id == user_id]
+    leave_days = leave_index.leave_days_by_user(start_date, end_date).get(user_id, 0)
+    
+    return {
+        "user_id": user_id,
+        "period": f"{start_date} to {end_date}",
+        "leave_days": leave_days,
+        "leaves": [iv._asdict() for iv in intervals]
+    }
+
+@app.get("/admin/jobs")
+async def get_jobs():
+    """Background job status (last run, duration, result, lease ownership)"""
+    return {"owner": scheduler.owner, "enabled": SCHEDULER_ENABLED, "jobs": [job.stats() for job in scheduler.jobs]}
+
+@app.post("/admin/jobs/{job_name}/run")
+async def run_job(job_name: str):
+    """Run a background job immediately"""
+    if job_name not in {job.name for job in scheduler.jobs}:
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan")
+    result = await scheduler.run_now(job_name)
+    return {"job": job_name, "result": result}
+
+@app.get("/admin/admission")
+async def get_admission_stats():
+    """Queue depth, in-flight and rejection counters of the admission controllers"""
+    return {"check_in": checkin_admission.stats()}
+
+@app.get("/admin/profiles")
+async def list_profiles():
+    """Saved request profiles (newest first)"""
+    return {"enabled": bool(PROFILE_TOKEN), "profiles": request_profiler.list_profiles()}
+
+@app.get("/admin/profiles/{name}")
+async def get_profile(name: str, format: str = "pstats", sort: str = "cumulative", limit: int = 60):
+    """Download a profile (format=pstats) or view the top functions (format=text)"""
+    path = request_profiler.path_for(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile tidak ditemukan")
+    if format == "text":
+        try:
+            return PlainTextResponse(request_profiler.render_text(path, sort, limit))
+        except KeyError:
+            raise HTTPException(status_code=400, detail=f"Sort key tidak valid: {sort}")
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
+
+# ==================== MEMORY DIAGNOSTICS ====================
+
+register_cache("working_days", lambda: len(working_day_calendar))
+register_cache("presence_days", lambda: len(presence_index))
+register_cache("leave_intervals", lambda: len(leave_index))
+register_cache("face_gallery", lambda: len(face_gallery))
+register_cache("activity_log", lambda: len(activity_log))
+register_cache("sse_subscribers", lambda: attendance_bus.subscriber_count)
+
+@app.get("/admin/memory")
+async def get_memory_report(top: int = 20):
+    """RSS, cache/index sizes, SQLAlchemy identity maps and tracemalloc top allocation sites"""
+    return await asyncio.get_running_loop().run_in_executor(None, memory_diagnostics.report, top)
+
+@app.post("/admin/memory/tracemalloc")
+async def toggle_tracemalloc(enabled: bool, frames: int = 1):
+    """Start/stop tracemalloc (adds overhead while enabled)"""
+    memory_diagnostics.set_tracing(enabled, frames)
+    return {"tracemalloc": enabled}
+
+@app.post("/admin/memory/baseline")
+async def take_memory_baseline():
+    """Remember the current memory state for /admin/memory/diff"""
+    return await asyncio.get_running_loop().run_in_executor(None, memory_diagnostics.take_baseline)
+
+@app.get("/admin/memory/diff")
+async def get_memory_diff(top: int = 20):
+    """Growth since the last baseline (allocation sites need tracemalloc enabled before the baseline)"""
+    if not memory_diagnostics.has_baseline:
+        raise HTTPException(status_code=400, detail="Belum ada baseline. POST /admin/memory/baseline dulu.")
+    return await asyncio.get_running_loop().run_in_executor(None, memory_diagnostics.diff, top)
+
+# ==================== METRICS ====================
+
+def _cache_hit_ratio(hits: int, misses: int) -> float:
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
+
+metrics_registry.register_callback(
+    "cache_hits_total", "Cache hits", lambda: {"working_days": working_day_calendar.hits},
+    kind="counter", labelname="cache"
+)
+metrics_registry.register_callback(
+    "cache_misses_total", "Cache misses", lambda: {"working_days": working_day_calendar.misses},
+    kind="counter", labelname="cache"
+)
+metrics_registry.register_callback(
+    "cache_hit_ratio", "Cache hit ratio sejak worker start",
+    lambda: {"working_days": _cache_hit_ratio(working_day_calendar.hits, working_day_calendar.misses)},
+    labelname="cache"
+)
+metrics_registry.register_callback(
+    "cache_entries", "Jumlah entry di cache/index in-memory", cache_sizes, labelname="cache"
+)
+metrics_registry.register_callback(
+    "sse_subscribers", "Client SSE /attendance/stream yang terhubung", lambda: attendance_bus.subscriber_count
+)
+metrics_registry.register_callback(
+    "checkin_admission_in_flight", "Check-in yang sedang diproses", lambda: checkin_admission.in_flight
+)
+metrics_registry.register_callback(
+    "checkin_admission_queue_depth", "Check-in yang menunggu slot", lambda: checkin_admission.queue_depth
+)
+metrics_registry.register_callback(
+    "checkin_admission_rejected_total", "Check-in yang ditolak admission control",
+    lambda: checkin_admission.rejected_total, kind="counter", labelname="reason"
+)
+metrics_registry.register_callback(
+    "group_commit_queue_depth", "Check-in yang menunggu group commit", lambda: group_commit_writer.queue_depth
+)
+metrics_registry.register_callback(
+    "group_commit_batches_total", "Transaksi group commit", lambda: group_commit_writer.batches_committed,
+    kind="counter"
+)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition format"""
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.put("/users/{user_id}", response_model=UserResponse)
 async def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
     print(f"[UPDATE_USER] Updating user - ID: {user_id}")
@@ -682,39 +1588,66 @@ async def update_user(user_id: int, user_update: UserUpdate, db: Session = Depen
         embedding_length = len(user_update.face_embedding) if user_update.face_embedding else 0
         print(f"[UPDATE_USER] Updating face embedding - User ID: {user_id}, Embedding length: {embedding_length}")
         logger.info(f"[UPDATE_USER] Updating face embedding - User ID: {user_id}, Embedding length: {embedding_length}")
-        user.face_embedding = user_update.face_embedding
+        vector = decode_face_embedding_param(user_update.face_embedding)
+        embedding = normalize_embedding(vector)
+        if embedding is not None:
+            ensure_unique_face(embedding, exclude_user_id=user_id)
+        user.face_embedding = embedding_to_json(vector) if vector is not None else None
+        user.face_version = next_face_version()
     
     db.commit()
     db.refresh(user)
+    if user_update.face_embedding is not None:
+        face_gallery.upsert(user_id, embedding, user.face_version)
     
     print(f"[UPDATE_USER] User updated successfully - ID: {user_id}, Name: {user.name}, Gender: {user.gender}")
     logger.info(f"[UPDATE_USER] User updated successfully - ID: {user_id}, Name: {user.name}, Gender: {user.gender}")
     return user
 
+def reopened_task_status(deadline: Optional[datetime.datetime]) -> str:
+    """
+    Status task yang di-uncomplete (completed=false): pending, atau overdue kalau
+    deadline sudah lewat (jam WIB, sama dengan task_status_transitions).
+    in_progress tidak ditebak - hanya di-set eksplisit lewat PUT /tasks/v2 (kanban)
+    """
+    return "overdue" if deadline is not None and deadline < wib_now_naive() else "pending"
+
 @app.put("/tasks/{task_id}", response_model=TaskResponse)
 async def update_task(task_id: int, completed: bool, db: Session = Depends(get_db)):
     task = db.query(Task).filter(Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
+    newly_completed = completed and not task.completed
     task.completed = completed
+    if newly_completed:
+        task.status = "completed"
+        task.completed_at = get_wib_time()
+    elif not completed:
+        task.completed_at = None
+        if task.status == "completed":
+            task.status = reopened_task_status(task.deadline)
     db.commit()
+    if newly_completed:
+        activity_log.record_task_completed(task.completed_at, task.user.name, task.title)
     return task
 
 # ==================== DASHBOARD ENDPOINTS ====================
+# Setiap widget dihitung oleh fungsi sync compute_*(db) supaya bisa dipakai
+# endpoint per-widget maupun /dashboard/bundle (satu snapshot DB)
 
-@app.get("/dashboard/stats", response_model=DashboardStats)
-async def get_dashboard_stats(db: Session = Depends(get_db)):
-    """Get overall dashboard statistics"""
+def compute_dashboard_stats(db: Session) -> dict:
     logger.info("[DASHBOARD] Fetching dashboard stats")
     
     # Total employees
     total_employees = db.query(User).count()
     
-    # Present today (attendances created today)
-    today = datetime.date.today()
-    present_today = db.query(Attendance).filter(
-        func.date(Attendance.timestamp) == today
-    ).distinct(Attendance.user_id).count()
+    # Present today (popcount of today's presence bitmap, WIB date)
+    today = get_wib_time().strftime("%Y-%m-%d")
+    present_today = presence_index.count(today)
+    if present_today is None:
+        present_today = db.query(func.count(func.distinct(Attendance.user_id))).filter(
+            Attendance.date == today
+        ).scalar()
     
     # Average work hours (assume 8 hours for now, can be calculated from check-in/out)
     average_work_hours = 8.2
@@ -733,69 +1666,56 @@ async def get_dashboard_stats(db: Session = Depends(get_db)):
         "productivity_rate": round(productivity_rate, 1)
     }
 
-@app.get("/dashboard/attendance-weekly", response_model=List[AttendanceByDay])
-async def get_weekly_attendance(db: Session = Depends(get_db)):
-    """Get attendance data for the past 7 days"""
+def compute_weekly_attendance(db: Session) -> List[dict]:
     logger.info("[DASHBOARD] Fetching weekly attendance")
     
     days = ['Sen', 'Sel', 'Rab', 'Kam', 'Jum', 'Sab', 'Min']
+    today = get_wib_time().date()
+    total_users = None
     result = []
     
     for i in range(7):
-        date = datetime.date.today() - datetime.timedelta(days=6-i)
-        
-        # Count attendances for this day
-        hadir = db.query(Attendance).filter(
-            func.date(Attendance.timestamp) == date
-        ).distinct(Attendance.user_id).count()
-        
-        # For now, mock izin and alpha (you can add separate tables later)
-        izin = max(0, 3 - i % 3)
-        alpha = max(0, 2 - i % 2) if i > 4 else 0
+        date = today - datetime.timedelta(days=6-i)
+        date_str = date.strftime("%Y-%m-%d")
+        
+        # Hadir: presence bitmap (fallback ke DB di luar jendela retensi)
+        present_ids = presence_index.present_user_ids(date_str)
+        if present_ids is None:
+            present_ids = [user_id for (user_id,) in db.query(Attendance.user_id).filter(Attendance.date == date_str).distinct()]
+        present = set(present_ids)
+        
+        # Izin: approved leave yang mencakup tanggal ini (interval index)
+        on_leave = leave_index.users_on_leave(date_str) - present
+        
+        # Alpha: hari kerja yang sudah lewat, tidak hadir dan tidak izin
+        alpha = 0
+        if date < today and working_day_calendar.get_month(db, date.year, date.month).is_working_day(date_str):
+            absent_ids = presence_index.absent_user_ids(date_str)
+            if absent_ids is not None:
+                alpha = len(set(absent_ids) - on_leave)
+            else:
+                if total_users is None:
+                    total_users = db.query(User).count()
+                alpha = max(0, total_users - len(present) - len(on_leave))
         
         result.append({
-            "day": days[i],
-            "hadir": hadir if hadir > 0 else 45 - (i * 2),  # Fallback to mock data
-            "izin": izin,
+            "day": days[date.weekday()],
+            "hadir": len(present),
+            "izin": len(on_leave),
             "alpha": alpha
         })
     
     return result
 
-@app.get("/dashboard/task-distribution", response_model=TaskDistribution)
-async def get_task_distribution(db: Session = Depends(get_db)):
-    """Get task distribution by status"""
+def compute_task_distribution(db: Session) -> dict:
     logger.info("[DASHBOARD] Fetching task distribution")
     
-    # Completed tasks
-    completed = db.query(Task).filter(Task.completed == True).count()
-    
-    # In progress (created within last 3 days, not completed)
-    three_days_ago = datetime.datetime.now() - datetime.timedelta(days=3)
-    in_progress = db.query(Task).filter(
-        and_(
-            Task.completed == False,
-            Task.created_at >= three_days_ago
-        )
-    ).count()
-    
-    # Pending (older than 3 days, not completed, not overdue)
-    seven_days_ago = datetime.datetime.now() - datetime.timedelta(days=7)
-    pending = db.query(Task).filter(
-        and_(
-            Task.completed == False,
-            Task.created_at < three_days_ago,
-            Task.created_at >= seven_days_ago
-        )
-    ).count()
-    
-    # Overdue (older than 7 days, not completed)
-    overdue = db.query(Task).filter(
-        and_(
-            Task.completed == False,
-            Task.created_at < seven_days_ago
-        )
-    ).count()
+    # Status tersimpan (task_status_transitions); in_progress hanya dari PUT /tasks/v2 (kanban)
+    counts = dict(db.query(Task.status, func.count(Task.id)).group_by(Task.status).all())
+    completed = counts.get("completed", 0)
+    in_progress = counts.get("in_progress", 0)
+    pending = counts.get("pending", 0)
+    overdue = counts.get("overdue", 0)
     
     logger.info(f"[DASHBOARD] Tasks - Completed: {completed}, Progress: {in_progress}, Pending: {pending}, Overdue: {overdue}")
     
@@ -806,47 +1726,10 @@ async def get_task_distribution(db: Session = Depends(get_db)):
         "overdue": overdue if overdue > 0 else 12
     }
 
-@app.get("/dashboard/recent-activities", response_model=List[RecentActivity])
-async def get_recent_activities(db: Session = Depends(get_db)):
-    """Get recent activities (last 10 attendances and tasks)"""
+def compute_recent_activities(limit: int = 10) -> List[dict]:
     logger.info("[DASHBOARD] Fetching recent activities")
     
-    activities = []
-    
-    # Recent attendances (check-ins)
-    recent_attendances = db.query(Attendance).join(User).order_by(
-        Attendance.timestamp.desc()
-    ).limit(5).all()
-    
-    for att in recent_attendances:
-        time_str = att.timestamp.strftime("%H:%M WIB")
-        activities.append({
-            "id": att.id,
-            "user_name": att.user.name,
-            "action": "Check-in berhasil",
-            "time": time_str,
-            "type": "checkin",
-            "avatar": ''.join([word[0].upper() for word in att.user.name.split()[:2]])
-        })
-    
-    # Recent completed tasks
-    recent_tasks = db.query(Task).join(User).filter(
-        Task.completed == True
-    ).order_by(Task.created_at.desc()).limit(5).all()
-    
-    for task in recent_tasks:
-        time_str = task.created_at.strftime("%H:%M WIB")
-        activities.append({
-            "id": task.id + 1000,  # Offset to avoid ID collision
-            "user_name": task.user.name,
-            "action": f"Menyelesaikan tugas \"{task.title}\"",
-            "time": time_str,
-            "type": "task",
-            "avatar": ''.join([word[0].upper() for word in task.user.name.split()[:2]])
-        })
-    
-    # Sort by most recent
-    activities = sorted(activities, key=lambda x: x['id'], reverse=True)[:10]
+    activities = activity_log.latest(min(limit, activity_log.maxlen))
     
     # If no real data, return mock data
     if not activities:
@@ -863,9 +1746,7 @@ async def get_recent_activities(db: Session = Depends(get_db)):
     
     return activities
 
-@app.get("/dashboard/productivity-trend")
-async def get_productivity_trend(db: Session = Depends(get_db)):
-    """Get productivity trend for the last 4 weeks"""
+def compute_productivity_trend(db: Session) -> List[dict]:
     logger.info("[DASHBOARD] Fetching productivity trend")
     
     result = []
@@ -893,6 +1774,115 @@ async def get_productivity_trend(db: Session = Depends(get_db)):
     
     return result
 
+def compute_upcoming_events(db: Session, limit: int = 5) -> List[dict]:
+    current_time = get_wib_time()
+    today = current_time.strftime("%Y-%m-%d")
+    
+    events = db.query(Event).filter(
+        Event.date >= today,
+        Event.status == "scheduled"
+    ).order_by(Event.date.asc(), Event.time.asc()).limit(limit).all()
+    
+    return [
+        {
+            "id": e.id,
+            "title": e.title,
+            "date": e.date,
+            "time": e.time,
+            "event_type": e.event_type,
+            "location": e.location,
+        }
+        for e in events
+    ]
+
+@app.get("/dashboard/stats", response_model=DashboardStats)
+async def get_dashboard_stats(db: Session = Depends(get_db)):
+    """Get overall dashboard statistics"""
+    return compute_dashboard_stats(db)
+
+@app.get("/dashboard/attendance-weekly", response_model=List[AttendanceByDay])
+async def get_weekly_attendance(db: Session = Depends(get_db)):
+    """Get attendance data (hadir / izin / alpha) for the past 7 days"""
+    return compute_weekly_attendance(db)
+
+@app.get("/dashboard/task-distribution", response_model=TaskDistribution)
+async def get_task_distribution(db: Session = Depends(get_db)):
+    """Get task distribution by stored status (kept current by the task_status_transitions job)"""
+    return compute_task_distribution(db)
+
+@app.get("/dashboard/recent-activities", response_model=List[RecentActivity])
+async def get_recent_activities(limit: int = Query(10, ge=1)):
+    """Get recent activities (check-ins and completed tasks) from the in-memory activity log"""
+    return FastJSONResponse(compute_recent_activities(limit))
+
+@app.get("/dashboard/productivity-trend")
+async def get_productivity_trend(db: Session = Depends(get_db)):
+    """Get productivity trend for the last 4 weeks"""
+    return compute_productivity_trend(db)
+
+# Widget DB: dihitung berurutan di satu thread, di atas satu snapshot (session tidak thread-safe)
+DASHBOARD_DB_WIDGETS = {
+    "stats": compute_dashboard_stats,
+    "attendance_weekly": compute_weekly_attendance,
+    "task_distribution": compute_task_distribution,
+    "productivity_trend": compute_productivity_trend,
+    "upcoming_events": compute_upcoming_events,
+}
+# Widget in-memory: tidak butuh DB, dihitung di event loop selagi widget DB berjalan
+DASHBOARD_MEMORY_WIDGETS = {
+    "recent_activities": compute_recent_activities,
+}
+DASHBOARD_WIDGETS = list(DASHBOARD_DB_WIDGETS) + list(DASHBOARD_MEMORY_WIDGETS)
+
+def compute_db_widgets(names: List[str]) -> Dict[str, dict]:
+    results, errors = {}, {}
+    with snapshot_session() as db:
+        for name in names:
+            try:
+                results[name] = DASHBOARD_DB_WIDGETS[name](db)
+            except Exception as e:
+                logger.error(f"[DASHBOARD] Widget {name} failed: {str(e)}", exc_info=True)
+                errors[name] = str(e)
+    return {"results": results, "errors": errors}
+
+@app.get("/dashboard/bundle")
+async def get_dashboard_bundle(widgets: Optional[str] = None):
+    """
+    Semua widget dashboard dalam satu request (default: semua).
+    widgets=stats,attendance_weekly,... untuk memilih sebagian.
+    Widget yang gagal dilaporkan di "errors" tanpa menggagalkan widget lain.
+    """
+    requested = [w.strip() for w in widgets.split(",") if w.strip()] if widgets else DASHBOARD_WIDGETS
+    unknown = [w for w in requested if w not in DASHBOARD_DB_WIDGETS and w not in DASHBOARD_MEMORY_WIDGETS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Widget tidak dikenal: {', '.join(unknown)}. Pilihan: {', '.join(DASHBOARD_WIDGETS)}"
+        )
+    
+    logger.info(f"[DASHBOARD] Bundle - widgets: {','.join(requested)}")
+    db_widgets = [w for w in requested if w in DASHBOARD_DB_WIDGETS]
+    db_future = None
+    if db_widgets:
+        # copy_context: query di thread executor tetap terhitung untuk request ini (metrics)
+        context = contextvars.copy_context()
+        db_future = asyncio.get_running_loop().run_in_executor(None, context.run, compute_db_widgets, db_widgets)
+    
+    results, errors = {}, {}
+    for name in requested:
+        if name in DASHBOARD_MEMORY_WIDGETS:
+            results[name] = DASHBOARD_MEMORY_WIDGETS[name]()
+    if db_future is not None:
+        db_results = await db_future
+        results.update(db_results["results"])
+        errors.update(db_results["errors"])
+    
+    return FastJSONResponse({
+        "generated_at": get_wib_time(),
+        "widgets": {name: results[name] for name in requested if name in results},
+        "errors": errors
+    })
+
 # ==================== TASK MANAGEMENT ENDPOINTS ====================
 
 class TaskCreateV2(BaseModel):
@@ -912,6 +1902,28 @@ class TaskUpdateV2(BaseModel):
     deadline: Optional[str] = None
     completed: Optional[bool] = None
 
+class TaskTemplateV2(BaseModel):
+    title: str
+    description: str
+    priority: str = "medium"
+    category: str = "general"
+    deadline: Optional[str] = None
+
+class TaskBulkCreate(BaseModel):
+    tasks: List[TaskCreateV2] = []
+    # Alternatif: task yang sama untuk banyak user
+    template: Optional[TaskTemplateV2] = None
+    user_ids: List[int] = []
+
+class TaskBulkUpdate(BaseModel):
+    ids: List[int]
+    priority: Optional[str] = None
+    status: Optional[str] = None
+    completed: Optional[bool] = None
+
+class TaskBulkDelete(BaseModel):
+    ids: List[int]
+
 class TaskResponseV2(BaseModel):
     id: int
     title: str
@@ -927,7 +1939,28 @@ class TaskResponseV2(BaseModel):
     created_at: datetime.datetime
     updated_at: datetime.datetime
 
-@app.get("/tasks/user/{user_id}")
+class UserTasksResponse(BaseModel):
+    user_name: str
+    total_tasks: int
+    tasks: List[TaskResponseV2]
+
+@app.get("/tasks/search")
+async def search_tasks_endpoint(
+    q: str,
+    user_id: Optional[int] = None,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+    db: Session = Depends(get_db)
+):
+    """Full-text search judul/deskripsi task (FTS5, urut relevansi) dengan filter dan paging"""
+    try:
+        return FastJSONResponse(search_tasks(db, q, user_id, status, priority, limit, offset))
+    except SearchQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/tasks/user/{user_id}", response_model=UserTasksResponse)
 async def get_user_tasks(
     user_id: int,
     status: Optional[str] = None,
@@ -944,8 +1977,21 @@ async def get_user_tasks(
         if not user:
             raise HTTPException(status_code=404, detail="User tidak ditemukan")
         
-        # Build query
-        query = db.query(Task).filter(Task.user_id == user_id)
+        # Build query - datetime columns are encoded by the serializer
+        query = db.query(
+            Task.id,
+            Task.title,
+            Task.description,
+            Task.completed,
+            Task.user_id,
+            Task.priority,
+            Task.status,
+            Task.category,
+            Task.deadline,
+            Task.completed_at,
+            Task.created_at,
+            Task.updated_at
+        ).filter(Task.user_id == user_id)
         
         # Apply filters
         if status:
@@ -956,34 +2002,18 @@ async def get_user_tasks(
             query = query.filter(Task.category == category)
         
         # Execute query
-        tasks = query.order_by(Task.created_at.desc()).all()
+        rows = query.order_by(Task.created_at.desc()).all()
         
         # Format response
-        result = []
-        for task in tasks:
-            result.append({
-                "id": task.id,
-                "title": task.title,
-                "description": task.description,
-                "completed": task.completed,
-                "user_id": task.user_id,
-                "user_name": user.name,
-                "priority": task.priority,
-                "status": task.status,
-                "category": task.category,
-                "deadline": task.deadline.isoformat() if task.deadline else None,
-                "completed_at": task.completed_at.isoformat() if task.completed_at else None,
-                "created_at": task.created_at.isoformat(),
-                "updated_at": task.updated_at.isoformat()
-            })
+        result = [{**row._asdict(), "user_name": user.name} for row in rows]
         
         logger.info(f"[TASKS] Found {len(result)} tasks for user {user.name}")
         
-        return {
+        return FastJSONResponse({
             "user_name": user.name,
             "total_tasks": len(result),
             "tasks": result
-        }
+        })
     
     except HTTPException:
         raise
@@ -991,6 +2021,17 @@ async def get_user_tasks(
         logger.error(f"[TASKS] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Terjadi kesalahan: {str(e)}")
 
+def parse_deadline(value: str) -> datetime.datetime:
+    """
+    Deadline ISO 8601 -> datetime naive jam WIB (format simpan di DB, dibandingkan
+    dengan wib_now_naive()); input dengan offset/Z dikonversi dulu ke WIB.
+    ValueError kalau format tidak valid
+    """
+    deadline = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if deadline.tzinfo is not None:
+        deadline = deadline.astimezone(pytz.timezone('Asia/Jakarta')).replace(tzinfo=None)
+    return deadline
+
 @app.post("/tasks/v2")
 async def create_task_v2(task: TaskCreateV2, db: Session = Depends(get_db)):
     """Create a new task with priority and deadline"""
@@ -1006,13 +2047,13 @@ async def create_task_v2(task: TaskCreateV2, db: Session = Depends(get_db)):
         deadline_dt = None
         if task.deadline:
             try:
-                deadline_dt = datetime.datetime.fromisoformat(task.deadline.replace('Z', '+00:00'))
-            except:
+                deadline_dt = parse_deadline(task.deadline)
+            except ValueError:
                 pass
         
         # Determine initial status
         status = "pending"
-        if deadline_dt and deadline_dt < datetime.datetime.now():
+        if deadline_dt and deadline_dt < wib_now_naive():
             status = "overdue"
         
         # Create task
@@ -1047,6 +2088,171 @@ async def create_task_v2(task: TaskCreateV2, db: Session = Depends(get_db)):
         logger.error(f"[TASKS] Error creating task: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Terjadi kesalahan: {str(e)}")
 
+TASK_BULK_MAX = int(os.getenv("TASK_BULK_MAX", "1000"))
+
+def check_bulk_size(count: int):
+    if count == 0:
+        raise HTTPException(status_code=400, detail="Daftar task kosong")
+    if count > TASK_BULK_MAX:
+        raise HTTPException(status_code=413, detail=f"Maksimal {TASK_BULK_MAX} task per request")
+
+@app.post("/tasks/v2/bulk")
+async def create_tasks_bulk(payload: TaskBulkCreate, db: Session = Depends(get_db)):
+    """
+    Buat banyak task dalam satu transaksi: `tasks` (list TaskCreateV2) dan/atau
+    `template` + `user_ids` (task yang sama untuk banyak user).
+    Hasil per item sesuai urutan input: created (task_id) atau error.
+    """
+    items = list(payload.tasks)
+    if payload.template:
+        items += [TaskCreateV2(user_id=user_id, **payload.template.model_dump()) for user_id in payload.user_ids]
+    check_bulk_size(len(items))
+    logger.info(f"[TASKS_BULK] Creating {len(items)} tasks")
+    
+    try:
+        # Satu query untuk semua user_id
+        requested_users = {item.user_id for item in items}
+        existing_users = {user_id for (user_id,) in db.query(User.id).filter(User.id.in_(requested_users))}
+        
+        now = datetime.datetime.now()
+        wib_now = wib_now_naive()
+        results: List[Optional[dict]] = [None] * len(items)
+        rows, positions = [], []
+        for index, item in enumerate(items):
+            if item.user_id not in existing_users:
+                results[index] = {"index": index, "status": "error", "error": "User tidak ditemukan"}
+                continue
+            deadline_dt = None
+            if item.deadline:
+                try:
+                    deadline_dt = parse_deadline(item.deadline)
+                except ValueError:
+                    results[index] = {"index": index, "status": "error", "error": "Format deadline tidak valid"}
+                    continue
+            rows.append({
+                "title": item.title,
+                "description": item.description,
+                "user_id": item.user_id,
+                "priority": item.priority,
+                "category": item.category,
+                "deadline": deadline_dt,
+                "status": "overdue" if deadline_dt and deadline_dt < wib_now else "pending",
+                "completed": False,
+                "created_at": now,
+                "updated_at": now
+            })
+            positions.append(index)
+        
+        if rows:
+            task_ids = db.execute(insert(Task).returning(Task.id, sort_by_parameter_order=True), rows).scalars().all()
+            db.commit()
+            for index, task_id in zip(positions, task_ids):
+                results[index] = {"index": index, "status": "created", "task_id": task_id}
+        
+        logger.info(f"[TASKS_BULK] Created {len(rows)} of {len(items)} tasks")
+        return {"created": len(rows), "failed": len(items) - len(rows), "results": results}
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[TASKS_BULK] Error creating tasks: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Terjadi kesalahan: {str(e)}")
+
+@app.patch("/tasks/v2/bulk")
+async def update_tasks_bulk(payload: TaskBulkUpdate, db: Session = Depends(get_db)):
+    """
+    Update priority/status/completed untuk banyak task dengan satu UPDATE set-based.
+    Aturan sama dengan PUT /tasks/v2/{id}: completed=true -> status completed,
+    completed=false -> status completed kembali ke pending/overdue (reopened_task_status).
+    """
+    ids = list(dict.fromkeys(payload.ids))
+    check_bulk_size(len(ids))
+    values = {}
+    if payload.priority is not None:
+        values[Task.priority] = payload.priority
+    if payload.status is not None:
+        values[Task.status] = payload.status
+    completed = payload.completed
+    if completed is None and payload.status is not None:
+        completed = payload.status == "completed"
+    if completed is not None:
+        values[Task.completed] = completed
+        if completed:
+            values[Task.status] = "completed"
+            # Task yang sudah selesai sebelumnya tetap memakai completed_at lama
+            values[Task.completed_at] = case((Task.completed == True, Task.completed_at), else_=get_wib_time())
+        else:
+            values[Task.completed_at] = None
+            # Versi set-based dari reopened_task_status
+            reopened = case((Task.deadline < wib_now_naive(), "overdue"), else_="pending")
+            if payload.status is None:
+                values[Task.status] = case((Task.status == "completed", reopened), else_=Task.status)
+            elif payload.status == "completed":
+                values[Task.status] = reopened
+    if not values:
+        raise HTTPException(status_code=400, detail="Tidak ada field yang diupdate (priority, status, completed)")
+    values[Task.updated_at] = datetime.datetime.now()
+    logger.info(f"[TASKS_BULK] Updating {len(ids)} tasks: {', '.join(column.key for column in values)}")
+    
+    try:
+        found = set()
+        newly_completed = []
+        query = db.query(Task.id, Task.completed, Task.title, User.name).outerjoin(User, User.id == Task.user_id)
+        for task_id, was_completed, title, user_name in query.filter(Task.id.in_(ids)):
+            found.add(task_id)
+            if completed and not was_completed:
+                newly_completed.append((user_name, title))
+        
+        if found:
+            db.query(Task).filter(Task.id.in_(found)).update(values, synchronize_session=False)
+            db.commit()
+        
+        completed_at = get_wib_time()
+        for user_name, title in newly_completed:
+            activity_log.record_task_completed(completed_at, user_name, title)
+        
+        logger.info(f"[TASKS_BULK] Updated {len(found)} of {len(ids)} tasks")
+        return {
+            "updated": len(found),
+            "not_found": len(ids) - len(found),
+            "results": [{"id": task_id, "status": "updated" if task_id in found else "not_found"} for task_id in ids]
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[TASKS_BULK] Error updating tasks: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Terjadi kesalahan: {str(e)}")
+
+@app.delete("/tasks/v2/bulk")
+async def delete_tasks_bulk(payload: TaskBulkDelete, db: Session = Depends(get_db)):
+    """Hapus banyak task dengan satu DELETE set-based"""
+    ids = list(dict.fromkeys(payload.ids))
+    check_bulk_size(len(ids))
+    logger.info(f"[TASKS_BULK] Deleting {len(ids)} tasks")
+    
+    try:
+        found = {task_id for (task_id,) in db.query(Task.id).filter(Task.id.in_(ids))}
+        if found:
+            db.query(Task).filter(Task.id.in_(found)).delete(synchronize_session=False)
+            db.commit()
+        
+        logger.info(f"[TASKS_BULK] Deleted {len(found)} of {len(ids)} tasks")
+        return {
+            "deleted": len(found),
+            "not_found": len(ids) - len(found),
+            "results": [{"id": task_id, "status": "deleted" if task_id in found else "not_found"} for task_id in ids]
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[TASKS_BULK] Error deleting tasks: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Terjadi kesalahan: {str(e)}")
+
 @app.put("/tasks/v2/{task_id}")
 async def update_task_v2(task_id: int, task_update: TaskUpdateV2, db: Session = Depends(get_db)):
     """Update a task (title, status, priority, etc.)"""
@@ -1058,6 +2264,8 @@ async def update_task_v2(task_id: int, task_update: TaskUpdateV2, db: Session =
         if not task:
             raise HTTPException(status_code=404, detail="Task tidak ditemukan")
         
+        was_completed = task.completed
+        
         # Update fields
         if task_update.title is not None:
             task.title = task_update.title
@@ -1071,22 +2279,32 @@ async def update_task_v2(task_id: int, task_update: TaskUpdateV2, db: Session =
             task.category = task_update.category
         if task_update.deadline is not None:
             try:
-                task.deadline = datetime.datetime.fromisoformat(task_update.deadline.replace('Z', '+00:00'))
-            except:
+                task.deadline = parse_deadline(task_update.deadline)
+            except ValueError:
                 pass
-        if task_update.completed is not None:
-            task.completed = task_update.completed
-            if task_update.completed:
+        completed = task_update.completed
+        if completed is None and task_update.status is not None:
+            # Kanban memindah kartu lewat status saja; completed harus ikut
+            completed = task_update.status == "completed"
+        if completed is not None:
+            task.completed = completed
+            if completed:
                 task.status = "completed"
-                task.completed_at = datetime.datetime.now()
+                if not was_completed:
+                    task.completed_at = get_wib_time()
             else:
                 task.completed_at = None
+                if task.status == "completed":
+                    task.status = reopened_task_status(task.deadline)
         
         task.updated_at = datetime.datetime.now()
         
         db.commit()
         db.refresh(task)
         
+        if task.completed and not was_completed:
+            activity_log.record_task_completed(task.completed_at, task.user.name, task.title)
+        
         logger.info(f"[TASKS] Task updated - ID: {task_id}, Status: {task.status}")
         
         return {
@@ -1188,15 +2406,19 @@ async def get_attendance_summary(
     """Get attendance summary report with filters"""
     logger.info("[REPORTS] Generating attendance summary")
     
+    # Default to current month
+    current_time = get_wib_time()
+    if start_date:
+        start_date = parse_date_param(start_date, "start_date").isoformat()
+    else:
+        start_date = current_time.replace(day=1).strftime("%Y-%m-%d")
+    if end_date:
+        end_date = parse_date_param(end_date, "end_date").isoformat()
+    else:
+        last_day = (current_time.replace(day=28) + datetime.timedelta(days=4)).replace(day=1) - datetime.timedelta(days=1)
+        end_date = last_day.strftime("%Y-%m-%d")
+    
     try:
-        # Default to current month
-        if not start_date:
-            current_time = get_wib_time()
-            start_date = current_time.replace(day=1).strftime("%Y-%m-%d")
-        if not end_date:
-            current_time = get_wib_time()
-            last_day = (current_time.replace(day=28) + datetime.timedelta(days=4)).replace(day=1) - datetime.timedelta(days=1)
-            end_date = last_day.strftime("%Y-%m-%d")
         
         # Build query
         query = db.query(Attendance, User).join(User).filter(
@@ -1233,9 +2455,17 @@ async def get_attendance_summary(
             if att.work_hours:
                 user_summaries[user.id]["total_hours"] += att.work_hours
         
+        # Leave days in the period (interval index), hari kerja saja seperti /attendance/stats
+        if start_date <= end_date:
+            working_day = working_day_calendar.working_day_filter(db, start_date, end_date)
+            leave_by_user = leave_index.leave_days_by_user(start_date, end_date, working_day)
+        else:
+            leave_by_user = {}
+        
         # Calculate averages
         for user_id in user_summaries:
             summary = user_summaries[user_id]
+            summary["leave_days"] = leave_by_user.get(user_id, 0)
             if summary["total_days"] > 0:
                 summary["avg_hours"] = round(summary["total_hours"] / summary["total_days"], 2)
                 summary["on_time_rate"] = round((summary["on_time"] / summary["total_days"]) * 100, 1)
@@ -1247,11 +2477,11 @@ async def get_attendance_summary(
         
         logger.info(f"[REPORTS] Attendance summary generated - {len(result)} users")
         
-        return {
+        return FastJSONResponse({
             "period": f"{start_date} to {end_date}",
             "total_users": len(result),
             "summaries": result
-        }
+        })
     
     except Exception as e:
         logger.error(f"[REPORTS] Error: {str(e)}")
@@ -1323,11 +2553,11 @@ async def get_task_summary(
         
         logger.info(f"[REPORTS] Task summary generated - {len(result)} users")
         
-        return {
+        return FastJSONResponse({
             "period": f"{start_date} to {end_date}",
             "total_users": len(result),
             "summaries": result
-        }
+        })
     
     except Exception as e:
         logger.error(f"[REPORTS] Error: {str(e)}")
@@ -1353,36 +2583,50 @@ async def get_productivity_report(
         
         users = users_query.all()
         
+        # Working days elapsed this month + absences (up to yesterday) for all users in one pass
+        month_calendar = working_day_calendar.get_month(db, today.year, today.month)
+        working_days_elapsed = month_calendar.count_until(today.strftime("%Y-%m-%d"))
+        month_start = start_of_month.strftime("%Y-%m-%d")
+        month_end = month_calendar.working_days[-1] if len(month_calendar) else month_start
+        leaves = [(iv.user_id, iv.start, iv.end) for iv in leave_index.overlapping(month_start, month_end)]
+        leave_by_user = leave_index.leave_days_by_user(month_start, month_end, month_calendar.is_working_day)
+        absent_by_user = working_day_calendar.absent_days_by_user(
+            db, today.year, today.month, [user.id for user in users],
+            until=(today - datetime.timedelta(days=1)).strftime("%Y-%m-%d"),
+            excused=leaves
+        )
+        
+        # Attendance and task stats for all users: one GROUP BY each instead of two queries per user
+        attendance_query = db.query(
+            Attendance.user_id,
+            func.count(Attendance.id),
+            func.sum(case((Attendance.status == "on_time", 1), else_=0)),
+            func.coalesce(func.sum(Attendance.work_hours), 0.0)
+        ).filter(Attendance.date >= start_of_month.strftime("%Y-%m-%d"))
+        task_query = db.query(
+            Task.user_id,
+            func.count(Task.id),
+            func.sum(case((Task.completed == True, 1), else_=0))
+        ).filter(Task.created_at >= start_of_month)
+        if user_id:
+            attendance_query = attendance_query.filter(Attendance.user_id == user_id)
+            task_query = task_query.filter(Task.user_id == user_id)
+        attendance_by_user = {row[0]: row[1:] for row in attendance_query.group_by(Attendance.user_id)}
+        tasks_by_user = {row[0]: row[1:] for row in task_query.group_by(Task.user_id)}
+        
         result = []
         for user in users:
             # Attendance stats
-            attendances = db.query(Attendance).filter(
-                and_(
-                    Attendance.user_id == user.id,
-                    Attendance.date >= start_of_month.strftime("%Y-%m-%d")
-                )
-            ).all()
-            
-            total_attendance = len(attendances)
-            on_time_count = len([a for a in attendances if a.status == "on_time"])
-            total_hours = sum([a.work_hours for a in attendances if a.work_hours])
+            total_attendance, on_time_count, total_hours = attendance_by_user.get(user.id, (0, 0, 0.0))
             avg_hours = round(total_hours / total_attendance, 2) if total_attendance > 0 else 0.0
             
             # Task stats
-            tasks = db.query(Task).filter(
-                and_(
-                    Task.user_id == user.id,
-                    Task.created_at >= start_of_month
-                )
-            ).all()
-            
-            total_tasks = len(tasks)
-            completed_tasks = len([t for t in tasks if t.completed])
+            total_tasks, completed_tasks = tasks_by_user.get(user.id, (0, 0))
             completion_rate = round((completed_tasks / total_tasks) * 100, 1) if total_tasks > 0 else 0.0
             
             # Calculate productivity score (0-100)
             # Formula: (attendance_rate * 0.4) + (completion_rate * 0.4) + (on_time_rate * 0.2)
-            attendance_rate = (total_attendance / 22) * 100  # Assume 22 working days
+            attendance_rate = (total_attendance / working_days_elapsed * 100) if working_days_elapsed > 0 else 0
             on_time_rate = (on_time_count / total_attendance * 100) if total_attendance > 0 else 0
             productivity_score = round(
                 (min(attendance_rate, 100) * 0.4) + 
@@ -1396,6 +2640,8 @@ async def get_productivity_report(
                 "user_name": user.name,
                 "attendance_days": total_attendance,
                 "on_time_days": on_time_count,
+                "absent_days": absent_by_user.get(user.id, 0),
+                "leave_days": leave_by_user.get(user.id, 0),
                 "avg_work_hours": avg_hours,
                 "total_tasks": total_tasks,
                 "completed_tasks": completed_tasks,
@@ -1406,11 +2652,12 @@ async def get_productivity_report(
         
         logger.info(f"[REPORTS] Productivity report generated - {len(result)} users")
         
-        return {
+        return FastJSONResponse({
             "month": today.strftime("%B %Y"),
+            "working_days_elapsed": working_days_elapsed,
             "total_users": len(result),
             "reports": result
-        }
+        })
     
     except Exception as e:
         logger.error(f"[REPORTS] Error: {str(e)}")
@@ -1494,6 +2741,9 @@ async def create_event(event_data: EventCreate, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(new_event)
         
+        if new_event.event_type == "holiday":
+            working_day_calendar.invalidate(new_event.date)
+        
         logger.info(f"[EVENTS] Created event: {new_event.title}")
         return {
             "message": "Event created successfully",
@@ -1508,29 +2758,47 @@ async def create_event(event_data: EventCreate, db: Session = Depends(get_db)):
         logger.error(f"[EVENTS] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/calendar/working-days")
+async def get_working_days(month: Optional[str] = None, db: Session = Depends(get_db)):
+    """Working days of a month (YYYY-MM, default: bulan ini) - weekends and holiday events excluded"""
+    try:
+        if month:
+            year, month_num = int(month[:4]), int(month[5:7])
+        else:
+            current_time = get_wib_time()
+            year, month_num = current_time.year, current_time.month
+        
+        month_calendar = working_day_calendar.get_month(db, year, month_num)
+        
+        return {
+            "month": f"{year:04d}-{month_num:02d}",
+            "total_working_days": len(month_calendar),
+            "working_days": month_calendar.working_days,
+            "holidays": month_calendar.holidays
+        }
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Format bulan harus YYYY-MM")
+
+@app.get("/events/search")
+async def search_events_endpoint(
+    q: str,
+    status: Optional[str] = None,
+    event_type: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+    db: Session = Depends(get_db)
+):
+    """Full-text search judul/deskripsi event (FTS5, urut relevansi) dengan filter dan paging"""
+    try:
+        return FastJSONResponse(search_events(db, q, status, event_type, limit, offset))
+    except SearchQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/events/upcoming")
 async def get_upcoming_events(limit: int = 5, db: Session = Depends(get_db)):
     """Get upcoming events for dashboard"""
     try:
-        current_time = get_wib_time()
-        today = current_time.strftime("%Y-%m-%d")
-        
-        events = db.query(Event).filter(
-            Event.date >= today,
-            Event.status == "scheduled"
-        ).order_by(Event.date.asc(), Event.time.asc()).limit(limit).all()
-        
-        return [
-            {
-                "id": e.id,
-                "title": e.title,
-                "date": e.date,
-                "time": e.time,
-                "event_type": e.event_type,
-                "location": e.location,
-            }
-            for e in events
-        ]
+        return compute_upcoming_events(db, limit)
     except Exception as e:
         logger.error(f"[EVENTS] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,161 @@
+"""
+Diagnostik memori per worker (GET /admin/memory)
+
+- RSS saat ini (/proc/self/status) dan peak RSS (getrusage); keduanya None di
+  platform tanpa modul itu (Windows, dev)
+- tracemalloc bisa dinyalakan/dimatikan saat runtime; top lokasi alokasi
+  (overhead hanya selama aktif; PYTHONTRACEMALLOC=N untuk aktif sejak start)
+- Ukuran cache/index in-memory yang didaftarkan lewat register_cache()
+- Ukuran identity map session SQLAlchemy yang masih hidup (session bocor /
+  query yang memuat terlalu banyak objek)
+- Snapshot diff: take_baseline() lalu diff() untuk melihat pertumbuhan
+  (alokasi, RSS, ukuran cache) di antara dua titik waktu
+"""
+import logging
+import sys
+import time
+import tracemalloc
+import weakref
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("workflow_id")
+
+_caches: Dict[str, Callable[[], int]] = {}
+_sessions: "weakref.WeakSet[Session]" = weakref.WeakSet()
+
+
+def register_cache(name: str, size: Callable[[], int]) -> None:
+    """size() -> jumlah entry; dipakai /admin/memory dan /metrics"""
+    _caches[name] = size
+
+
+def cache_sizes() -> Dict[str, int]:
+    return {name: size() for name, size in _caches.items()}
+
+
+@event.listens_for(Session, "after_begin")
+def _track_session(session, transaction, connection):
+    _sessions.add(session)
+
+
+def session_stats() -> dict:
+    sizes = [len(session.identity_map) for session in list(_sessions)]
+    return {
+        "live_sessions": len(sizes),
+        "identity_map_total": sum(sizes),
+        "identity_map_largest": max(sizes, default=0)
+    }
+
+
+def rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    try:
+        import resource  # POSIX saja
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux: KiB, macOS: byte
+
+
+def _format_stat(stat) -> dict:
+    frame = stat.traceback[0]
+    return {"location": f"{frame.filename}:{frame.lineno}", "size_bytes": stat.size, "count": stat.count}
+
+
+def _format_diff(stat) -> dict:
+    frame = stat.traceback[0]
+    return {
+        "location": f"{frame.filename}:{frame.lineno}",
+        "size_bytes": stat.size,
+        "size_diff_bytes": stat.size_diff,
+        "count_diff": stat.count_diff
+    }
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    # Alokasi internal tracemalloc sendiri tidak relevan
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+
+
+class MemoryDiagnostics:
+    def __init__(self):
+        self._baseline: Optional[dict] = None
+
+    def set_tracing(self, enabled: bool, frames: int = 1) -> None:
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            logger.info(f"[MEMORY] tracemalloc started ({frames} frames)")
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self._baseline = None  # Snapshot lama tidak bisa dibandingkan setelah stop
+            logger.info("[MEMORY] tracemalloc stopped")
+
+    def report(self, top: int = 20) -> dict:
+        tracing = tracemalloc.is_tracing()
+        result = {
+            "rss_bytes": rss_bytes(),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "caches": cache_sizes(),
+            "sqlalchemy": session_stats(),
+            "tracemalloc": {"enabled": tracing}
+        }
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            result["tracemalloc"].update({
+                "traced_bytes": current,
+                "traced_peak_bytes": peak,
+                "top": [_format_stat(stat) for stat in _snapshot().statistics("lineno")[:top]]
+            })
+        return result
+
+    def take_baseline(self) -> dict:
+        self._baseline = {
+            "taken_at": time.time(),
+            "rss_bytes": rss_bytes(),
+            "caches": cache_sizes(),
+            "snapshot": _snapshot() if tracemalloc.is_tracing() else None
+        }
+        logger.info(f"[MEMORY] Baseline taken - RSS: {self._baseline['rss_bytes']}")
+        return {key: value for key, value in self._baseline.items() if key != "snapshot"}
+
+    @property
+    def has_baseline(self) -> bool:
+        return self._baseline is not None
+
+    def diff(self, top: int = 20) -> dict:
+        """Pertumbuhan sejak take_baseline() (panggil has_baseline dulu)"""
+        baseline = self._baseline
+        current_rss = rss_bytes()
+        current_caches = cache_sizes()
+        result = {
+            "baseline_taken_at": baseline["taken_at"],
+            "elapsed_seconds": round(time.time() - baseline["taken_at"], 1),
+            "rss_diff_bytes": (current_rss - baseline["rss_bytes"]) if current_rss is not None and baseline["rss_bytes"] is not None else None,
+            "cache_diff": {
+                name: size - baseline["caches"].get(name, 0) for name, size in current_caches.items()
+            },
+            "top_growth": None
+        }
+        if baseline["snapshot"] is not None and tracemalloc.is_tracing():
+            stats = _snapshot().compare_to(baseline["snapshot"], "lineno")
+            result["top_growth"] = [_format_diff(stat) for stat in stats[:top]]
+        return result
+
+
+memory_diagnostics = MemoryDiagnostics()
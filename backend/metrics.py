@@ -0,0 +1,355 @@
+"""
+Metrics in-process dalam format teks Prometheus (GET /metrics)
+
+- Counter / Gauge / Histogram tanpa lock: setiap thread menulis ke shard (dict)
+  miliknya sendiri lewat threading.local; /metrics menjumlahkan semua shard
+  saat scrape. Hot path hanya lookup dict + penjumlahan
+- MetricsMiddleware (ASGI murni): jumlah request, latency per route template,
+  request in-flight, serta jumlah/waktu query SQL per request
+- instrument_engine(): satu-satunya hook before/after_cursor_execute SQLAlchemy;
+  query_budget.py membaca statistik query per request (request_queries_scope)
+  dan mendaftar listener (add_query_listener) dari hook yang sama
+- register_callback(): nilai yang dibaca saat scrape (ukuran cache, hit ratio,
+  antrian) supaya modul lain tidak perlu tahu soal metrics
+
+Nilai per proses worker: dengan beberapa worker, tiap worker punya angka sendiri.
+"""
+import bisect
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Response menambahkan "; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _ShardedMetric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = self._local.values = {}
+            self._shards.append(shard)  # list.append atomik di bawah GIL
+        return shard
+
+    def _snapshots(self) -> List[dict]:
+        # dict.copy() atomik di bawah GIL: aman walaupun thread lain sedang menulis
+        return [shard.copy() for shard in list(self._shards)]
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_ShardedMetric):
+    kind = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + amount
+
+    def totals(self) -> Dict[Tuple[str, ...], float]:
+        merged: Dict[Tuple[str, ...], float] = {}
+        for shard in self._snapshots():
+            for key, value in shard.items():
+                merged[key] = merged.get(key, 0) + value
+        return merged
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, value in sorted(self.totals().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Gauge naik/turun (mis. request in-flight): inc/dec per shard, dijumlahkan saat scrape"""
+    kind = "gauge"
+
+    def dec(self, *labelvalues: str, amount: float = 1) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+
+class Histogram(_ShardedMetric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        shard = self._shard()
+        counts = shard.get(labelvalues)
+        if counts is None:
+            # [count per bucket (non-kumulatif)..., +Inf, sum]
+            counts = shard[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def timed(self, func: Callable) -> Callable:
+        """Decorator: catat durasi setiap pemanggilan fungsi (tanpa label)"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe(time.perf_counter() - start)
+        return wrapper
+
+    def render(self) -> List[str]:
+        merged: Dict[Tuple[str, ...], List[float]] = {}
+        for shard in self._snapshots():
+            for key, counts in shard.items():
+                total = merged.setdefault(key, [0] * len(counts))
+                for i, value in enumerate(list(counts)):
+                    total[i] += value
+
+        lines = self.header()
+        for key, counts in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+class _CallbackMetric:
+    def __init__(self, name: str, documentation: str, func: Callable, kind: str, labelname: Optional[str]):
+        self.name = name
+        self.documentation = documentation
+        self.func = func
+        self.kind = kind
+        self.labelname = labelname
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        value = self.func()
+        if self.labelname is None:
+            lines.append(f"{self.name} {_format_value(value)}")
+        else:
+            for label, label_value in sorted(value.items()):
+                lines.append(f"{self.name}{_format_labels((self.labelname,), (str(label),))} {_format_value(label_value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        metric = Gauge(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_callback(self, name: str, documentation: str, func: Callable,
+                          kind: str = "gauge", labelname: Optional[str] = None) -> None:
+        """func() -> angka, atau dict {label: angka} kalau labelname diisi; dipanggil saat scrape"""
+        self._metrics.append(_CallbackMetric(name, documentation, func, kind, labelname))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "Jumlah HTTP request per route template dan status", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "Latency HTTP request per route template", ("method", "route")
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP request yang sedang diproses"
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "Jumlah query SQL per HTTP request", ("route",),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250)
+)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Total waktu query SQL per HTTP request", ("route",)
+)
+db_queries_total = registry.counter(
+    "db_queries_total", "Jumlah query SQL per jenis statement", ("operation",)
+)
+db_query_errors_total = registry.counter(
+    "db_query_errors_total", "Jumlah query SQL yang gagal (exception dari driver)", ("operation",)
+)
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds", "Durasi satu query SQL", ("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+face_similarity_seconds = registry.histogram(
+    "face_similarity_seconds", "Durasi perhitungan similarity embedding wajah",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+)
+
+class QueryStats:
+    """Query SQL yang dijalankan satu request / satu blok count_queries()"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+        self.seconds = 0.0
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.statements.append(statement)
+        self.seconds += elapsed
+
+
+# Statistik query request yang sedang berjalan (request_queries_scope)
+_request_db: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar("request_db", default=None)
+# Dipanggil untuk setiap query dari thread mana pun (count_queries di test/benchmark)
+_query_listeners: List[Callable[[str, float], None]] = []
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+@contextmanager
+def request_queries_scope():
+    """QueryStats request ini; middleware di dalam middleware lain memakai objek yang sama"""
+    stats = _request_db.get()
+    if stats is not None:
+        yield stats
+        return
+    stats = QueryStats()
+    token = _request_db.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_db.reset(token)
+
+
+def add_query_listener(listener: Callable[[str, float], None]) -> None:
+    _query_listeners.append(listener)
+
+
+def remove_query_listener(listener: Callable[[str, float], None]) -> None:
+    _query_listeners.remove(listener)
+
+
+def _record_query(statement: str, elapsed: float) -> str:
+    operation = statement.lstrip()[:6].upper()
+    if operation not in _OPERATIONS:
+        operation = "OTHER"
+    db_queries_total.inc(operation)
+    db_query_duration_seconds.observe(elapsed, operation)
+
+    stats = _request_db.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    for listener in list(_query_listeners):
+        listener(statement, elapsed)
+    return operation
+
+
+def instrument_engine(engine: Engine) -> None:
+    # Waktu mulai disimpan di execution context (umurnya satu statement), bukan
+    # conn.info: statement yang gagal tidak sampai ke after_cursor_execute
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        _record_query(statement, time.perf_counter() - context._query_start)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        context = exception_context.execution_context
+        start = getattr(context, "_query_start", None)
+        if start is None or exception_context.statement is None:
+            return  # gagal sebelum cursor execute (connect, compile)
+        operation = _record_query(exception_context.statement, time.perf_counter() - start)
+        db_query_errors_total.inc(operation)
+
+
+class MetricsMiddleware:
+    """ASGI middleware: label route memakai template path (/users/{user_id}), bukan path asli"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = ["500"]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        with request_queries_scope() as stats:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                elapsed = time.perf_counter() - start
+                http_requests_in_flight.dec()
+
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_requests_total.inc(method, route_path, status[0])
+            http_request_duration_seconds.observe(elapsed, method, route_path)
+            http_request_db_queries.observe(stats.count, route_path)
+            http_request_db_seconds.observe(stats.seconds, route_path)
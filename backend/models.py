@@ -1,10 +1,12 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, create_engine, Float, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, create_engine, Float, Text, inspect, select, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 import datetime
+from contextlib import contextmanager
+import os
 import pytz
 
-DATABASE_URL = "sqlite:///./workflow.db"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./workflow.db")
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -19,6 +21,8 @@ class User(Base):
     email = Column(String, unique=True, index=True)
     face_embedding = Column(String)  # Store JSON string of embedding
     gender = Column(String, default="other")  # male, female, other
+    # Naik setiap face_embedding berubah (lihat next_face_version); dipakai GET /gallery?since=
+    face_version = Column(Integer, nullable=False, default=0, server_default="0", index=True)
 
 class Attendance(Base):
     __tablename__ = "attendances"
@@ -45,9 +49,9 @@ class Task(Base):
     completed = Column(Boolean, default=False)
     user_id = Column(Integer, ForeignKey("users.id"))
     priority = Column(String, default="medium")  # low, medium, high, urgent
-    status = Column(String, default="pending")  # pending, in_progress, completed, overdue
+    status = Column(String, default="pending", index=True)  # pending, in_progress, completed, overdue
     category = Column(String, default="general")  # general, development, meeting, review, etc
-    deadline = Column(DateTime, nullable=True)
+    deadline = Column(DateTime, nullable=True, index=True)  # naive jam WIB, bandingkan dengan wib_now_naive()
     completed_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
@@ -72,8 +76,147 @@ class Event(Base):
 
     creator = relationship("User", foreign_keys=[created_by])
 
+class LeaveRequest(Base):
+    __tablename__ = "leave_requests"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    start_date = Column(String, nullable=False, index=True)  # Format: YYYY-MM-DD
+    end_date = Column(String, nullable=False)  # Format: YYYY-MM-DD (inklusif)
+    leave_type = Column(String, default="izin")  # izin, sakit, cuti
+    reason = Column(Text, nullable=True)
+    status = Column(String, default="pending", index=True)  # pending, approved, rejected, cancelled
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    user = relationship("User")
+
+class KioskEvent(Base):
+    """
+    Event check-in/out dari kiosk offline (POST /attendance/sync), satu baris
+    per idempotency key; hasil proses disimpan supaya replay batch cukup lookup
+    """
+    __tablename__ = "kiosk_events"
+
+    idempotency_key = Column(String, primary_key=True)
+    kiosk_id = Column(String, nullable=False)
+    event_type = Column(String, nullable=False)  # check_in, check_out
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    client_time = Column(DateTime, nullable=True)  # jam WIB dari kiosk
+    outcome = Column(String, nullable=False)  # recorded, updated, duplicate, rejected
+    reason = Column(String, nullable=True)
+    attendance_id = Column(Integer, nullable=True)
+    similarity = Column(Float, nullable=True)
+    received_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+class JobLease(Base):
+    """Lease per background job supaya hanya satu worker yang menjalankannya"""
+    __tablename__ = "job_leases"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)  # hostname:pid:token worker pemegang lease
+    expires_at = Column(DateTime, nullable=False)  # UTC
+    last_run_at = Column(DateTime, nullable=True)  # UTC
+
 Base.metadata.create_all(bind=engine)
 
+# create_all juga tidak menambahkan kolom baru ke tabel yang sudah ada
+if "face_version" not in {column["name"] for column in inspect(engine).get_columns("users")}:
+    with engine.begin() as _conn:
+        _conn.exec_driver_sql("ALTER TABLE users ADD COLUMN face_version INTEGER NOT NULL DEFAULT 0")
+        # Wajah yang sudah terdaftar mendapat versi > 0, supaya versi gallery (MAX) dan
+        # delta GET /gallery?since= mencakup mereka
+        _conn.exec_driver_sql("UPDATE users SET face_version = 1 WHERE face_embedding IS NOT NULL")
+
+# create_all tidak menambahkan index baru ke tabel yang sudah ada
+for _table in Base.metadata.sorted_tables:
+    for _index in _table.indexes:
+        _index.create(bind=engine, checkfirst=True)
+
+# ---------- full-text search (SQLite FTS5), dipakai search.py ----------
+# Tabel FTS contentless (content=''): hanya inverted index, baris asli dibaca
+# dari tasks/events lewat rowid. Kolom filter (user_id, status, ...) ikut
+# di-index supaya filter dijalankan di dalam MATCH (irisan posting list),
+# bukan setelah semua hasil teks di-join. Trigger menjaga index tetap sinkron
+# untuk semua penulis (API, job, generate_data.py, import). "_" termasuk
+# karakter token supaya nilai seperti in_progress tetap satu token.
+SEARCH_TABLES = {
+    "tasks_fts": ("tasks", ["title", "description", "user_id", "status", "priority"]),
+    "events_fts": ("events", ["title", "description", "status", "event_type"]),
+}
+# bm25 per kolom: judul lebih berat dari deskripsi, kolom filter tidak ikut skor
+SEARCH_RANK = {
+    "tasks_fts": "bm25(10.0, 1.0, 0.0, 0.0, 0.0)",
+    "events_fts": "bm25(10.0, 1.0, 0.0, 0.0)",
+}
+
+
+def _create_search_index(conn, fts_table: str) -> bool:
+    """
+    Buat tabel FTS + trigger lalu isi dari tabel sumber; False kalau tabel sudah
+    ada. Dicek di bawah write lock (BEGIN IMMEDIATE) supaya beberapa worker yang
+    start bersamaan tidak mengisi index dua kali
+    """
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,)
+    ).scalar()
+    if exists:
+        return False
+    source, columns = SEARCH_TABLES[fts_table]
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    delete_old = f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES('delete', old.id, {old_values});"
+    insert_new = f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values});"
+
+    conn.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({column_list}, content='', "
+        f"tokenize=\"unicode61 remove_diacritics 2 tokenchars '_'\", prefix='2 3')"
+    )
+    conn.exec_driver_sql(f"INSERT INTO {fts_table}({fts_table}, rank) VALUES('rank', '{SEARCH_RANK[fts_table]}')")
+    conn.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {source} BEGIN {insert_new} END")
+    conn.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {source} BEGIN {delete_old} END")
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_list} ON {source} BEGIN {delete_old} {insert_new} END"
+    )
+    conn.exec_driver_sql(f"INSERT INTO {fts_table}(rowid, {column_list}) SELECT id, {column_list} FROM {source}")
+    return True
+
+
+def _drop_search_index(conn, fts_table: str) -> None:
+    for suffix in ("ai", "ad", "au"):
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}")
+    conn.exec_driver_sql(f"DROP TABLE IF EXISTS {fts_table}")
+
+
+@contextmanager
+def search_index_deferred():
+    """
+    Untuk bulk load (generate_data.py): index FTS dan trigger-nya dibuang, lalu
+    dibangun ulang sekali di akhir - trigger per baris ~3x memperlambat insert
+    """
+    if engine.dialect.name != "sqlite":
+        yield
+        return
+    with engine.begin() as conn:
+        for fts_table in SEARCH_TABLES:
+            _drop_search_index(conn, fts_table)
+    try:
+        yield
+    finally:
+        for fts_table in SEARCH_TABLES:
+            with engine.begin() as conn:
+                _create_search_index(conn, fts_table)
+
+
+if engine.dialect.name == "sqlite":
+    _existing_tables = set(inspect(engine).get_table_names())
+    for _fts_table in SEARCH_TABLES:
+        if _fts_table not in _existing_tables:
+            with engine.begin() as _conn:
+                _create_search_index(_conn, _fts_table)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -81,3 +224,31 @@ def get_db():
         yield db
     finally:
         db.close()
+
+@contextmanager
+def snapshot_session():
+    """
+    Session read-only dengan satu snapshot konsisten untuk beberapa query
+    (SQLite: BEGIN eksplisit, karena pysqlite hanya membuka transaksi sebelum DML)
+    """
+    db = SessionLocal()
+    try:
+        if engine.dialect.name == "sqlite":
+            db.connection().exec_driver_sql("BEGIN")
+        else:
+            db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+
+def wib_now_naive() -> datetime.datetime:
+    """Jam WIB sekarang tanpa tzinfo (format Task.deadline), tidak tergantung timezone server"""
+    return datetime.datetime.now(pytz.timezone('Asia/Jakarta')).replace(tzinfo=None)
+
+def next_face_version():
+    """
+    SQL expression untuk User.face_version: MAX + 1, dievaluasi di dalam
+    INSERT/UPDATE itu sendiri (write di SQLite serial -> versi selalu naik)
+    """
+    return select(func.coalesce(func.max(User.face_version), 0) + 1).scalar_subquery()
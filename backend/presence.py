@@ -0,0 +1,164 @@
+"""
+Per-day presence bitmap (bitset per tanggal WIB, bit ke-n = user_id n)
+
+- is_present(): cek "sudah check-in hari ini?" tanpa SQL
+- count(): jumlah hadir = popcount
+- absent_user_ids(): "siapa yang belum datang" = users & ~present
+- Dibangun ulang dari tabel Attendance saat startup, di-update saat check-in
+
+Bitset memakai int Python (arbitrary precision): 50k user = ~6 KB per hari.
+Hanya PRESENCE_RETENTION_DAYS hari terakhir yang disimpan; tanggal di luar
+jendela itu mengembalikan None dan caller harus fallback ke database.
+
+Catatan: index ini per-proses - check-in yang diproses worker lain tidak
+terlihat sampai rebuild/refresh_day (begitu juga user baru sampai
+refresh_users). Database tetap sumber kebenaran.
+"""
+import datetime
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from models import User, Attendance
+
+logger = logging.getLogger("workflow_id")
+
+PRESENCE_RETENTION_DAYS = 35
+
+
+def _popcount(bits: int) -> int:
+    return bits.bit_count() if hasattr(bits, "bit_count") else bin(bits).count("1")
+
+
+def _bits_from_ids(ids: Iterable[int]) -> int:
+    """Bangun bitset dari banyak id sekaligus (bytearray, bukan |= berulang pada int besar)"""
+    ids = list(ids)
+    if not ids:
+        return 0
+    buf = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _iter_bits(bits: int) -> Iterable[int]:
+    """Index bit yang bernilai 1, dari kecil ke besar (scan per byte, O(n))"""
+    buf = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for offset, byte in enumerate(buf):
+        while byte:
+            lowest = byte & -byte
+            yield (offset << 3) + lowest.bit_length() - 1
+            byte ^= lowest
+
+
+class PresenceIndex:
+    """Bitset kehadiran per tanggal (YYYY-MM-DD, WIB)"""
+
+    def __init__(self, retention_days: int = PRESENCE_RETENTION_DAYS):
+        self.retention_days = retention_days
+        self._days: Dict[str, int] = {}
+        self._users = 0
+        self._oldest: Optional[str] = None
+
+    def __len__(self) -> int:
+        """Jumlah tanggal yang punya bitset"""
+        return len(self._days)
+
+    def _window_start(self, today: str) -> str:
+        start = datetime.date.fromisoformat(today) - datetime.timedelta(days=self.retention_days - 1)
+        return start.isoformat()
+
+    def covers(self, date: str) -> bool:
+        return self._oldest is not None and date >= self._oldest
+
+    # ---------- users ----------
+
+    def add_user(self, user_id: int) -> None:
+        self._users |= 1 << user_id
+
+    def add_users(self, user_ids: Iterable[int]) -> None:
+        self._users |= _bits_from_ids(user_ids)
+
+    def remove_user(self, user_id: int) -> None:
+        self._users &= ~(1 << user_id)
+
+    @property
+    def total_users(self) -> int:
+        return _popcount(self._users)
+
+    # ---------- presence ----------
+
+    def advance(self, today: str) -> None:
+        """Hari baru: geser jendela retensi dan buang bitset lama"""
+        if self._oldest is None or self._window_start(today) > self._oldest:
+            self._prune(today)
+
+    def mark(self, date: str, user_id: int) -> None:
+        self.advance(date)
+        if self.covers(date):
+            self._days[date] = self._days.get(date, 0) | (1 << user_id)
+
+    def _prune(self, today: str) -> None:
+        oldest = self._window_start(today)
+        for date in [d for d in self._days if d < oldest]:
+            del self._days[date]
+        self._oldest = oldest
+
+    def is_present(self, date: str, user_id: int) -> Optional[bool]:
+        """True/False, atau None kalau tanggal di luar jendela index"""
+        if not self.covers(date):
+            return None
+        return bool(self._days.get(date, 0) >> user_id & 1)
+
+    def count(self, date: str) -> Optional[int]:
+        if not self.covers(date):
+            return None
+        return _popcount(self._days.get(date, 0))
+
+    def present_user_ids(self, date: str) -> Optional[List[int]]:
+        if not self.covers(date):
+            return None
+        return list(_iter_bits(self._days.get(date, 0)))
+
+    def absent_user_ids(self, date: str) -> Optional[List[int]]:
+        """User terdaftar yang belum check-in pada tanggal tersebut"""
+        if not self.covers(date):
+            return None
+        return list(_iter_bits(self._users & ~self._days.get(date, 0)))
+
+    # ---------- rebuild ----------
+
+    def refresh_users(self, db: Session) -> int:
+        """Sinkron ulang daftar user dari database (registrasi/import dari worker atau CLI lain)"""
+        self._users = _bits_from_ids(user_id for (user_id,) in db.query(User.id))
+        return self.total_users
+
+    def refresh_day(self, db: Session, date: str) -> int:
+        """Sinkron ulang satu tanggal dari database (mis. check-in dari worker lain)"""
+        self.advance(date)
+        bits = _bits_from_ids(user_id for (user_id,) in db.query(Attendance.user_id).filter(Attendance.date == date))
+        if self.covers(date):
+            self._days[date] = bits
+        return _popcount(bits)
+
+    def rebuild(self, db: Session, today: str) -> None:
+        """Bangun ulang seluruh index dari tabel User dan Attendance"""
+        users = _bits_from_ids(user_id for (user_id,) in db.query(User.id))
+
+        oldest = self._window_start(today)
+        ids_by_day: Dict[str, List[int]] = {}
+        rows = db.query(Attendance.date, Attendance.user_id).filter(
+            Attendance.date >= oldest,
+            Attendance.date <= today
+        )
+        for date, user_id in rows:
+            ids_by_day.setdefault(date, []).append(user_id)
+
+        self._users = users
+        self._days = {date: _bits_from_ids(ids) for date, ids in ids_by_day.items()}
+        self._oldest = oldest
+        logger.info(f"[PRESENCE] Rebuilt - users: {self.total_users}, days: {len(self._days)}, present today: {self.count(today)}")
+
+
+presence_index = PresenceIndex()
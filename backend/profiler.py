@@ -0,0 +1,161 @@
+"""
+Profiling on-demand per request (cProfile -> file .prof)
+
+Aktif hanya kalau PROFILE_TOKEN di-set; tanpa token middleware tidak dipasang
+sama sekali (nol overhead). Request diprofile kalau membawa
+    header  X-Profile: <PROFILE_TOKEN>
+    atau    ?__profile=<PROFILE_TOKEN>
+
+- Rate limit: satu profile sekaligus dan minimal PROFILE_MIN_INTERVAL detik
+  antar profile; request yang kena limit tetap diproses tanpa profiling
+  (header X-Profile: rate-limited)
+- Hasil disimpan sebagai pstats di PROFILE_DIR (maksimal PROFILE_MAX_FILES file,
+  yang paling lama dihapus); nama file dikirim di header X-Profile-Id
+- Lihat/unduh lewat GET /admin/profiles dan /admin/profiles/{name}
+  (`python -m pstats <file>` atau snakeviz untuk analisis)
+
+cProfile hanya merekam thread event loop: kerja di thread executor (mis. widget
+DB /dashboard/bundle) tidak ikut, dan request lain yang berjalan bersamaan di
+event loop ikut terekam.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import time
+from typing import List, Optional
+from urllib.parse import parse_qs
+
+logger = logging.getLogger("workflow_id")
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MIN_INTERVAL = float(os.getenv("PROFILE_MIN_INTERVAL", "10"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+
+_SLUG = re.compile(r"[^A-Za-z0-9]+")
+
+
+class RequestProfiler:
+    def __init__(self, directory: str = PROFILE_DIR, min_interval: float = PROFILE_MIN_INTERVAL,
+                 max_files: int = PROFILE_MAX_FILES):
+        self.directory = directory
+        self.min_interval = min_interval
+        self.max_files = max_files
+        self._active = False
+        self._last_started = 0.0
+
+    def try_start(self) -> bool:
+        now = time.monotonic()
+        if self._active or now - self._last_started < self.min_interval:
+            return False
+        self._active = True
+        self._last_started = now
+        return True
+
+    def new_name(self, method: str, route: str) -> str:
+        slug = _SLUG.sub("-", route).strip("-") or "root"
+        millis = int(time.time() * 1000) % 1000
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{millis:03d}_{method}_{slug}.prof"
+
+    def save(self, profile: cProfile.Profile, name: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        profile.dump_stats(os.path.join(self.directory, name))
+        self._prune()
+        logger.info(f"[PROFILER] Saved {name}")
+
+    def finish(self) -> None:
+        self._active = False
+
+    def _prune(self) -> None:
+        files = self.list_profiles()
+        for old in files[self.max_files:]:
+            os.remove(os.path.join(self.directory, old["name"]))
+
+    def list_profiles(self) -> List[dict]:
+        """Profile terbaru lebih dulu"""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".prof"):
+                stat = os.stat(os.path.join(self.directory, name))
+                profiles.append({"name": name, "size_bytes": stat.st_size, "created_at": stat.st_mtime})
+        return sorted(profiles, key=lambda p: p["created_at"], reverse=True)
+
+    def path_for(self, name: str) -> Optional[str]:
+        """Path file profile, atau None kalau tidak ada / nama tidak valid"""
+        if os.path.basename(name) != name or not name.endswith(".prof"):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def render_text(self, path: str, sort: str = "cumulative", limit: int = 60) -> str:
+        buffer = io.StringIO()
+        stats = pstats.Stats(path, stream=buffer)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return buffer.getvalue()
+
+
+request_profiler = RequestProfiler()
+
+
+def _wants_profile(scope, token: str) -> bool:
+    for key, value in scope["headers"]:
+        if key == b"x-profile":
+            return value.decode("latin-1") == token
+    query = scope.get("query_string", b"")
+    if b"__profile=" in query:
+        return parse_qs(query.decode("latin-1")).get("__profile", [""])[0] == token
+    return False
+
+
+class ProfilerMiddleware:
+    """ASGI middleware: jalankan request di bawah cProfile kalau diminta (lihat docstring modul)"""
+
+    def __init__(self, app, token: str = PROFILE_TOKEN, profiler: RequestProfiler = request_profiler):
+        self.app = app
+        self.token = token
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_profile(scope, self.token):
+            await self.app(scope, receive, send)
+            return
+
+        if not self.profiler.try_start():
+            await self.app(scope, receive, self._rate_limited(send))
+            return
+
+        profile = cProfile.Profile()
+        name = None
+
+        async def send_wrapper(message):
+            nonlocal name
+            if message["type"] == "http.response.start":
+                # Route sudah di-resolve saat response dimulai -> nama file pakai route template
+                route = getattr(scope.get("route"), "path", None) or scope["path"]
+                name = self.profiler.new_name(scope["method"], route)
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", name.encode())]}
+            await send(message)
+
+        try:
+            profile.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profile.disable()
+            if name:
+                self.profiler.save(profile, name)
+        finally:
+            self.profiler.finish()
+
+    @staticmethod
+    def _rate_limited(send):
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile", b"rate-limited")]}
+            await send(message)
+        return send_wrapper
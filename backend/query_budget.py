@@ -0,0 +1,118 @@
+"""
+Query budget per request + deteksi N+1
+
+- Query dihitung dari hook SQL metrics.instrument_engine (satu hook untuk
+  /metrics dan budget, jadi setiap statement hanya diukur sekali); statistik
+  per request dibagi lewat metrics.request_queries_scope()
+- Statement dinormalisasi menjadi "shape" (literal dan daftar IN (?, ?, ...)
+  diganti ?). Shape yang sama muncul >= N_PLUS_ONE_THRESHOLD kali dalam satu
+  request = kemungkinan N+1 (query per baris di dalam loop) -> log warning
+- Request dengan lebih dari QUERY_BUDGET_WARN query juga di-log
+- SQL_DEBUG=1: response diberi header X-DB-Queries, X-DB-Time (ms) dan
+  X-DB-N-Plus-One (jumlah shape yang dicurigai)
+
+Helper untuk test:
+    with assert_max_queries(5):
+        client.get("/reports/productivity-report")
+count_queries() / assert_max_queries() menghitung query dari thread mana pun,
+karena TestClient menjalankan app di thread lain.
+"""
+import functools
+import logging
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List
+
+from metrics import QueryStats, add_query_listener, remove_query_listener, request_queries_scope
+
+logger = logging.getLogger("workflow_id")
+
+SQL_DEBUG = os.getenv("SQL_DEBUG", "0") == "1"
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+QUERY_BUDGET_WARN = int(os.getenv("QUERY_BUDGET_WARN", "50"))
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    """SQL tanpa literal: query yang sama dengan parameter berbeda punya shape yang sama"""
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("(?)", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+def repeated_shapes(statements: List[str], threshold: int = N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+    """Shape yang muncul >= threshold kali (kandidat N+1)"""
+    shapes = Counter(statement_shape(statement) for statement in statements)
+    return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+
+class QueryBudgetMiddleware:
+    """ASGI middleware: hitung query per request, log N+1, header X-DB-* kalau SQL_DEBUG"""
+
+    def __init__(self, app, debug: bool = SQL_DEBUG):
+        self.app = app
+        self.debug = debug
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with request_queries_scope() as stats:
+            async def send_wrapper(message):
+                if self.debug and message["type"] == "http.response.start":
+                    suspects = repeated_shapes(stats.statements)
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-queries", str(stats.count).encode()))
+                    headers.append((b"x-db-time", f"{stats.seconds * 1000:.2f}".encode()))
+                    headers.append((b"x-db-n-plus-one", str(len(suspects)).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                self._report(scope, stats)
+
+    def _report(self, scope, stats: QueryStats) -> None:
+        if not stats.count:
+            return
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        endpoint = f"{scope['method']} {route}"
+
+        for shape, count in repeated_shapes(stats.statements).items():
+            logger.warning(f"[QUERY_BUDGET] Possible N+1 on {endpoint}: {count}x {shape[:200]}")
+        if stats.count > QUERY_BUDGET_WARN:
+            logger.warning(
+                f"[QUERY_BUDGET] {endpoint} ran {stats.count} queries "
+                f"({stats.seconds * 1000:.1f}ms), budget {QUERY_BUDGET_WARN}"
+            )
+
+
+@contextmanager
+def count_queries():
+    """Hitung semua query selama blok berjalan (semua thread)"""
+    stats = QueryStats()
+    add_query_listener(stats.record)
+    try:
+        yield stats
+    finally:
+        remove_query_listener(stats.record)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """AssertionError kalau blok menjalankan lebih dari max_queries query"""
+    with count_queries() as counter:
+        yield counter
+    if counter.count > max_queries:
+        statements = "\n".join(f"  {statement_shape(statement)[:200]}" for statement in counter.statements)
+        raise AssertionError(f"Expected at most {max_queries} queries, got {counter.count}:\n{statements}")
@@ -0,0 +1,151 @@
+"""
+In-process background job scheduler (asyncio)
+
+- Setiap job berjalan periodik di task asyncio sendiri; fungsi job (sync, akses DB)
+  dijalankan di thread pool supaya event loop tidak terblokir
+- Job dengan lease=True memakai baris di tabel job_leases: hanya worker pemegang
+  lease yang menjalankan job tersebut. Lease diperpanjang setiap run; kalau worker
+  mati, worker lain mengambil alih setelah lease kedaluwarsa
+- Job dengan lease=False (maintenance cache in-memory) berjalan di setiap worker
+"""
+import asyncio
+import datetime
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import SessionLocal, JobLease
+
+logger = logging.getLogger("workflow_id")
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") == "1"
+
+
+class Job:
+    def __init__(self, name: str, func: Callable[[Session], Any], interval_seconds: float, lease: bool):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.lease = lease
+        self.runs = 0
+        self.last_run_at: Optional[datetime.datetime] = None
+        self.last_duration_ms: Optional[float] = None
+        self.last_result: Any = None
+        self.last_error: Optional[str] = None
+        self.is_leader = not lease
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval_seconds,
+            "lease": self.lease,
+            "is_leader": self.is_leader,
+            "runs": self.runs,
+            "last_run_at": self.last_run_at,
+            "last_duration_ms": self.last_duration_ms,
+            "last_result": self.last_result,
+            "last_error": self.last_error
+        }
+
+
+class Scheduler:
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._jobs: Dict[str, Job] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def jobs(self) -> List[Job]:
+        return list(self._jobs.values())
+
+    def register(self, name: str, interval_seconds: float, lease: bool = True):
+        """Decorator: daftarkan fungsi job(db) -> hasil (untuk log)"""
+        def decorator(func: Callable[[Session], Any]):
+            self._jobs[name] = Job(name, func, interval_seconds, lease)
+            return func
+        return decorator
+
+    async def start(self) -> None:
+        for job in self._jobs.values():
+            self._tasks.append(asyncio.create_task(self._loop(job)))
+        logger.info(f"[SCHEDULER] Started {len(self._jobs)} jobs as {self.owner}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_now(self, name: str) -> Any:
+        """Jalankan job sekali (tanpa menunggu interval), tetap menghormati lease"""
+        job = self._jobs[name]
+        return await asyncio.get_running_loop().run_in_executor(None, self._run_once, job)
+
+    async def _loop(self, job: Job) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await loop.run_in_executor(None, self._run_once, job)
+            await asyncio.sleep(job.interval_seconds)
+
+    def _run_once(self, job: Job) -> Any:
+        db = SessionLocal()
+        try:
+            if job.lease:
+                job.is_leader = self._acquire_lease(db, job)
+                if not job.is_leader:
+                    return None
+
+            start = time.perf_counter()
+            result = job.func(db)
+            db.commit()
+            job.last_duration_ms = round((time.perf_counter() - start) * 1000, 2)
+            job.last_run_at = datetime.datetime.utcnow()
+            job.last_result = result
+            job.last_error = None
+            job.runs += 1
+
+            if job.lease:
+                db.query(JobLease).filter(JobLease.name == job.name).update({"last_run_at": job.last_run_at})
+                db.commit()
+
+            logger.info(f"[SCHEDULER] {job.name} done in {job.last_duration_ms}ms - result: {result}")
+            return result
+        except Exception as e:
+            db.rollback()
+            job.last_error = str(e)
+            logger.error(f"[SCHEDULER] {job.name} failed: {str(e)}", exc_info=True)
+            return None
+        finally:
+            db.close()
+
+    def _acquire_lease(self, db: Session, job: Job) -> bool:
+        """Atomic UPDATE: ambil lease kalau kedaluwarsa atau masih milik worker ini"""
+        now = datetime.datetime.utcnow()
+        # Lease sedikit lebih panjang dari interval supaya leader tetap sama antar run
+        expires_at = now + datetime.timedelta(seconds=job.interval_seconds * 2)
+
+        updated = db.query(JobLease).filter(
+            JobLease.name == job.name,
+            or_(JobLease.expires_at < now, JobLease.owner == self.owner)
+        ).update({"owner": self.owner, "expires_at": expires_at}, synchronize_session=False)
+        db.commit()
+        if updated:
+            return True
+
+        try:
+            db.add(JobLease(name=job.name, owner=self.owner, expires_at=expires_at))
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()  # Lease dipegang worker lain
+            return False
+
+
+scheduler = Scheduler()
@@ -0,0 +1,153 @@
+"""
+Full-text search task & event (GET /tasks/search, GET /events/search)
+
+Index: tabel FTS5 tasks_fts / events_fts di models.py, disinkronkan trigger.
+Ekspresi MATCH dibangun dari input user (semua kata di-quote):
+
+    {title description} : ("review" "laporan") AND user_id : "42" AND status : "pending"
+
+- Semua kata exact; kata terakhir jadi prefix ("lapor"*) hanya kalau kata itu
+  sendiri tidak ada di index (user masih mengetik). Prefix query tidak bisa
+  melompati posting list, jadi dengan filter selektif (user_id) bisa ~100x
+  lebih lambat dari term exact pada 1 juta baris
+- Filter (user_id, status, priority, event_type) ikut di dalam MATCH sebagai
+  term kolom, jadi FTS5 mengiris posting list teks dan filter sekaligus;
+  tabel tasks hanya disentuh untuk baris di halaman yang diminta
+- Nilai filter harus satu token (huruf/angka/_): satu token di kolom berisi
+  satu nilai = perbandingan sama persis (tidak case-sensitive)
+- Ranking bm25 menghitung skor setiap hasil sebelum diurutkan: untuk kata yang
+  muncul di ratusan ribu baris itu ratusan ms. Kalau hasil lebih dari
+  SEARCH_RANK_WINDOW, hanya hasil terbaru (rowid terbesar) sebanyak itu yang
+  di-ranking (batasnya dicari dengan ORDER BY rowid DESC, tanpa skor) dan
+  response memberi tanda "partial_rank": true
+- Halaman: limit+1 baris diambil untuk has_more, tanpa COUNT(*) atas semua hasil
+"""
+import logging
+import os
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy import column, literal_column, table
+from sqlalchemy.orm import Session
+
+from models import Event, Task, User
+
+logger = logging.getLogger("workflow_id")
+
+SEARCH_MAX_TERMS = int(os.getenv("SEARCH_MAX_TERMS", "8"))
+SEARCH_MAX_LIMIT = 100
+SEARCH_RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "5000"))
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+_FILTER_VALUE = re.compile(r"^\w+$", re.UNICODE)
+
+_tasks_fts = table("tasks_fts", column("rowid"), column("rank"))
+_events_fts = table("events_fts", column("rowid"), column("rank"))
+
+
+class SearchQueryError(ValueError):
+    """Query atau nilai filter tidak bisa dijadikan ekspresi MATCH"""
+
+
+def search_terms(q: str) -> List[str]:
+    terms = _TERM.findall(q or "")[:SEARCH_MAX_TERMS]
+    if not terms:
+        raise SearchQueryError("Query pencarian harus berisi minimal satu kata")
+    return terms
+
+
+def build_match(terms: List[str], filters: Dict[str, object], prefix: bool = False) -> str:
+    """Kata + filter -> ekspresi FTS5 MATCH (semua input di-quote, sintaks FTS5 user tidak dieksekusi)"""
+    phrases = [f'"{term}"' for term in terms]
+    if prefix:
+        phrases[-1] += "*"
+    parts = ["{title description} : (" + " ".join(phrases) + ")"]
+    for name, value in filters.items():
+        if value is None or value == "":
+            continue
+        value = str(value)
+        if not _FILTER_VALUE.match(value):
+            raise SearchQueryError(f"Nilai filter {name} tidak valid")
+        parts.append(f'{name} : "{value}"')
+    return " AND ".join(parts)
+
+
+def _check_page(limit: int, offset: int) -> None:
+    if not 1 <= limit <= SEARCH_MAX_LIMIT:
+        raise SearchQueryError(f"limit harus antara 1 dan {SEARCH_MAX_LIMIT}")
+    if offset < 0:
+        raise SearchQueryError("offset tidak boleh negatif")
+
+
+def _run(db: Session, fts, model, columns: list, joins: list, terms: List[str], filters: dict,
+         limit: int, offset: int) -> dict:
+    """Query FTS + join ke tabel sumber, diurutkan relevansi; hasil: rows dict, has_more, partial_rank"""
+    match = build_match(terms, filters)
+    last_term = literal_column(fts.name).op("MATCH")(build_match(terms[-1:], {}))
+    if db.query(fts.c.rowid).filter(last_term).limit(1).scalar() is None:
+        match = build_match(terms, filters, prefix=True)
+    matches = literal_column(fts.name).op("MATCH")(match)
+    window = max(SEARCH_RANK_WINDOW, offset + limit + 1)
+    cutoff = db.query(fts.c.rowid).filter(matches).order_by(fts.c.rowid.desc()).offset(window - 1).limit(1).scalar()
+
+    query = db.query(*columns, fts.c.rank.label("score")).select_from(fts).join(
+        model, model.id == fts.c.rowid
+    )
+    for target, onclause in joins:
+        query = query.outerjoin(target, onclause)
+    query = query.filter(matches)
+    if cutoff is not None:
+        query = query.filter(fts.c.rowid >= cutoff)
+    rows = query.order_by(fts.c.rank).limit(limit + 1).offset(offset).all()
+    logger.debug(f"[SEARCH] {fts.name} MATCH {match!r}: {len(rows)} rows, cutoff {cutoff}")
+    return {
+        "rows": [row._asdict() for row in rows[:limit]],
+        "has_more": len(rows) > limit,
+        "partial_rank": cutoff is not None
+    }
+
+
+def search_tasks(db: Session, q: str, user_id: Optional[int] = None, status: Optional[str] = None,
+                 priority: Optional[str] = None, limit: int = 20, offset: int = 0) -> dict:
+    _check_page(limit, offset)
+    filters = {"user_id": user_id, "status": status, "priority": priority}
+    result = _run(db, _tasks_fts, Task, [
+        Task.id,
+        Task.title,
+        Task.description,
+        Task.completed,
+        Task.user_id,
+        User.name.label("user_name"),
+        Task.priority,
+        Task.status,
+        Task.category,
+        Task.deadline,
+        Task.completed_at,
+        Task.created_at,
+        Task.updated_at
+    ], [(User, User.id == Task.user_id)], search_terms(q), filters, limit, offset)
+    return {
+        "query": q, "limit": limit, "offset": offset, "has_more": result["has_more"],
+        "partial_rank": result["partial_rank"], "tasks": result["rows"]
+    }
+
+
+def search_events(db: Session, q: str, status: Optional[str] = None, event_type: Optional[str] = None,
+                  limit: int = 20, offset: int = 0) -> dict:
+    _check_page(limit, offset)
+    filters = {"status": status, "event_type": event_type}
+    result = _run(db, _events_fts, Event, [
+        Event.id,
+        Event.title,
+        Event.description,
+        Event.event_type,
+        Event.date,
+        Event.time,
+        Event.location,
+        Event.attendees,
+        Event.status
+    ], [], search_terms(q), filters, limit, offset)
+    return {
+        "query": q, "limit": limit, "offset": offset, "has_more": result["has_more"],
+        "partial_rank": result["partial_rank"], "events": result["rows"]
+    }
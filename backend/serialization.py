@@ -0,0 +1,63 @@
+"""
+Fast JSON response path untuk WorkFlow ID backend.
+
+- FastJSONResponse: orjson encoder, dipakai sebagai default_response_class app
+- Handler yang mengembalikan FastJSONResponse langsung tidak divalidasi ulang oleh
+  FastAPI (response_model hanya dipakai untuk dokumentasi OpenAPI)
+- datetime di-encode oleh orjson (ISO 8601), bukan .isoformat() per baris
+- Format jam "HH:MM WIB" dikerjakan SQLite lewat wib_clock(), bukan strftime per baris
+- SelectiveGZipMiddleware: gzip di atas GZIP_MINIMUM_SIZE, kecuali stream SSE
+"""
+import os
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+
+# Response lebih kecil dari ini tidak di-gzip (overhead kompresi > hemat bandwidth)
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "6"))
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    """Fallback untuk tipe yang tidak dikenal orjson (mis. Pydantic model)"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content ke JSON bytes dengan orjson"""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """ORJSONResponse yang juga bisa meng-encode Pydantic model"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def wib_clock(column):
+    """SQL expression: format kolom DateTime menjadi 'HH:MM WIB' langsung di SQLite"""
+    return func.strftime("%H:%M WIB", column)
+
+
+def format_sse(event: str, data: Any) -> bytes:
+    """Encode satu pesan Server-Sent Events"""
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip yang tidak menyentuh request text/event-stream (chunk SSE tidak boleh di-buffer)"""
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and "text/event-stream" in Headers(scope=scope).get("accept", ""):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
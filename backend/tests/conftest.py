@@ -0,0 +1,72 @@
+"""
+Fixture test backend: database SQLite sementara, dipilih sebelum models/main
+di-import (engine dibuat saat import)
+"""
+import datetime
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DB_DIR = tempfile.mkdtemp(prefix="workflow_test_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["SCHEDULER_ENABLED"] = "0"
+os.environ["SQL_DEBUG"] = "1"  # header X-DB-Queries dicek di test_query_budget.py
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+SEED_USERS = 20
+
+
+def _seed(db) -> None:
+    from models import Attendance, Event, LeaveRequest, Task, User
+
+    today = datetime.date.today()
+    now = datetime.datetime.now()
+    for index in range(SEED_USERS):
+        user = User(name=f"User {index}", email=f"user{index}@example.com", gender="other")
+        db.add(user)
+        db.flush()
+        for days_ago in range(10):
+            day = today - datetime.timedelta(days=days_ago)
+            check_in = datetime.datetime.combine(day, datetime.time(8, index % 30))
+            db.add(Attendance(
+                user_id=user.id, date=day.isoformat(), check_in_time=check_in,
+                check_out_time=check_in + datetime.timedelta(hours=8), work_hours=8.0,
+                status="on_time" if index % 3 else "late"
+            ))
+        for number in range(5):
+            completed = number % 2 == 0
+            db.add(Task(
+                title=f"Review laporan {number}", description="Periksa laporan mingguan",
+                user_id=user.id, completed=completed, status="completed" if completed else "pending",
+                priority="high" if number == 0 else "medium",
+                deadline=now + datetime.timedelta(days=number - 2),
+                completed_at=now - datetime.timedelta(days=number) if completed else None
+            ))
+        db.add(LeaveRequest(
+            user_id=user.id, start_date=(today - datetime.timedelta(days=3)).isoformat(),
+            end_date=(today - datetime.timedelta(days=2)).isoformat(), leave_type="cuti", status="approved"
+        ))
+    db.add(Event(
+        title="Rapat bulanan", event_type="meeting",
+        date=(today + datetime.timedelta(days=1)).isoformat(), time="09:00"
+    ))
+    db.commit()
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from models import SessionLocal
+    import main
+
+    db = SessionLocal()
+    try:
+        _seed(db)
+    finally:
+        db.close()
+    with TestClient(main.app) as test_client:
+        yield test_client
@@ -0,0 +1,87 @@
+"""AdmissionController: keputusan 429/503 dan pembagian slot antar kiosk"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from admission import AdmissionController
+
+
+def _controller(**overrides) -> AdmissionController:
+    options = {"max_in_flight": 1, "max_queue": 2, "queue_timeout_ms": 1000, "per_key_limit": 2}
+    options.update(overrides)
+    return AdmissionController("test", **options)
+
+
+def test_per_key_limit_rejects_with_429():
+    async def scenario():
+        controller = _controller(max_in_flight=4, per_key_limit=2)
+        await controller.acquire("kiosk-a")
+        await controller.acquire("kiosk-a")
+        with pytest.raises(HTTPException) as rejected:
+            await controller.acquire("kiosk-a")
+        # Kiosk lain tidak terkena limit kiosk-a
+        await controller.acquire("kiosk-b")
+        return controller, rejected.value
+
+    controller, error = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert error.headers["Retry-After"] == "2"
+    assert controller.rejected_total["per_key_limit"] == 1
+    assert controller.in_flight == 3
+
+
+def test_full_queue_rejects_with_503():
+    async def scenario():
+        controller = _controller(max_queue=1)
+        await controller.acquire("kiosk-a")
+        waiter = asyncio.create_task(controller.acquire("kiosk-b"))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as rejected:
+            await controller.acquire("kiosk-c")
+        controller.release("kiosk-a")
+        assert await waiter == "kiosk-b"
+        return controller, rejected.value
+
+    controller, error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert controller.rejected_total["queue_full"] == 1
+    assert controller.in_flight == 1
+    assert controller.queue_depth == 0
+
+
+def test_queue_timeout_rejects_with_503_and_frees_key():
+    async def scenario():
+        controller = _controller(queue_timeout_ms=20)
+        await controller.acquire("kiosk-a")
+        with pytest.raises(HTTPException) as rejected:
+            await controller.acquire("kiosk-b")
+        return controller, rejected.value
+
+    controller, error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert controller.rejected_total["queue_timeout"] == 1
+    assert controller.queue_depth == 0
+    assert controller.stats()["active_keys"] == {"kiosk-a": 1}
+
+
+def test_released_slots_rotate_between_kiosks():
+    async def scenario():
+        controller = _controller(max_queue=10, per_key_limit=10)
+        await controller.acquire("kiosk-a")
+        order = []
+
+        async def request(key: str):
+            await controller.acquire(key)
+            order.append(key)
+
+        waiters = [asyncio.create_task(request(key)) for key in ("kiosk-a", "kiosk-a", "kiosk-a", "kiosk-b")]
+        await asyncio.sleep(0)
+        for key in ("kiosk-a", "kiosk-a", "kiosk-b", "kiosk-a"):
+            controller.release(key)
+            await asyncio.sleep(0)
+        await asyncio.gather(*waiters)
+        return order
+
+    # kiosk-b tidak menunggu sampai semua antrian kiosk-a selesai
+    assert asyncio.run(scenario()) == ["kiosk-a", "kiosk-b", "kiosk-a", "kiosk-a"]
@@ -0,0 +1,115 @@
+"""FaceGallery dipakai bersamaan oleh event loop, thread executor dan job rebuild"""
+import threading
+
+import numpy as np
+import pytest
+
+from face_gallery import FaceGallery, embedding_to_json, normalize_embedding
+
+DIMENSION = 128
+GALLERY_USERS = 50
+
+
+def _vector(seed: int) -> np.ndarray:
+    return normalize_embedding(np.random.default_rng(seed).normal(size=DIMENSION).astype(np.float32))
+
+
+@pytest.fixture(scope="module")
+def gallery_users(client):
+    from models import SessionLocal, User
+
+    db = SessionLocal()
+    try:
+        users = [
+            User(name=f"Gallery {index}", email=f"gallery{index}@example.com",
+                 face_embedding=embedding_to_json(_vector(index)), face_version=1)
+            for index in range(GALLERY_USERS)
+        ]
+        db.add_all(users)
+        db.commit()
+        user_ids = {user.id: index for user, index in zip(users, range(GALLERY_USERS))}
+        yield user_ids
+        for user in users:
+            db.delete(user)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_upsert_remove_keep_rows_consistent():
+    gallery = FaceGallery()
+    for user_id in range(1, 6):
+        gallery.upsert(user_id, _vector(user_id), 1)
+    gallery.remove(2)
+    gallery.upsert(3, _vector(30), 2)
+
+    assert len(gallery) == 4
+    assert gallery.get(2, 1) is None
+    assert gallery.get(3, 1) is None
+    assert np.allclose(gallery.get(3, 2), _vector(30))
+    assert np.allclose(gallery.get(5, 1), _vector(5))
+    assert gallery.find_duplicate(_vector(4)).user_id == 4
+
+
+def test_concurrent_upserts_are_not_lost():
+    gallery = FaceGallery()
+
+    def writer(offset: int):
+        for user_id in range(offset, offset + 200):
+            gallery.upsert(user_id, _vector(user_id), 1)
+
+    threads = [threading.Thread(target=writer, args=(offset,)) for offset in (1000, 2000, 3000, 4000)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(gallery) == 800
+    for user_id in (1000, 1199, 2050, 3100, 4199):
+        assert np.allclose(gallery.get(user_id, 1), _vector(user_id))
+
+
+def test_rebuild_concurrent_with_upsert_never_returns_other_users_embedding(gallery_users):
+    from models import SessionLocal
+
+    gallery = FaceGallery()
+    stop = threading.Event()
+    errors = []
+
+    def rebuilder():
+        db = SessionLocal()
+        try:
+            while not stop.is_set():
+                gallery.rebuild(db)
+        finally:
+            db.close()
+
+    def upserter():
+        # Versi 2 = embedding baru yang belum ada di DB; rebuild mengembalikan versi 1
+        while not stop.is_set():
+            for user_id, index in gallery_users.items():
+                gallery.upsert(user_id, expected[user_id, 2], 2)
+
+    expected = {
+        (user_id, version): _vector(seed)
+        for user_id, index in gallery_users.items()
+        for version, seed in ((1, index), (2, index + 1000))
+    }
+
+    def reader():
+        while not stop.is_set():
+            for (user_id, version), vector in expected.items():
+                found = gallery.get(user_id, version)
+                if found is not None and not np.allclose(found, vector):
+                    errors.append((user_id, version))
+
+    threads = [threading.Thread(target=target) for target in (rebuilder, upserter, reader, reader)]
+    for thread in threads:
+        thread.start()
+    stop.wait(1.5)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(gallery) >= GALLERY_USERS
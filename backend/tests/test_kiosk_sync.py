@@ -0,0 +1,121 @@
+"""POST /attendance/sync: replay idempotent, urutan event, dedupe dalam batch"""
+import base64
+import datetime
+import itertools
+
+import numpy as np
+import pytest
+import pytz
+
+_seeds = itertools.count(100)
+
+
+def _embedding(vector: np.ndarray) -> str:
+    return base64.b64encode(np.asarray(vector, dtype="<f4").tobytes()).decode()
+
+
+@pytest.fixture
+def kiosk_user(client):
+    """User baru dengan wajah terdaftar: (user_id, embedding base64)"""
+    seed = next(_seeds)
+    face = _embedding(np.random.default_rng(seed).normal(size=128))
+    response = client.post("/users", json={"name": f"Kiosk {seed}", "email": f"kiosk{seed}@example.com", "face_embedding": face})
+    assert response.status_code == 200, response.text
+    return response.json()["id"], face
+
+
+def _at(hour: int, minute: int = 0) -> str:
+    """Jam WIB kemarin (di dalam jendela sync), tanpa offset"""
+    yesterday = datetime.datetime.now(pytz.timezone("Asia/Jakarta")).date() - datetime.timedelta(days=1)
+    return datetime.datetime.combine(yesterday, datetime.time(hour, minute)).isoformat()
+
+
+def _sync(client, *events):
+    response = client.post("/attendance/sync", json={"kiosk_id": "K-TEST", "location": "Lobby", "events": list(events)})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _attendance(user_id: int):
+    from models import Attendance, SessionLocal
+
+    db = SessionLocal()
+    try:
+        return db.query(Attendance).filter(Attendance.user_id == user_id).all()
+    finally:
+        db.close()
+
+
+def _without_replayed(result: dict) -> dict:
+    return {key: value for key, value in result.items() if key != "replayed"}
+
+
+def test_replay_returns_same_results(client, kiosk_user):
+    user_id, face = kiosk_user
+    events = [
+        {"idempotency_key": f"replay-in-{user_id}", "type": "check_in", "user_id": user_id,
+         "timestamp": _at(8, 30), "face_embedding": face},
+        {"idempotency_key": f"replay-out-{user_id}", "type": "check_out", "user_id": user_id, "timestamp": _at(17)},
+    ]
+    first = _sync(client, *events)
+    second = _sync(client, *events)
+
+    assert first["replayed"] == 0
+    assert second["replayed"] == 2
+    assert [result["status"] for result in first["results"]] == ["recorded", "recorded"]
+    assert [_without_replayed(result) for result in second["results"]] == [
+        _without_replayed(result) for result in first["results"]
+    ]
+    assert len(_attendance(user_id)) == 1
+
+
+def test_earlier_check_in_recomputes_work_hours(client, kiosk_user):
+    user_id, face = kiosk_user
+    _sync(
+        client,
+        {"idempotency_key": f"early-in-{user_id}", "type": "check_in", "user_id": user_id,
+         "timestamp": _at(9), "face_embedding": face},
+        {"idempotency_key": f"early-out-{user_id}", "type": "check_out", "user_id": user_id, "timestamp": _at(17)},
+    )
+    result = _sync(client, {"idempotency_key": f"early-in2-{user_id}", "type": "check_in", "user_id": user_id,
+                            "timestamp": _at(7), "face_embedding": face})
+
+    assert result["results"][0]["status"] == "updated"
+    [attendance] = _attendance(user_id)
+    assert attendance.check_in_time.hour == 7
+    assert attendance.work_hours == 10.0
+
+
+def test_check_out_before_check_in_is_rejected(client, kiosk_user):
+    user_id, face = kiosk_user
+    _sync(client, {"idempotency_key": f"order-in-{user_id}", "type": "check_in", "user_id": user_id,
+                   "timestamp": _at(9), "face_embedding": face})
+    result = _sync(client, {"idempotency_key": f"order-out-{user_id}", "type": "check_out", "user_id": user_id,
+                            "timestamp": _at(8, 30)})
+
+    assert result["results"][0]["status"] == "rejected"
+    assert result["results"][0]["reason"] == "Check-out sebelum check-in"
+    [attendance] = _attendance(user_id)
+    assert attendance.check_out_time is None
+    assert attendance.work_hours is None
+
+
+def test_duplicate_key_within_batch_is_processed_once(client, kiosk_user):
+    from models import KioskEvent, SessionLocal
+
+    user_id, face = kiosk_user
+    key = f"dup-{user_id}"
+    event = {"idempotency_key": key, "type": "check_in", "user_id": user_id, "timestamp": _at(8), "face_embedding": face}
+    # Kiosk mengirim ulang event yang sama (jam berbeda) di batch yang sama: yang pertama dipakai
+    result = _sync(client, event, {**event, "timestamp": _at(10)})
+
+    assert result["received"] == 2
+    assert result["outcomes"] == {"recorded": 1}
+    assert result["results"][0] == result["results"][1]
+    [attendance] = _attendance(user_id)
+    assert attendance.check_in_time.hour == 8
+    db = SessionLocal()
+    try:
+        assert db.query(KioskEvent).filter(KioskEvent.idempotency_key == key).count() == 1
+    finally:
+        db.close()
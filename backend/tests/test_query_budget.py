@@ -0,0 +1,49 @@
+"""
+Budget query SQL per endpoint: jumlah query tidak boleh naik (regresi N+1).
+Data seed punya SEED_USERS user, jadi query per user akan melewati budget.
+Kalau budget memang perlu dinaikkan, ubah angkanya di sini bersama perubahannya.
+"""
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from query_budget import assert_max_queries, count_queries
+
+QUERY_BUDGETS = {
+    "/reports/productivity-report": 5,
+    "/dashboard/bundle": 10,
+    "/dashboard/stats": 3,
+    "/tasks/search?q=laporan": 3,
+}
+
+
+@pytest.mark.parametrize("endpoint, max_queries", QUERY_BUDGETS.items())
+def test_endpoint_query_budget(client, endpoint, max_queries):
+    with assert_max_queries(max_queries):
+        response = client.get(endpoint)
+    assert response.status_code == 200
+    assert response.headers["x-db-n-plus-one"] == "0"
+
+
+def test_budget_header_counts_each_statement_once(client):
+    # QueryBudgetMiddleware dan count_queries() membaca hook SQL yang sama di metrics.py
+    with count_queries() as queries:
+        response = client.get("/dashboard/bundle")
+    assert int(response.headers["x-db-queries"]) == queries.count > 0
+
+
+def test_assert_max_queries_fails_over_budget(client):
+    with pytest.raises(AssertionError, match="Expected at most 0 queries"):
+        with assert_max_queries(0):
+            client.get("/reports/productivity-report")
+
+
+def test_failed_statement_is_counted_once(client):
+    from metrics import db_query_errors_total
+    from models import engine
+
+    before = db_query_errors_total.totals().get(("SELECT",), 0)
+    with count_queries() as queries:
+        with engine.connect() as conn, pytest.raises(OperationalError):
+            conn.exec_driver_sql("SELECT * FROM no_such_table")
+    assert "SELECT * FROM no_such_table" in queries.statements
+    assert db_query_errors_total.totals().get(("SELECT",), 0) == before + 1
@@ -0,0 +1,246 @@
+"""
+Import user massal (POST /users/bulk dan CLI import_users.py)
+
+Input CSV (header: name,email[,gender][,face_embedding]) atau NDJSON (satu
+object JSON per baris dengan key yang sama). face_embedding boleh JSON array
+atau base64 float32 little-endian, sama seperti POST /users.
+
+Alur, supaya 10k baris selesai dalam hitungan detik:
+1. Validasi per baris (nama, email, embedding) tanpa query
+2. Email yang sudah terdaftar dicek dengan satu query IN per 5000 email
+3. Wajah duplikat dicek vektor: batch x face gallery dan batch x batch
+4. Insert per chunk (executemany + RETURNING id), satu transaksi per chunk;
+   kalau chunk gagal (mis. email dimasukkan request lain di tengah jalan),
+   chunk itu diulang per baris supaya error bisa ditunjuk per baris
+5. Index in-memory (presence, face gallery) di-update sekali di akhir
+
+Baris yang gagal tidak menggagalkan baris lain; semua error dilaporkan
+dengan nomor baris (baris data pertama = 1).
+"""
+import csv
+import io
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import orjson
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import User, next_face_version
+from face_gallery import (
+    face_gallery, decode_embedding, normalize_embedding, embedding_to_json, FACE_DUPLICATE_THRESHOLD
+)
+from presence import presence_index
+
+logger = logging.getLogger("workflow_id")
+
+IMPORT_CHUNK_SIZE = 1000
+EMAIL_LOOKUP_CHUNK = 5000
+GENDERS = {"male", "female", "other"}
+
+
+# Helper function: Detect gender from name (simple pattern matching)
+def detect_gender_from_name(name: str) -> str:
+    """Simple gender detection from Indonesian names"""
+    name_lower = name.lower()
+
+    # Common female name patterns
+    female_patterns = ['siti', 'putri', 'dewi', 'ayu', 'sri', 'indah', 'rina', 'wati', 'ani', 'fitri']
+    # Common male name patterns
+    male_patterns = ['ahmad', 'muhammad', 'budi', 'agus', 'adi', 'doni', 'joko', 'hendra', 'rudi', 'yanto']
+
+    for pattern in female_patterns:
+        if pattern in name_lower:
+            return 'female'
+
+    for pattern in male_patterns:
+        if pattern in name_lower:
+            return 'male'
+
+    return 'other'  # Default if can't determine
+
+
+class ImportFormatError(ValueError):
+    """Isi file tidak bisa dibaca sebagai CSV/NDJSON sama sekali"""
+
+
+def parse_rows(content: bytes, fmt: str) -> List[dict]:
+    """CSV/NDJSON -> list dict; baris NDJSON yang rusak dikembalikan sebagai {"_error": ...}"""
+    text = content.decode("utf-8-sig")
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames or not {"name", "email"} <= {name.strip() for name in reader.fieldnames}:
+            raise ImportFormatError("CSV harus punya header minimal: name,email")
+        return [{key.strip(): value for key, value in row.items() if key} for row in reader]
+    if fmt == "ndjson":
+        rows = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                row = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                row = None
+            rows.append(row if isinstance(row, dict) else {"_error": "Baris bukan object JSON"})
+        return rows
+    raise ImportFormatError("Format harus csv atau ndjson")
+
+
+def _validate(rows: List[dict], errors: List[dict]) -> List[dict]:
+    """Validasi tanpa DB; hasil: kandidat insert (dengan nomor baris)"""
+    candidates = []
+    seen_emails: Dict[str, int] = {}
+    for number, row in enumerate(rows, start=1):
+        if "_error" in row:
+            errors.append({"row": number, "email": None, "error": row["_error"]})
+            continue
+        name = str(row.get("name") or "").strip()
+        email = str(row.get("email") or "").strip()
+        gender = str(row.get("gender") or "").strip().lower() or None
+        raw_embedding = row.get("face_embedding") or None
+
+        error = None
+        if not name:
+            error = "name wajib diisi"
+        elif "@" not in email:
+            error = "email tidak valid"
+        elif email in seen_emails:
+            error = f"email duplikat dengan baris {seen_emails[email]}"
+        elif gender is not None and gender not in GENDERS:
+            error = f"gender harus salah satu dari: {', '.join(sorted(GENDERS))}"
+
+        vector = None
+        if error is None and raw_embedding is not None:
+            if isinstance(raw_embedding, list):  # NDJSON boleh array langsung
+                raw_embedding = orjson.dumps(raw_embedding).decode()
+            vector = decode_embedding(str(raw_embedding))
+            if vector is None:
+                error = "face_embedding tidak valid"
+
+        if error:
+            errors.append({"row": number, "email": email or None, "error": error})
+            continue
+        seen_emails[email] = number
+        candidates.append({
+            "row": number,
+            "name": name,
+            "email": email,
+            "gender": gender or detect_gender_from_name(name),
+            "vector": vector
+        })
+    return candidates
+
+
+def _existing_emails(db: Session, emails: List[str]) -> set:
+    existing = set()
+    for start in range(0, len(emails), EMAIL_LOOKUP_CHUNK):
+        chunk = emails[start:start + EMAIL_LOOKUP_CHUNK]
+        existing.update(email for (email,) in db.query(User.email).filter(User.email.in_(chunk)))
+    return existing
+
+
+def _duplicate_faces(candidates: List[dict], threshold: float) -> Dict[int, str]:
+    """index kandidat -> pesan error untuk wajah yang sudah terdaftar / muncul di baris sebelumnya"""
+    with_face = [i for i, candidate in enumerate(candidates) if candidate["vector"] is not None]
+    if not with_face:
+        return {}
+    dimension = candidates[with_face[0]]["vector"].size
+    normalized = [(i, normalize_embedding(candidates[i]["vector"])) for i in with_face]
+    normalized = [(i, vector) for i, vector in normalized if vector is not None and vector.size == dimension]
+    if not normalized:
+        return {}
+    indexes = [i for i, _ in normalized]
+    batch = np.stack([vector for _, vector in normalized])
+
+    duplicates = {}
+    if len(face_gallery) and face_gallery.dimension == dimension:
+        for i, match in zip(indexes, face_gallery.find_duplicates(batch, threshold)):
+            if match:
+                duplicates[i] = f"wajah sudah terdaftar untuk user {match.user_id} (similarity {match.similarity:.4f})"
+
+    # Dalam batch: baris yang lebih akhir dianggap duplikat baris sebelumnya
+    for start in range(0, len(batch), IMPORT_CHUNK_SIZE):
+        block = batch[start:start + IMPORT_CHUNK_SIZE] @ batch[:start + IMPORT_CHUNK_SIZE].T
+        for offset in range(block.shape[0]):
+            position = start + offset
+            earlier = np.nonzero(block[offset, :position] >= threshold)[0]
+            if earlier.size and indexes[position] not in duplicates:
+                duplicates[indexes[position]] = f"wajah sama dengan baris {candidates[indexes[earlier[0]]]['row']}"
+    return duplicates
+
+
+def _insert_chunk(db: Session, chunk: List[dict]) -> List[tuple]:
+    """Insert satu chunk dalam satu transaksi; (id, face_version) dalam urutan chunk"""
+    inserted = {}
+    with_face = [c for c in chunk if c["vector"] is not None]
+    without_face = [c for c in chunk if c["vector"] is None]
+    returning = (User.email, User.id, User.face_version)
+    if with_face:
+        # Satu versi untuk seluruh chunk: kiosk tetap menerima semuanya lewat since=<versi sebelumnya>
+        statement = insert(User).values(face_version=next_face_version()).returning(*returning)
+        rows = db.execute(statement, [
+            {"name": c["name"], "email": c["email"], "gender": c["gender"], "face_embedding": embedding_to_json(c["vector"])}
+            for c in with_face
+        ])
+        inserted.update((email, (user_id, version)) for email, user_id, version in rows)
+    if without_face:
+        rows = db.execute(insert(User).returning(*returning), [
+            {"name": c["name"], "email": c["email"], "gender": c["gender"], "face_embedding": None}
+            for c in without_face
+        ])
+        inserted.update((email, (user_id, version)) for email, user_id, version in rows)
+    db.commit()
+    return [inserted[c["email"]] for c in chunk]
+
+
+def import_users(db: Session, rows: List[dict], chunk_size: int = IMPORT_CHUNK_SIZE,
+                 duplicate_threshold: Optional[float] = FACE_DUPLICATE_THRESHOLD) -> dict:
+    """Import rows hasil parse_rows; duplicate_threshold None = tanpa cek wajah duplikat"""
+    errors: List[dict] = []
+    candidates = _validate(rows, errors)
+
+    existing = _existing_emails(db, [c["email"] for c in candidates])
+    duplicates = _duplicate_faces(candidates, duplicate_threshold) if duplicate_threshold is not None else {}
+    accepted = []
+    for i, candidate in enumerate(candidates):
+        if candidate["email"] in existing:
+            errors.append({"row": candidate["row"], "email": candidate["email"], "error": "Email already registered"})
+        elif i in duplicates:
+            errors.append({"row": candidate["row"], "email": candidate["email"], "error": duplicates[i]})
+        else:
+            accepted.append(candidate)
+
+    created = []  # (kandidat, (user_id, face_version))
+    for start in range(0, len(accepted), chunk_size):
+        chunk = accepted[start:start + chunk_size]
+        try:
+            created.extend(zip(chunk, _insert_chunk(db, chunk)))
+        except IntegrityError:
+            db.rollback()
+            logger.warning(f"[USER_IMPORT] Chunk at row {chunk[0]['row']} failed, retrying row by row")
+            for candidate in chunk:
+                try:
+                    created.extend(zip([candidate], _insert_chunk(db, [candidate])))
+                except IntegrityError:
+                    db.rollback()
+                    errors.append({"row": candidate["row"], "email": candidate["email"], "error": "Email already registered"})
+
+    # Index in-memory: sekali di akhir
+    if created:
+        presence_index.add_users(user_id for _, (user_id, _) in created)
+        face_gallery.upsert_many(
+            (user_id, normalize_embedding(candidate["vector"]), version)
+            for candidate, (user_id, version) in created if candidate["vector"] is not None
+        )
+
+    errors.sort(key=lambda error: error["row"])
+    logger.info(f"[USER_IMPORT] {len(rows)} rows: {len(created)} created, {len(errors)} failed")
+    return {
+        "total_rows": len(rows),
+        "created": len(created),
+        "failed": len(errors),
+        "users": [{"row": candidate["row"], "id": user_id, "email": candidate["email"]} for candidate, (user_id, _) in created],
+        "errors": errors
+    }
@@ -0,0 +1,156 @@
+"""
+Kalender hari kerja (precomputed per bulan)
+
+- Hari kerja = Senin-Jumat, dikurangi Event dengan event_type == "holiday"
+- Di-cache per bulan; invalidate() dipanggil saat event holiday berubah.
+  Cache juga punya TTL karena invalidasi hanya berlaku di worker yang sama
+- absent_days_by_user(): absensi semua user dalam satu bulan dihitung dengan
+  satu perbandingan matrix (user x hari kerja) vs data kehadiran, bukan loop per user
+"""
+import bisect
+import calendar
+import datetime
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models import Attendance, Event
+
+logger = logging.getLogger("workflow_id")
+
+CALENDAR_CACHE_TTL = float(os.getenv("CALENDAR_CACHE_TTL", "600"))
+
+
+def month_bounds(year: int, month: int) -> Tuple[str, str]:
+    """(YYYY-MM-01, YYYY-MM-<last day>)"""
+    last_day = calendar.monthrange(year, month)[1]
+    return f"{year:04d}-{month:02d}-01", f"{year:04d}-{month:02d}-{last_day:02d}"
+
+
+class MonthCalendar:
+    def __init__(self, year: int, month: int, working_days: List[str], holidays: Dict[str, str]):
+        self.year = year
+        self.month = month
+        self.working_days = working_days  # sorted YYYY-MM-DD
+        self.holidays = holidays  # date -> event title
+        self.index = {day: i for i, day in enumerate(working_days)}
+
+    def __len__(self) -> int:
+        return len(self.working_days)
+
+    def count_until(self, date: str) -> int:
+        """Jumlah hari kerja dari awal bulan sampai dengan date (inklusif)"""
+        return bisect.bisect_right(self.working_days, date)
+
+    def is_working_day(self, date: str) -> bool:
+        return date in self.index
+
+
+class WorkingDayCalendar:
+    def __init__(self, ttl_seconds: float = CALENDAR_CACHE_TTL):
+        self.ttl_seconds = ttl_seconds
+        self._months: Dict[Tuple[int, int], Tuple[float, MonthCalendar]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._months)
+
+    def invalidate(self, date: Optional[str] = None) -> None:
+        """Hapus cache bulan dari date (YYYY-MM-DD), atau semua bulan"""
+        if date is None:
+            self._months.clear()
+        else:
+            self._months.pop((int(date[:4]), int(date[5:7])), None)
+        logger.info(f"[CALENDAR] Cache invalidated - {date or 'all months'}")
+
+    def get_month(self, db: Session, year: int, month: int) -> MonthCalendar:
+        key = (year, month)
+        cached = self._months.get(key)
+        if cached and time.monotonic() - cached[0] < self.ttl_seconds:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        first_day, last_day = month_bounds(year, month)
+        holidays = {
+            date: title for date, title in db.query(Event.date, Event.title).filter(
+                Event.event_type == "holiday",
+                Event.status != "cancelled",
+                Event.date >= first_day,
+                Event.date <= last_day
+            )
+        }
+
+        working_days = []
+        for day in range(1, calendar.monthrange(year, month)[1] + 1):
+            date = datetime.date(year, month, day)
+            date_str = date.isoformat()
+            if date.weekday() < 5 and date_str not in holidays:
+                working_days.append(date_str)
+
+        month_calendar = MonthCalendar(year, month, working_days, holidays)
+        self._months[key] = (time.monotonic(), month_calendar)
+        return month_calendar
+
+    def working_day_filter(self, db: Session, start: str, end: str) -> Callable[[str], bool]:
+        """is_working_day untuk range [start, end] yang bisa lintas bulan (dipakai leave_days_by_user)"""
+        months: Dict[str, MonthCalendar] = {}
+        year, month = int(start[:4]), int(start[5:7])
+        while (year, month) <= (int(end[:4]), int(end[5:7])):
+            months[f"{year:04d}-{month:02d}"] = self.get_month(db, year, month)
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return lambda date: date[:7] in months and months[date[:7]].is_working_day(date)
+
+    def absent_days_by_user(self, db: Session, year: int, month: int, user_ids: Iterable[int],
+                            until: Optional[str] = None,
+                            excused: Sequence[Tuple[int, str, str]] = ()) -> Dict[int, int]:
+        """
+        Hari kerja tanpa attendance per user, dari awal bulan sampai `until` (inklusif).
+        Satu query kehadiran + satu perbandingan matrix untuk semua user.
+        excused: (user_id, start, end) hari izin yang tidak dihitung alpha.
+        """
+        month_calendar = self.get_month(db, year, month)
+        user_ids = list(user_ids)
+        elapsed = month_calendar.count_until(until) if until else len(month_calendar)
+        if not user_ids or elapsed == 0:
+            return {user_id: 0 for user_id in user_ids}
+
+        days = month_calendar.working_days[:elapsed]
+        rows = db.query(Attendance.user_id, Attendance.date).filter(
+            Attendance.date >= days[0],
+            Attendance.date <= days[-1]
+        )
+        if len(user_ids) < 500:
+            rows = rows.filter(Attendance.user_id.in_(user_ids))
+
+        user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+        row_idx, col_idx = [], []
+        for user_id, date in rows:
+            u = user_index.get(user_id)
+            d = month_calendar.index.get(date)
+            if u is not None and d is not None and d < elapsed:
+                row_idx.append(u)
+                col_idx.append(d)
+
+        present = np.zeros((len(user_ids), elapsed), dtype=bool)
+        present[row_idx, col_idx] = True
+
+        # Hari izin dianggap "tercakup": set slice kolom sekaligus per interval
+        for user_id, start, end in excused:
+            u = user_index.get(user_id)
+            if u is None:
+                continue
+            first = bisect.bisect_left(days, start)
+            last = bisect.bisect_right(days, end)
+            present[u, first:last] = True
+
+        absent = elapsed - present.sum(axis=1)
+        return dict(zip(user_ids, absent.tolist()))
+
+
+working_day_calendar = WorkingDayCalendar()
@@ -8,6 +8,7 @@ export const API_ENDPOINTS = {
   tasks: `${API_BASE_URL}/tasks`,
   reports: `${API_BASE_URL}/reports`,
   events: `${API_BASE_URL}/events`,
+  gallery: `${API_BASE_URL}/gallery`,
   auth: {
     login: `${API_BASE_URL}/auth/login`,
     register: `${API_BASE_URL}/auth/register`,
@@ -15,6 +16,7 @@ export const API_ENDPOINTS = {
     logout: `${API_BASE_URL}/auth/logout`,
   },
   dashboard: {
+    bundle: `${API_BASE_URL}/dashboard/bundle`,
     stats: `${API_BASE_URL}/dashboard/stats`,
     attendanceWeekly: `${API_BASE_URL}/dashboard/attendance-weekly`,
     taskDistribution: `${API_BASE_URL}/dashboard/task-distribution`,
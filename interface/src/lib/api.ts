@@ -36,10 +36,12 @@ export async function apiCall<T = any>(
     console.log('   Response Data:', data)
 
     if (!response.ok) {
+      // detail bisa berupa object (mis. 409 wajah duplikat: { message, conflicting_user_id })
+      const errorMessage = data.detail?.message || data.detail || data.message || 'Request failed'
       console.error('❌ [API CALL] Request failed!')
-      console.error('   Error:', data.detail || data.message || 'Request failed')
+      console.error('   Error:', errorMessage)
       return {
-        error: data.detail || data.message || 'Request failed',
+        error: errorMessage,
         data: undefined,
       }
     }
@@ -109,7 +111,9 @@ export async function apiDelete<T = any>(
 
 // Export specific API functions
 export const userApi = {
-  getAll: () => apiGet(API_ENDPOINTS.users),
+  getAll: (fields?: string[]) =>
+    apiGet(fields?.length ? `${API_ENDPOINTS.users}?fields=${fields.join(',')}` : API_ENDPOINTS.users),
+  getDirectory: () => apiGet(`${API_ENDPOINTS.users}/directory`),
   getById: (id: number) => apiGet(`${API_ENDPOINTS.users}/${id}`),
   create: (data: any) => apiPost(API_ENDPOINTS.users, data),
   update: (id: number, data: any) => apiPut(`${API_ENDPOINTS.users}/${id}`, data),
@@ -127,6 +131,22 @@ export const attendanceApi = {
   },
   getStats: (userId: number) => apiGet(`${API_ENDPOINTS.attendance}/stats/${userId}`),
   getToday: () => apiGet(`${API_ENDPOINTS.attendance}/today`),
+  /**
+   * Live feed absensi hari ini (Server-Sent Events) - pengganti polling getToday()
+   * onSnapshot dipanggil sekali saat (re)connect, onChange untuk setiap check-in/check-out.
+   * Return: fungsi untuk menutup koneksi.
+   */
+  subscribeToday: (
+    onSnapshot: (snapshot: any) => void,
+    onChange: (type: 'check_in' | 'check_out' | 'attendance_update', record: any) => void
+  ) => {
+    const source = new EventSource(`${API_ENDPOINTS.attendance}/stream`)
+    source.addEventListener('snapshot', (e) => onSnapshot(JSON.parse((e as MessageEvent).data)))
+    source.addEventListener('check_in', (e) => onChange('check_in', JSON.parse((e as MessageEvent).data)))
+    source.addEventListener('check_out', (e) => onChange('check_out', JSON.parse((e as MessageEvent).data)))
+    source.addEventListener('attendance_update', (e) => onChange('attendance_update', JSON.parse((e as MessageEvent).data)))
+    return () => source.close()
+  },
 }
 
 export const taskApi = {
@@ -141,11 +161,25 @@ export const taskApi = {
   createV2: (data: any) => apiPost(`${API_ENDPOINTS.tasks}/v2`, data),
   updateV2: (id: number, data: any) => apiPut(`${API_ENDPOINTS.tasks}/v2/${id}`, data),
   deleteV2: (id: number) => apiDelete(`${API_ENDPOINTS.tasks}/v2/${id}`),
+  // Bulk: satu request + satu transaksi untuk banyak task, hasil per item
+  createBulk: (data: any) => apiPost(`${API_ENDPOINTS.tasks}/v2/bulk`, data),
+  updateBulk: (ids: number[], changes: { priority?: string; status?: string; completed?: boolean }) =>
+    apiCall(`${API_ENDPOINTS.tasks}/v2/bulk`, { method: 'PATCH', body: JSON.stringify({ ids, ...changes }) }),
+  deleteBulk: (ids: number[]) =>
+    apiCall(`${API_ENDPOINTS.tasks}/v2/bulk`, { method: 'DELETE', body: JSON.stringify({ ids }) }),
   getStats: (userId: number) => apiGet(`${API_ENDPOINTS.tasks}/stats/${userId}`),
+  // Full-text search di server (urut relevansi), params: user_id, status, priority, limit, offset
+  search: (q: string, params?: Record<string, string | number>) => {
+    const query = new URLSearchParams({ q, ...params } as Record<string, string>).toString()
+    return apiGet(`${API_ENDPOINTS.tasks}/search?${query}`)
+  },
 }
 
 // Dashboard API - Real-time analytics
 export const dashboardApi = {
+  // Semua widget dalam satu request (widgets: subset, default semua)
+  getBundle: (widgets?: string[]) =>
+    apiGet(`${API_ENDPOINTS.dashboard.bundle}${widgets?.length ? `?widgets=${widgets.join(',')}` : ''}`),
   getStats: () => apiGet(API_ENDPOINTS.dashboard.stats),
   getAttendanceWeekly: () => apiGet(API_ENDPOINTS.dashboard.attendanceWeekly),
   getTaskDistribution: () => apiGet(API_ENDPOINTS.dashboard.taskDistribution),
@@ -162,6 +196,11 @@ export const eventApi = {
   },
   create: (data: any) => apiPost(API_ENDPOINTS.events, data),
   getUpcoming: (limit: number = 5) => apiGet(`${API_ENDPOINTS.events}/upcoming?limit=${limit}`),
+  // params: status, event_type, limit, offset
+  search: (q: string, params?: Record<string, string | number>) => {
+    const query = new URLSearchParams({ q, ...params } as Record<string, string>).toString()
+    return apiGet(`${API_ENDPOINTS.events}/search?${query}`)
+  },
 }
 
 // Report API - Analytics and exports
@@ -0,0 +1,58 @@
+import { API_ENDPOINTS } from '@/constants/config'
+
+/**
+ * Cache face gallery lokal (id user -> embedding) yang disinkron incremental
+ * lewat GET /gallery?since=<version>. Sinkron pertama mengunduh full snapshot,
+ * selanjutnya hanya embedding yang berubah sejak versi terakhir.
+ *
+ * Format biner: lihat backend/face_gallery.py
+ */
+const GALLERY_MAGIC = 'FGAL'
+const HEADER_SIZE = 24
+const FLAG_FULL = 1
+
+let galleryVersion = 0
+const galleryEmbeddings = new Map<number, Float32Array>()
+
+function applyGalleryDelta(buffer: ArrayBuffer) {
+  const view = new DataView(buffer)
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4))
+  if (magic !== GALLERY_MAGIC) {
+    throw new Error('Invalid gallery payload')
+  }
+
+  const flags = view.getUint8(5)
+  const dimension = view.getUint16(6, true)
+  const version = Number(view.getBigInt64(8, true))
+  const upserts = view.getUint32(16, true)
+  const removed = view.getUint32(20, true)
+
+  if (flags & FLAG_FULL) {
+    galleryEmbeddings.clear()
+  }
+
+  // slice() supaya offset Int32Array/Float32Array selalu kelipatan 4
+  const ids = new Int32Array(buffer.slice(HEADER_SIZE, HEADER_SIZE + upserts * 4))
+  const vectorsOffset = HEADER_SIZE + upserts * 4
+  const vectors = new Float32Array(buffer.slice(vectorsOffset, vectorsOffset + upserts * dimension * 4))
+  ids.forEach((id, i) => {
+    galleryEmbeddings.set(id, vectors.subarray(i * dimension, (i + 1) * dimension))
+  })
+
+  const removedOffset = vectorsOffset + upserts * dimension * 4
+  new Int32Array(buffer.slice(removedOffset, removedOffset + removed * 4)).forEach((id) => {
+    galleryEmbeddings.delete(id)
+  })
+
+  galleryVersion = version
+}
+
+export async function syncFaceGallery(): Promise<Map<number, Float32Array>> {
+  const response = await fetch(`${API_ENDPOINTS.gallery}?since=${galleryVersion}`)
+  if (!response.ok) {
+    throw new Error(`Failed to sync face gallery (${response.status})`)
+  }
+  applyGalleryDelta(await response.arrayBuffer())
+  console.log(`🖼️ [GALLERY] Synced to version ${galleryVersion} (${galleryEmbeddings.size} faces)`)
+  return galleryEmbeddings
+}
@@ -88,3 +88,19 @@ export function safeJsonParse<T>(str: string, fallback: T): T {
     return fallback
   }
 }
+
+/**
+ * Encode face descriptor sebagai base64 float32 little-endian
+ * (~4x lebih kecil dari JSON.stringify, backend decode dengan np.frombuffer)
+ */
+export function encodeEmbedding(descriptor: Float32Array | number[]): string {
+  const values = descriptor instanceof Float32Array ? descriptor : Float32Array.from(descriptor)
+  const bytes = new Uint8Array(values.length * 4)
+  const view = new DataView(bytes.buffer)
+  values.forEach((value, i) => view.setFloat32(i * 4, value, true))
+  let binary = ''
+  bytes.forEach((byte) => {
+    binary += String.fromCharCode(byte)
+  })
+  return btoa(binary)
+}
@@ -19,6 +19,7 @@ import ScanningAnimation from '@/components/auth/ScanningAnimation'
 import SuccessAnimation from '@/components/auth/SuccessAnimation'
 import { isValidEmail } from '@/utils/validation'
 import { userApi } from '@/lib/api'
+import { syncFaceGallery } from '@/lib/faceGallery'
 import { TOAST_MESSAGES } from '@/constants/config'
 
 export default function LoginPage() {
@@ -118,28 +119,26 @@ export default function LoginPage() {
       setMatchProgress(50)
       setScanningStatus('Mengambil data pengguna...')
 
-      // Get all users from backend
-      const response = await userApi.getAll()
+      // Sinkron embedding (incremental) + data user tanpa embedding
+      const [gallery, response] = await Promise.all([
+        syncFaceGallery(),
+        userApi.getAll(['id', 'name', 'email', 'gender']),
+      ])
       
       if (response.error || !response.data) {
         throw new Error(response.error || 'Failed to fetch users')
       }
 
-      const users = response.data
       setMatchProgress(70)
       setScanningStatus('Memproses data wajah...')
 
       // Prepare embeddings for matching
       const embeddings: Float32Array[] = []
-      const validUsers = users.filter((user: any) => {
-        if (user.face_embedding) {
-          try {
-            const embedding = new Float32Array(JSON.parse(user.face_embedding))
-            embeddings.push(embedding)
-            return true
-          } catch {
-            return false
-          }
+      const validUsers = response.data.filter((user: any) => {
+        const embedding = gallery.get(user.id)
+        if (embedding) {
+          embeddings.push(embedding)
+          return true
         }
         return false
       })
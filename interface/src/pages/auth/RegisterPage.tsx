@@ -11,6 +11,7 @@ import StepIndicator from '@/components/auth/StepIndicator'
 import PersonalInfoStep from '@/components/auth/PersonalInfoStep'
 import { isValidEmail, calculatePasswordStrength } from '@/utils/validation'
 import { userApi } from '@/lib/api'
+import { encodeEmbedding } from '@/lib/utils'
 import { TOAST_MESSAGES } from '@/constants/config'
 import type { RegisterData } from '@/types'
 
@@ -99,7 +100,7 @@ export default function RegisterPage() {
     // Check email availability before proceeding
     setIsLoading(true)
     try {
-      const checkResponse = await userApi.getAll()
+      const checkResponse = await userApi.getAll(['id', 'email'])
       
       if (checkResponse.data) {
         const existingUser = checkResponse.data.find(
@@ -166,7 +167,7 @@ export default function RegisterPage() {
 
       // Face detected! Now create user with face embedding
       const embeddingArray = Array.from(detection.descriptor)
-      const embeddingString = JSON.stringify(embeddingArray)
+      const embeddingString = encodeEmbedding(embeddingArray)
 
       toast({
         title: 'Wajah Terdeteksi!',
@@ -4,6 +4,7 @@ import { Button } from '@/components/ui/button'
 import { useState, useEffect, useCallback } from 'react'
 import { useAuth } from '@/contexts/AuthContext'
 import { attendanceApi } from '@/lib/api'
+import { encodeEmbedding } from '@/lib/utils'
 import { useFaceDetection } from '@/hooks/useFaceDetection'
 import { 
   ClockIcon, 
@@ -170,7 +171,7 @@ export default function AbsensiPage() {
       
       const payload = {
         user_id: user.id,
-        face_embedding: JSON.stringify(faceEmbeddingArray),
+        face_embedding: encodeEmbedding(result.descriptor),
         location: 'Office'
       }
       
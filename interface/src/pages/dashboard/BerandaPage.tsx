@@ -53,15 +53,16 @@ export default function BerandaPage() {
         setLoading(true)
         setError(null)
 
-        // Fetch semua data secara paralel
-        const [stats, attendance, taskDist, activities, productivity, events] = await Promise.all([
-          dashboardApi.getStats(),
-          dashboardApi.getAttendanceWeekly(),
-          dashboardApi.getTaskDistribution(),
-          dashboardApi.getRecentActivities(),
-          dashboardApi.getProductivityTrend(),
-          dashboardApi.getUpcomingEvents(),
-        ])
+        // Fetch semua widget dalam satu request
+        const bundle = await dashboardApi.getBundle()
+        if (bundle.error) throw new Error(bundle.error)
+        const widgets = bundle.data?.widgets || {}
+        const stats = { data: widgets.stats }
+        const attendance = { data: widgets.attendance_weekly }
+        const taskDist = { data: widgets.task_distribution }
+        const activities = { data: widgets.recent_activities }
+        const productivity = { data: widgets.productivity_trend }
+        const events = { data: widgets.upcoming_events }
 
         // Transform Stats Data untuk UI
         if (stats.data) {
@@ -5,6 +5,7 @@ import { Input } from '@/components/ui/input'
 import { useState, useEffect, useRef } from 'react'
 import { useAuth } from '@/contexts/AuthContext'
 import { userApi } from '@/lib/api'
+import { encodeEmbedding } from '@/lib/utils'
 import * as faceapi from 'face-api.js'
 import { 
   Cog6ToothIcon,
@@ -182,7 +183,7 @@ export default function PengaturanPage() {
       setMessage(null)
       
       const response = await userApi.update(user.id, {
-        face_embedding: JSON.stringify(faceEmbedding)
+        face_embedding: encodeEmbedding(faceEmbedding)
       })
       
       if (response.error) {
@@ -13,6 +13,7 @@ import {
   ClockIcon,
   ExclamationTriangleIcon,
   FunnelIcon,
+  MagnifyingGlassIcon,
 } from '@heroicons/react/24/outline'
 
 interface Task {
@@ -64,10 +65,13 @@ export default function TugasPage() {
   })
   const [filterPriority, setFilterPriority] = useState<string>('')
   const [filterCategory, setFilterCategory] = useState<string>('')
+  const [searchQuery, setSearchQuery] = useState<string>('')
 
   useEffect(() => {
-    fetchTasks()
-  }, [user, filterPriority, filterCategory])
+    // Debounce supaya tidak ada request per ketikan
+    const timer = setTimeout(fetchTasks, searchQuery ? 300 : 0)
+    return () => clearTimeout(timer)
+  }, [user, filterPriority, filterCategory, searchQuery])
 
   const fetchTasks = async () => {
     if (!user) return
@@ -77,9 +81,20 @@ export default function TugasPage() {
       if (filterPriority) params.priority = filterPriority
       if (filterCategory) params.category = filterCategory
       
-      const response = await taskApi.getUserTasks(user.id, params)
-      if (response.data) {
-        setTasks(response.data.tasks || [])
+      if (searchQuery.trim()) {
+        // Full-text search di server (urut relevansi); kategori belum ada di index, difilter di sini
+        const searchParams: Record<string, string | number> = { user_id: user.id, limit: 100 }
+        if (filterPriority) searchParams.priority = filterPriority
+        const response = await taskApi.search(searchQuery.trim(), searchParams)
+        if (response.data) {
+          const found: Task[] = response.data.tasks || []
+          setTasks(filterCategory ? found.filter(task => task.category === filterCategory) : found)
+        }
+      } else {
+        const response = await taskApi.getUserTasks(user.id, params)
+        if (response.data) {
+          setTasks(response.data.tasks || [])
+        }
       }
 
       const statsRes = await taskApi.getStats(user.id)
@@ -209,6 +224,16 @@ export default function TugasPage() {
       <Card className="border-0 shadow-lg">
         <CardContent className="p-4">
           <div className="flex items-center gap-4">
+            <div className="relative flex-1 max-w-sm">
+              <MagnifyingGlassIcon className="absolute left-3 top-1/2 -translate-y-1/2 w-5 h-5 text-slate-400" />
+              <Input
+                type="text"
+                placeholder="Cari judul atau deskripsi task..."
+                value={searchQuery}
+                onChange={(e) => setSearchQuery(e.target.value)}
+                className="pl-10"
+              />
+            </div>
             <FunnelIcon className="w-5 h-5 text-slate-600" />
             <select
               value={filterPriority}
@@ -232,12 +257,13 @@ export default function TugasPage() {
               <option value="meeting">Meeting</option>
               <option value="review">Review</option>
             </select>
-            {(filterPriority || filterCategory) && (
+            {(filterPriority || filterCategory || searchQuery) && (
               <Button
                 variant="outline"
                 onClick={() => {
                   setFilterPriority('')
                   setFilterCategory('')
+                  setSearchQuery('')
                 }}
               >
                 Reset Filter